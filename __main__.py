@@ -1,27 +1,47 @@
+import os
 import logging
 import uvicorn
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+
+# Settings are read when the src modules are imported (defaults and module level singletons), so the
+# .env file has to be loaded first
+load_dotenv()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.routes.stream_chat import chat_router
-from src.routes.helper import helper_router
-
-load_dotenv()
+from src.routes.helper import helper_router, register_stats_collector
+from src.utils.http_client import close_http_clients
+from src.utils.runs import run_manager
+from src.utils.tracing import tracer
+from src.utils.watchdog import loop_watchdog
 
 logging.basicConfig(filemode="server.log", level=logging.INFO, format="%(asctime)s %(levelname)s:%(message)s")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.getenv("LOOP_WATCHDOG", "false").lower() == "true":
+        loop_watchdog.start()
+    yield
+    await loop_watchdog.stop()
+    await run_manager.close()
+    await tracer.close()
+    await close_http_clients()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Type"]
+    expose_headers=["Content-Type", "X-Run-Id"]
 )
 
 app.include_router(chat_router)
 app.include_router(helper_router)
+register_stats_collector()
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""
+Offline load test of /chat_stream: the app runs with a fake Gemini model (configurable latency and token rate)
+and the local stub server in place of Tavily, CoinGecko and wttr.in
+
+Usage:
+    python -m benchmarks.bench_chat --requests 200 --concurrency 20 --mode both
+    python -m benchmarks.bench_chat --mode timeline --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_chat --baseline benchmarks/baseline.json --tolerance 0.1
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+import urllib.parse
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+# Placeholders so the API clients can be created, no request leaves the machine
+os.environ.setdefault("GOOGLE_API_KEY", "offline")
+os.environ.setdefault("TAVILY_API_KEY", "offline")
+os.environ.setdefault("CHECKPOINTER", "memory")
+# Keep the stub coin list out of the real coin index snapshot
+os.environ.setdefault("COIN_INDEX_PATH", os.path.join(tempfile.gettempdir(), "bench_chat_coins_list.json"))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from langgraph.checkpoint.memory import InMemorySaver
+from src.agent.chat import chat as chat_module
+from src.checkpoint.memory_saver import BoundedMemorySaver
+from src.tools import weather
+from src.tools.crypto_markets import CryptoDataTool
+from src.tools.search_tools import tavily_search
+from src.utils.http_client import close_http_clients
+from src.utils.runs import run_manager
+from src.utils.tracing import tracer
+from src.utils.watchdog import LoopWatchdog
+from tests.fake_gemini import FakeGeminiModel
+from tests.stub_server import StubServer, COINS
+
+# Lower is better for every metric but these
+HIGHER_IS_BETTER = {"rps"}
+
+SUBJECTS = ("bitcoin ETFs", "the Fed rate decision", "the Ethereum upgrade", "chip export rules", "the Mars mission", "EU AI rules")
+
+@dataclass(slots=True)
+class RequestResult:
+    status: int
+    ttfb: float | None = None
+    ttft: float | None = None
+    ttlb: float | None = None
+    errors: int = 0
+
+class ServerThread:
+    """
+    Serves the app from its own thread and event loop, so the load generator does not add to the measured lag
+    """
+    def __init__(self, app: FastAPI, lag_interval: float, lag_threshold: float):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.watchdog = LoopWatchdog(interval=lag_interval, threshold=lag_threshold, history=None)
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+
+    async def _serve(self):
+        self.watchdog.start()
+        try:
+            await self.server.serve()
+        finally:
+            await self.watchdog.stop()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self._thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self._thread.join()
+
+def build_app(llm: FakeGeminiModel) -> FastAPI:
+    """
+    Same app as `__main__.py`, with the chat graph built on the fake model
+    """
+    chat_module.get_gemini_model = lambda **kwargs: llm
+    # The chat graph is built when the route module is imported
+    from src.routes.stream_chat import chat_router
+    from src.routes.helper import helper_router, register_stats_collector
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        await run_manager.close()
+        await tracer.close()
+        await close_http_clients()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(chat_router)
+    app.include_router(helper_router)
+    register_stats_collector()
+    return app
+
+def question(index: int, mode: str) -> tuple[str, str, str]:
+    """
+    Message, topic and mode of the `index`th request: searches, weather and prices in informative mode
+    (prices cycle through the stub coins), searches in timeline mode
+    """
+    subject = f"{SUBJECTS[index % len(SUBJECTS)]} ({index})"
+    if mode == "both":
+        mode = ("informative", "timeline")[index % 2]
+        index //= 2
+    if mode == "timeline":
+        return f"Timeline of {subject}", "general", "timeline"
+
+    if index % 3 == 1:
+        return f"What's the weather in Town {index}?", "general", "informative"
+    if index % 3 == 2:
+        return f"What is the price of {list(COINS)[index // 3 % len(COINS)]}?", "finance", "informative"
+    return f"What happened with {subject}?", "news", "informative"
+
+async def chat_request(client: httpx.AsyncClient, message: str, topic: str, mode: str) -> RequestResult:
+    start = time.perf_counter()
+    url = f"/chat_stream/{urllib.parse.quote(message, safe='')}"
+    async with client.stream("GET", url, params={"topic": topic, "mode": mode}) as response:
+        result = RequestResult(status=response.status_code)
+        if response.status_code != 200:
+            await response.aread()
+            return result
+
+        async for line in response.aiter_lines():
+            if result.ttfb is None:
+                result.ttfb = time.perf_counter() - start
+            if not line.startswith("data: "):
+                continue
+            frame_type = json.loads(line[len("data: "):]).get("type")
+            if result.ttft is None and frame_type in ("content", "timeline_event"):
+                result.ttft = time.perf_counter() - start
+            elif frame_type == "error":
+                result.errors += 1
+
+    result.ttlb = time.perf_counter() - start
+    return result
+
+async def run_load(url: str, requests: int, concurrency: int, mode: str, offset: int = 0) -> tuple[list[RequestResult], float]:
+    """
+    Send `requests` chat requests with at most `concurrency` in flight, return their results and the elapsed seconds
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=None, limits=limits) as client:
+        async def send(index: int) -> RequestResult:
+            async with semaphore:
+                return await chat_request(client, *question(offset + index, mode))
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[send(index) for index in range(requests)])
+        return results, time.perf_counter() - start
+
+def checkpoint_memory(saver) -> dict[str, int] | None:
+    """
+    Threads and serialized bytes held by an in-memory checkpoint saver
+    """
+    if not isinstance(saver, (BoundedMemorySaver, InMemorySaver)):
+        return None
+
+    def size(value) -> int:
+        if isinstance(value, (bytes, bytearray, str)):
+            return len(value)
+        if isinstance(value, dict):
+            return sum(size(key) + size(item) for key, item in value.items())
+        if isinstance(value, (list, tuple)):
+            return sum(size(item) for item in value)
+        return 0
+
+    if isinstance(saver, BoundedMemorySaver):
+        return {"threads": len(saver.storage), "bytes": size(saver.storage)}
+    return {"threads": len(saver.storage), "bytes": size(saver.storage) + size(saver.writes) + size(saver.blobs)}
+
+def percentiles(values: list[float], scale: float = 1000) -> dict[str, float]:
+    if not values:
+        return {}
+    values = sorted(values)
+    pick = lambda quantile: round(values[min(len(values) - 1, int(len(values) * quantile))] * scale, 2)
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": round(values[-1] * scale, 2)}
+
+def summarize(results: list[RequestResult], elapsed: float, watchdog: LoopWatchdog, memory_before: dict | None, memory_after: dict | None) -> dict:
+    completed = [result for result in results if result.status == 200]
+    summary = {
+        "requests": len(results),
+        "rejected": len(results) - len(completed),
+        "stream_errors": sum(result.errors for result in completed),
+        "rps": round(len(completed) / elapsed, 2),
+        "ttfb_ms": percentiles([result.ttfb for result in completed if result.ttfb is not None]),
+        "ttft_ms": percentiles([result.ttft for result in completed if result.ttft is not None]),
+        "ttlb_ms": percentiles([result.ttlb for result in completed if result.ttlb is not None]),
+        "loop_lag_ms": percentiles(list(watchdog.lags)),
+        "loop_stalls": watchdog.stalls,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+    if memory_before is not None and memory_after is not None:
+        growth = memory_after["bytes"] - memory_before["bytes"]
+        summary["checkpoint_memory"] = {
+            "threads": memory_after["threads"],
+            "growth_bytes": growth,
+            "bytes_per_request": round(growth / max(len(completed), 1))
+        }
+    # Not compared with the baseline, shows where to look when the lag regresses
+    summary["loop_offenders"] = [f"{offender['location']} ({offender['blocked_seconds']}s)" for offender in watchdog.stats(top=5)["offenders"]]
+    return summary
+
+def flatten(summary: dict, prefix: str = "") -> dict[str, float]:
+    values = {}
+    for key, value in summary.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            values[f"{prefix}{key}"] = value
+    return values
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """
+    Print the change of every metric against the baseline and return the regressions (worse by more than `tolerance`)
+    """
+    regressions = []
+    baseline_values, current_values = flatten(baseline), flatten(current)
+
+    print(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>9}")
+    for metric, before in baseline_values.items():
+        if metric not in current_values or metric == "requests":
+            continue
+        after = current_values[metric]
+        change = (after - before) / before if before else 0.0
+        worse = -change if metric.rsplit(".", 1)[-1] in HIGHER_IS_BETTER else change
+        # Counts of failures have no meaningful relative change, any increase is a regression
+        regressed = after > before if metric.endswith(("rejected", "stream_errors", "loop_stalls")) else worse > tolerance
+        if regressed:
+            regressions.append(metric)
+        print(f"{metric:<40} {before:>12} {after:>12} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--mode", choices=("informative", "timeline", "both"), default="both")
+    parser.add_argument("--warmup", type=int, default=5, help="Requests sent before measuring")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds before the first token of each LLM call")
+    parser.add_argument("--token-rate", type=float, default=100, help="Tokens/sec of the LLM streams (0 = no delay)")
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="Stub server latency in seconds")
+    parser.add_argument("--lag-interval", type=float, default=0.01, help="Event loop lag sampling interval in seconds")
+    parser.add_argument("--lag-threshold", type=float, default=0.05, help="Seconds the event loop has to be blocked for its stack to be sampled")
+    parser.add_argument("--baseline", help="Baseline JSON to compare the results with")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    llm = FakeGeminiModel(latency=args.llm_latency, token_rate=args.token_rate, answer_tokens=args.answer_tokens)
+    app = build_app(llm)
+    from src.routes.stream_chat import graph_instance
+
+    with StubServer(latency=args.tool_latency) as stubs, ServerThread(app, args.lag_interval, args.lag_threshold) as server:
+        CryptoDataTool.BASE_URL = stubs.coingecko_url
+        weather.WTTR_BASE_URL = stubs.weather_url
+        tavily_search.api_wrapper.api_base_url = stubs.url
+
+        asyncio.run(run_load(server.url, args.warmup, 1, args.mode, offset=args.requests))
+        memory_before = checkpoint_memory(graph_instance.checkpointer)
+        server.watchdog.lags.clear()
+        server.watchdog.offenders.clear()
+        server.watchdog.stalls = 0
+
+        results, elapsed = asyncio.run(run_load(server.url, args.requests, args.concurrency, args.mode))
+        memory_after = checkpoint_memory(graph_instance.checkpointer)
+        summary = summarize(results, elapsed, server.watchdog, memory_before, memory_after)
+
+    config = {name: value for name, value in vars(args).items() if name not in ("baseline", "save_baseline", "tolerance")}
+    print(json.dumps({"config": config, "results": summary}, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump({"config": config, "results": summary}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get("config") != config:
+            print(f"Warning: the baseline was measured with other settings: {baseline.get('config')}")
+        regressions = compare(baseline["results"], summary, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark of the SSE frame encoding and coalescing
+
+Usage:
+    python -m benchmarks.bench_sse --frames 100000 --burst 8
+"""
+import argparse
+import asyncio
+import json
+import time
+from src.utils import sse
+from src.utils.sse import encode_event, coalesce_frames
+
+def payloads(count: int) -> list[dict]:
+    return [{"type": "content", "content": f"token {index} ", "id": "lc_run--0f3c", "offset": index * 8} for index in range(count)]
+
+def bench_encoding(items: list[dict]) -> dict[str, float]:
+    """
+    Frames/sec of the original f-string + json.dumps frames and of encode_event with each JSON backend
+    """
+    results = {}
+
+    start = time.perf_counter()
+    for payload in items:
+        f"data: {json.dumps(payload)}\n\n".encode()
+    results["f-string json.dumps"] = len(items) / (time.perf_counter() - start)
+
+    orjson = sse.orjson
+    for backend in ("json", "orjson"):
+        if backend == "orjson" and orjson is None:
+            continue
+        sse.orjson = orjson if backend == "orjson" else None
+        start = time.perf_counter()
+        for payload in items:
+            encode_event(payload)
+        results[f"encode_event ({backend})"] = len(items) / (time.perf_counter() - start)
+    sse.orjson = orjson
+
+    return results
+
+async def bench_coalescing(items: list[dict], burst: int) -> tuple[float, int]:
+    """
+    Frames/sec through coalesce_frames when frames arrive in bursts of `burst` per loop tick, and number of writes
+    """
+    async def frames():
+        for index, payload in enumerate(items):
+            if index % burst == 0:
+                await asyncio.sleep(0)
+            yield encode_event(payload)
+
+    writes = 0
+    start = time.perf_counter()
+    async for _ in coalesce_frames(frames()):
+        writes += 1
+    return len(items) / (time.perf_counter() - start), writes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--burst", type=int, default=8, help="Frames produced per event loop tick")
+    args = parser.parse_args()
+
+    items = payloads(args.frames)
+    for name, rate in bench_encoding(items).items():
+        print(f"{name + ':':<25} {rate:,.0f} frames/sec")
+
+    rate, writes = asyncio.run(bench_coalescing(items, args.burst))
+    print(f"{'coalesced stream:':<25} {rate:,.0f} frames/sec in {writes:,} writes ({args.frames / writes:.1f} frames/write)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Offline benchmark of the HTTP backed tools against the local stub server
+
+Usage:
+    python -m benchmarks.bench_tools --calls 500 --concurrency 50 --latency 0.02
+"""
+import argparse
+import asyncio
+import time
+from src.tools import weather
+from src.tools.crypto_markets import CryptoDataTool, get_crypto_price
+from src.utils.http_client import close_http_clients
+from tests.stub_server import StubServer
+
+async def run_benchmark(calls: int, concurrency: int) -> list[float]:
+    """
+    Run `calls` tool invocations with at most `concurrency` in flight and return their latencies
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def call(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            if index % 2:
+                await weather.get_weather.ainvoke({"city": "Paris"})
+            else:
+                await get_crypto_price.ainvoke({"coin_id": "bitcoin"})
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[call(i) for i in range(calls)])
+    await close_http_clients()
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub server latency in seconds")
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server:
+        CryptoDataTool.BASE_URL = server.coingecko_url
+        weather.WTTR_BASE_URL = server.weather_url
+
+        start = time.perf_counter()
+        latencies = sorted(asyncio.run(run_benchmark(args.calls, args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+        print(f"calls/sec:   {args.calls / elapsed:.1f}")
+        print(f"p50 latency: {latencies[len(latencies) // 2] * 1000:.1f} ms")
+        print(f"p99 latency: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+        print(f"connections: {server.connections}")
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,26 @@ import os
 import logging
 from typing import TypedDict, Annotated, Literal
 from langgraph.graph import StateGraph, END, add_messages, START
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import BaseMessage, ToolMessage, HumanMessage
+from langchain_core.messages import BaseMessage, ToolMessage, HumanMessage, AIMessage
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.runnables import RunnableConfig
 from src.llm.model import get_gemini_model
+from src.checkpoint.checkpointer import get_checkpointer
+from src.utils.tracing import traced
 from src.tools.search_tools import tavily_search
+from src.tools.search_results import SearchResults, format_search_results, dedupe_search_messages
 from src.tools.date_tools import get_current_date, get_current_time
 from src.tools.weather import get_weather
 from src.tools.crypto_markets import get_crypto_price, get_crypto_details, get_trending_cryptos, search_crypto_coins, get_crypto_market_overview, get_top_cryptos
 from src.agent.timeline.timeline import Timeline
+from src.agent.timeline.utils.refinement import RefinementController
+from src.agent.timeline.utils.evidence import extract_evidence, format_evidence
 from src.agent.timeline.models.output import TimelineEvent
 from .utils.prompts import CHAT_PROMPT, FOLLOWUP_QUESTIONS_PROMPT, TIMELINE_CHAT_PROMPT
+from .utils.tool_executor import ToolExecutor
+from .utils.context import ContextManager
+from .utils.router import IntentRouter, intent_router
+from .utils.speculation import SpeculativeSearch, speculative_search
 from .models.output import FollowupOutput
 
 class State(TypedDict):
@@ -21,17 +31,38 @@ class State(TypedDict):
     mode: Literal["informative", "timeline"]
     events: list[TimelineEvent]
     initial_response_generated: bool
+    summary: str
 
 class Chat:
     """
     Chat agent/workflow
     """
-    def __init__(self, model_name: str):
+    def __init__(self, model_name: str,
+                 tool_concurrency: int = 4,
+                 tool_timeout: float = 15,
+                 tool_batch_timeout: float = 30,
+                 context_keep_turns: int = 3,
+                 context_token_budget: int = 8000,
+                 timeline_max_iterations: int = 3,
+                 timeline_deadline: float = 45,
+                 timeline_evidence_tokens: int = 3000,
+                 router: IntentRouter | None = None,
+                 speculation: SpeculativeSearch | None = None):
         """
         Initializes a new instance of Chat class
 
         Args:
             model_name (str): Name of the Google LLM
+            tool_concurrency (int): Max number of tool calls running at the same time
+            tool_timeout (float): Seconds a single tool call is allowed to run
+            tool_batch_timeout (float): Seconds all tool calls of a turn are allowed to run
+            context_keep_turns (int): Latest conversation turns always sent verbatim to the LLM
+            context_token_budget (int): Token count above which older turns are summarized
+            timeline_max_iterations (int): Max number of timeline generations
+            timeline_deadline (float): Seconds the timeline refinement is allowed to run
+            timeline_evidence_tokens (int): Token budget of the search evidence sent to the timeline agent
+            router (IntentRouter | None): Router calling the tools of obvious requests without the initial LLM call (disabled when None)
+            speculation (SpeculativeSearch | None): Search of the user message started with the initial LLM call, for news and timelines (disabled when None)
         """
         self.llm = get_gemini_model(
             model_name=model_name,
@@ -51,10 +82,65 @@ class Chat:
             search_crypto_coins,
             get_crypto_market_overview,
             get_top_cryptos])
-        self.timeline_agent = Timeline(llm=self.llm)
-        self.memory = MemorySaver()
+        self.tool_executor = ToolExecutor(
+            tools={
+                "get_date": get_current_date,
+                "get_time": get_current_time,
+                "tavily_search": tavily_search,
+                "get_weather": get_weather,
+                "get_crypto_price": get_crypto_price,
+                "get_crypto_details": get_crypto_details,
+                "get_trending_cryptos": get_trending_cryptos,
+                "search_crypto_coins": search_crypto_coins,
+                "get_crypto_market_overview": get_crypto_market_overview,
+                "get_top_cryptos": get_top_cryptos
+            },
+            max_concurrency=tool_concurrency,
+            tool_timeout=tool_timeout,
+            batch_timeout=tool_batch_timeout,
+            formatters={"tavily_search": format_search_results}
+        )
+        self.context_manager = ContextManager(
+            llm=self.llm,
+            keep_turns=context_keep_turns,
+            token_budget=context_token_budget
+        )
+        self.timeline_agent = Timeline(
+            llm=self.llm,
+            controller=RefinementController(max_iterations=timeline_max_iterations, deadline=timeline_deadline)
+        )
+        self.timeline_evidence_tokens = timeline_evidence_tokens
+        self.router = router
+        self.speculation = speculation
+        self.memory = get_checkpointer()
         self.graph = self._build_graph()
 
+    @classmethod
+    def from_env(cls, model_name: str | None = None) -> "Chat":
+        """
+        Build the chat with the settings of the environment variables (read when called, so a .env file
+        loaded before building the app is taken into account)
+
+        Args:
+            model_name (str | None): Name of the Google LLM (defaults to the `MODEL_NAME` environment variable)
+
+        Returns:
+            Chat: Configured chat
+        """
+        return cls(
+            model_name=model_name or os.getenv("MODEL_NAME", "gemini-2.5-flash"),
+            tool_concurrency=int(os.getenv("TOOL_MAX_CONCURRENCY", "4")),
+            tool_timeout=float(os.getenv("TOOL_TIMEOUT", "15")),
+            tool_batch_timeout=float(os.getenv("TOOL_BATCH_TIMEOUT", "30")),
+            context_keep_turns=int(os.getenv("CONTEXT_KEEP_TURNS", "3")),
+            context_token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000")),
+            timeline_max_iterations=int(os.getenv("TIMELINE_MAX_ITERATIONS", "3")),
+            timeline_deadline=float(os.getenv("TIMELINE_DEADLINE", "45")),
+            timeline_evidence_tokens=int(os.getenv("TIMELINE_EVIDENCE_TOKENS", "3000")),
+            router=intent_router if os.getenv("INTENT_ROUTING", "true").lower() != "false" else None,
+            speculation=speculative_search if os.getenv("SPECULATIVE_SEARCH", "false").lower() == "true" else None
+        )
+
     def _build_graph(self) -> StateGraph:
         """
         Build chat agent graph
@@ -62,6 +148,7 @@ class Chat:
         graph = StateGraph(State)
 
         # Add nodes
+        graph.add_node("context_node", self._context_node)
         graph.add_node("initial_llm_node", self._initial_llm_node)
         graph.add_node("tool_node", self._tool_node)
         graph.add_node("followup_node", self._followup_node)
@@ -69,7 +156,8 @@ class Chat:
         graph.add_node("final_llm_node", self._final_llm_node)
 
         # Add edges
-        graph.add_edge(START, "initial_llm_node")
+        graph.add_edge(START, "context_node")
+        graph.add_edge("context_node", "initial_llm_node")
 
         # Main content flow
         graph.add_conditional_edges(
@@ -102,80 +190,108 @@ class Chat:
 
         return graph.compile(checkpointer=self.memory)
 
-    async def _initial_llm_node(self, state: State) -> dict[str, any]:
+    @traced("chat.context_node")
+    async def _context_node(self, state: State) -> dict[str, any]:
+        """
+        Compact the conversation (tool output digests and summary of older turns) before calling the LLM
+        """
+        return await self.context_manager.compact(state["messages"], state.get("summary", ""))
+
+    @traced("chat.initial_llm_node")
+    async def _initial_llm_node(self, state: State, config: RunnableConfig) -> dict[str, any]:
         """
         Initial LLM call that generates the first response and determines next steps
         """
+        last_message = state["messages"][-1]
+        if self.router is not None and isinstance(last_message, HumanMessage):
+            decision = await self.router.route(last_message.text, state.get("mode", "informative"))
+            await adispatch_custom_event("route", decision.to_dict())
+
+            if decision.routed:
+                return {
+                    "messages": [AIMessage(content="", tool_calls=decision.tool_calls)],
+                    "initial_response_generated": True
+                }
+
+        # News and timelines almost always search, start searching the message while the LLM decides
+        run_key = config["configurable"].get("thread_id", "")
+        speculating = (
+            self.speculation is not None
+            and isinstance(last_message, HumanMessage)
+            and (state.get("mode") == "timeline" or state["topic"] == "news")
+        )
+        if speculating:
+            self.speculation.start(run_key, last_message.text, state["topic"], self._search_max_results(state))
+
         if state.get("mode") == "timeline":
             chain = TIMELINE_CHAT_PROMPT | self.llm_with_tools
         else:
             chain = CHAT_PROMPT | self.llm_with_tools
 
-        result = await chain.ainvoke({"messages": state["messages"]})
+        try:
+            result = await chain.ainvoke({
+                "messages": state["messages"],
+                "summary": state.get("summary") or "None"
+            })
+        except BaseException:
+            # Failed or cancelled call: nothing will claim the search, drop it instead of waiting for the eviction
+            if speculating:
+                self.speculation.discard(run_key)
+            raise
+
+        if speculating and not any(tool_call["name"] == "tavily_search" for tool_call in result.tool_calls):
+            self.speculation.discard(run_key)
 
         return {
             "messages": [result],
             "initial_response_generated": True
         }
 
-    async def _tool_node(self, state: State) -> dict[str, list]:
+    def _search_max_results(self, state: State) -> int:
         """
-        Node that handles tool calls from the LLM
+        Number of results requested by the searches of the turn
+        """
+        if state.get("mode") == "timeline":
+            return 25
+        return 20 if state["topic"] == "news" else 15
+
+    @traced("chat.tool_node")
+    async def _tool_node(self, state: State, config: RunnableConfig) -> dict[str, list]:
+        """
+        Node that handles tool calls from the LLM (all calls of the turn run concurrently)
         """
         # Get tool calls from the last message
         tool_calls = state["messages"][-1].tool_calls
-        # Initialize list to store tools messages
-        tool_messages = []
 
         if not tool_calls:
             return {
-                "messages": tool_messages
+                "messages": []
             }
 
-        tool_map = {
-            "get_date": get_current_date,
-            "get_time": get_current_time,
-            "tavily_search": tavily_search,
-            "get_weather": get_weather,
-            "get_crypto_price": get_crypto_price,
-            "get_crypto_details": get_crypto_details,
-            "get_trending_cryptos": get_trending_cryptos,
-            "search_crypto_coins": search_crypto_coins,
-            "get_crypto_market_overview": get_crypto_market_overview,
-            "get_top_cryptos": get_top_cryptos
-        }
-
+        prepared_calls = []
         for tool_call in tool_calls:
-            tool_name = tool_call["name"]
-            tool_id = tool_call["id"]
             tool_args = tool_call["args"]
 
-            if tool_name not in tool_map:
-                logging.warning(f"Unknown tool: {tool_name}")
-                continue
-
-            logging.info(f"Calling {tool_name} tool")
-
-            if tool_name == "tavily_search":
+            if tool_call["name"] == "tavily_search":
                 tool_args = {
                     **tool_args,
                     "topic": state["topic"],
-                    "max_results": 25 if state.get("mode") == "timeline" else (20 if state["topic"] == "news" else 15),
+                    "max_results": self._search_max_results(state),
                 }
 
-            result = await tool_map[tool_name].ainvoke(tool_args)
+            prepared_calls.append({**tool_call, "args": tool_args})
 
-            tool_message = ToolMessage(
-                name=tool_name,
-                content=str(result),
-                tool_call_id=tool_id
-            )
-            tool_messages.append(tool_message)
+        if self.speculation is not None:
+            prepared_calls = self.speculation.claim(config["configurable"].get("thread_id", ""), prepared_calls)
+
+        # The same pages are often found by several searches of a turn
+        tool_messages = dedupe_search_messages(await self.tool_executor.run(prepared_calls))
 
         return {
             "messages": tool_messages
         }
 
+    @traced("chat.final_llm_node")
     async def _final_llm_node(self, state: State) -> dict[str, list[BaseMessage]]:
         """
         Final LLM call after tools have been executed (for informative mode)
@@ -184,7 +300,10 @@ class Chat:
             return {"messages": []}
 
         chain = CHAT_PROMPT | self.llm_with_tools
-        result = await chain.ainvoke({"messages": state["messages"]})
+        result = await chain.ainvoke({
+            "messages": state["messages"],
+            "summary": state.get("summary") or "None"
+        })
         return {
             "messages": [result]
         }
@@ -213,6 +332,7 @@ class Chat:
         else:
             return "end"
 
+    @traced("chat.followup_node")
     async def _followup_node(self, state: State) -> dict[str, any]:
         """
         Node to generate follow-up questions based on user query (runs in parallel)
@@ -244,6 +364,7 @@ class Chat:
             "followup_questions": followup_data["questions"]
         }
 
+    @traced("chat.timeline_node")
     async def _timeline_node(self, state: State) -> dict[str, any]:
         """
         Run timeline sub-agent
@@ -277,7 +398,7 @@ class Chat:
                 "events": []
             }
 
-    def _extract_timeline_data(self, state: State) -> tuple[str, list]:
+    def _extract_timeline_data(self, state: State) -> tuple[str, str]:
         """
         Extract user query and search information from messages for timeline generation
 
@@ -285,18 +406,30 @@ class Chat:
             state: Current state containing messages
 
         Returns:
-            tuple: (user_query, search_info)
+            tuple: (user_query, search_info), search_info being the dated evidence of the search results
         """
         user_query = ""
-        search_info = []
+        turn_messages = []
 
         for message in state["messages"][::-1]:
             if isinstance(message, HumanMessage):
                 user_query = message.content
                 break
-
-        for message in state["messages"]:
-            if isinstance(message, ToolMessage) and message.name == "tavily_search":
-                search_info.append(message.content)
-
-        return user_query, search_info
\ No newline at end of file
+            turn_messages.append(message)
+
+        search_messages = [
+            message for message in turn_messages[::-1]
+            if isinstance(message, ToolMessage) and message.name == "tavily_search"
+        ]
+        search_results = [
+            results for results in (SearchResults.coerce(message.artifact) for message in search_messages)
+            if results is not None
+        ]
+
+        evidence = extract_evidence(user_query, search_results, token_budget=self.timeline_evidence_tokens)
+        if evidence:
+            return user_query, format_evidence(evidence)
+
+        # No dated sentences found, fall back to the search results text
+        search_info = "\n\n".join(message.content for message in search_messages)
+        return user_query, search_info[:self.timeline_evidence_tokens * 4]
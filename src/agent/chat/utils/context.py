@@ -0,0 +1,110 @@
+import logging
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage, RemoveMessage
+from langchain_core.language_models import BaseChatModel
+from .prompts import SUMMARY_PROMPT
+
+def message_text(message: BaseMessage) -> str:
+    """
+    Plain text of a message (content can be a string or a list of parts)
+    """
+    if isinstance(message.content, str):
+        return message.content
+    return " ".join(part if isinstance(part, str) else str(part.get("text", "")) for part in message.content)
+
+def estimate_tokens(messages: list[BaseMessage]) -> int:
+    """
+    Rough token count of messages (~4 characters per token)
+    """
+    return sum(len(message_text(message)) for message in messages) // 4
+
+def split_turns(messages: list[BaseMessage]) -> list[list[BaseMessage]]:
+    """
+    Group messages into turns, each starting with a user message
+    """
+    turns: list[list[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+class ContextManager:
+    """
+    Keeps the conversation sent to the LLM within a token budget
+    """
+    def __init__(self, llm: BaseChatModel, keep_turns: int = 3, token_budget: int = 8000, digest_chars: int = 500):
+        """
+        Initializes a new instance of ContextManager class
+
+        Args:
+            llm (BaseChatModel): Model used to summarize older turns
+            keep_turns (int): Latest turns always kept verbatim (the current turn included)
+            token_budget (int): Token count above which older turns are summarized
+            digest_chars (int): Max characters kept of tool outputs from turns older than the kept ones
+        """
+        if keep_turns < 1:
+            raise ValueError("keep_turns must be at least 1")
+        self.llm = llm
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.digest_chars = digest_chars
+
+    def digest(self, message: ToolMessage) -> ToolMessage:
+        """
+        Compact version of a tool output (same id, so it replaces the original in the state). The artifact
+        is kept, it is never sent to the LLM
+        """
+        content = message_text(message)
+        return ToolMessage(
+            id=message.id,
+            name=message.name,
+            tool_call_id=message.tool_call_id,
+            status=message.status,
+            content=content[:self.digest_chars] + "...",
+            artifact=message.artifact,
+            additional_kwargs={**message.additional_kwargs, "digest": True}
+        )
+
+    async def compact(self, messages: list[BaseMessage], summary: str) -> dict:
+        """
+        Build the state updates that shrink the conversation
+
+        Args:
+            messages (list[BaseMessage]): Messages of the thread (the last turn is the current one)
+            summary (str): Current summary of older turns
+
+        Returns:
+            dict: State updates (`messages` replacements/removals and `summary`)
+        """
+        turns = split_turns(messages)
+        old_turns = turns[:-self.keep_turns]
+        updates: list[BaseMessage] = []
+
+        # Tool outputs of turns older than the kept ones are only needed as a reminder
+        for turn in old_turns:
+            for message in turn:
+                if (isinstance(message, ToolMessage) and not message.additional_kwargs.get("digest")
+                        and len(message_text(message)) > self.digest_chars):
+                    updates.append(self.digest(message))
+
+        digested = {message.id: message for message in updates}
+        compacted = [digested.get(message.id, message) for message in messages]
+
+        if not old_turns or estimate_tokens(compacted) <= self.token_budget:
+            return {"messages": updates} if updates else {}
+
+        old_messages = [digested.get(message.id, message) for turn in old_turns for message in turn]
+        try:
+            response = await (SUMMARY_PROMPT | self.llm).ainvoke({
+                "summary": summary or "None",
+                "messages": "\n".join(f"{message.type}: {message_text(message)}" for message in old_messages)
+            })
+        except Exception as e:
+            logging.error(f"Error summarizing conversation: {str(e)}")
+            return {"messages": updates} if updates else {}
+
+        removed_ids = {message.id for message in old_messages}
+        return {
+            "messages": [update for update in updates if update.id not in removed_ids] + [RemoveMessage(id=message_id) for message_id in removed_ids],
+            "summary": message_text(response)
+        }
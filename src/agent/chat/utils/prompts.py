@@ -1,6 +1,7 @@
 from langchain_core.prompts import ChatPromptTemplate
 
 CHAT_PROMPT = ChatPromptTemplate.from_template("""
+    summary of earlier conversation: {summary}
     messages: {messages}
 
     Rules:
@@ -24,6 +25,7 @@ Guidelines:
 """)
 
 TIMELINE_CHAT_PROMPT = ChatPromptTemplate.from_template("""
+summary of earlier conversation: {summary}
 messages: {messages}
 
 You are in TIMELINE MODE.
@@ -39,4 +41,19 @@ Guidelines:
 - Do NOT explain tools or internal processes.
 - Avoid repeating the same acknowledgement if you've already given it.
 - Focus only on confirming and gathering relevant information.
-""")
\ No newline at end of file
+""")
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_template("""
+Update the summary of a conversation between a user and an assistant with the new messages.
+
+Current summary: {summary}
+
+New messages:
+{messages}
+
+Guidelines:
+- Keep the user's questions, the key facts and figures of the answers and any user preferences.
+- Drop greetings, repeated information and raw tool output.
+- Write at most 10 short sentences.
+- Return only the updated summary.
+""")
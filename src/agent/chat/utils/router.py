@@ -0,0 +1,140 @@
+import re
+import logging
+from uuid import uuid4
+from dataclasses import dataclass, field
+from typing import Any
+from src.tools.coin_index import CoinIndex
+from src.tools.crypto_markets import coin_index
+
+CURRENCIES = {"usd", "eur", "gbp", "jpy", "cad", "aud", "chf", "cny", "inr", "brl", "krw", "mxn", "btc", "eth"}
+
+_POLITE = r"(?:(?:hey|hi|please|pls),?\s+)?(?:(?:can|could) you\s+(?:tell me|show me|check)\s+|tell me\s+|show me\s+)?"
+_END = r"(?:\s+(?:right\s+)?now|\s+today|\s+currently)?\s*[?.!]*\s*(?:please)?\s*$"
+
+TIME_PATTERN = re.compile(rf"^{_POLITE}(?:what(?:'?s|\s+is)\s+)?(?:the\s+)?(?:current\s+)?time(?:\s+is\s+it)?{_END}|^what\s+time\s+is\s+it{_END}", re.IGNORECASE)
+DATE_PATTERN = re.compile(
+    rf"^{_POLITE}(?:what(?:'?s|\s+is)\s+)?(?:the\s+)?(?:today's\s+|current\s+)?date(?:\s+today)?{_END}"
+    rf"|^what\s+day\s+is\s+(?:it|today){_END}|^what(?:'?s|\s+is)\s+today(?:'s\s+date)?{_END}",
+    re.IGNORECASE
+)
+WEATHER_PATTERN = re.compile(
+    rf"^{_POLITE}(?:(?:what(?:'?s|\s+is)|how(?:'s|\s+is))\s+)?(?:the\s+)?(?:current\s+)?weather\s+(?:like\s+)?(?:in|at|for)\s+"
+    rf"(?P<city>[^\W\d_][\w .'-]{{0,40}}?){_END}",
+    re.IGNORECASE
+)
+PRICE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    rf"^{_POLITE}(?:what(?:'?s|\s+is)\s+)?(?:the\s+)?(?:current\s+)?price\s+of\s+(?P<coin>[\w .-]{{1,30}}?)(?:\s+in\s+(?P<currency>[a-z]{{3}}))?{_END}",
+    rf"^{_POLITE}(?:what(?:'?s|\s+is)\s+)?(?:the\s+)?(?:current\s+)?(?P<coin>[\w.-]{{1,30}})\s+price(?:\s+in\s+(?P<currency>[a-z]{{3}}))?{_END}",
+    rf"^{_POLITE}how\s+much\s+is\s+(?:one\s+|1\s+|a\s+)?(?P<coin>[\w .-]{{1,30}}?)(?:\s+worth)?(?:\s+in\s+(?P<currency>[a-z]{{3}}))?{_END}",
+))
+
+# Questions about other moments need the LLM (the tools only return current data)
+NOT_CURRENT = re.compile(r"\b(?:tomorrow|yesterday|week|month|year|forecast|history|historical|ago|last|next|will|predict\w*)\b", re.IGNORECASE)
+
+MAX_MESSAGE_CHARS = 80
+
+@dataclass(slots=True)
+class RouteDecision:
+    intent: str
+    tool_calls: list[dict[str, Any]] = field(default_factory=list)
+    reason: str = ""
+
+    @property
+    def routed(self) -> bool:
+        return bool(self.tool_calls)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "intent": self.intent,
+            "routed": self.routed,
+            "tools": [tool_call["name"] for tool_call in self.tool_calls],
+            "reason": self.reason
+        }
+
+class IntentRouter:
+    """
+    Rule based router that answers obvious tool requests without asking the LLM which tool to call
+    """
+    def __init__(self, coins: CoinIndex = coin_index, max_coin_rank: int = 250):
+        """
+        Initializes a new instance of IntentRouter class
+
+        Args:
+            coins (CoinIndex): Coin index used to recognize coin names and symbols
+            max_coin_rank (int): Only coins ranked up to this market cap rank are recognized (prevents matching common words)
+        """
+        self.coins = coins
+        self.max_coin_rank = max_coin_rank
+        self.counts: dict[str, int] = {}
+
+    async def route(self, message: str, mode: str = "informative") -> RouteDecision:
+        """
+        Decide whether a message can skip the initial LLM call
+
+        Args:
+            message (str): User message
+            mode (str): Chat mode (only informative answers are routed)
+
+        Returns:
+            RouteDecision: Tool calls to run directly, none when the LLM has to decide
+        """
+        decision = await self._route(" ".join(message.split()), mode)
+        self.counts[decision.intent] = self.counts.get(decision.intent, 0) + 1
+        logging.info(f"Intent router: {decision.intent} ({decision.reason})")
+        return decision
+
+    async def _route(self, message: str, mode: str) -> RouteDecision:
+        if mode != "informative":
+            return RouteDecision(intent="llm", reason="mode")
+        if len(message) > MAX_MESSAGE_CHARS:
+            return RouteDecision(intent="llm", reason="long message")
+        if NOT_CURRENT.search(message):
+            return RouteDecision(intent="llm", reason="not about current data")
+
+        if TIME_PATTERN.match(message):
+            return self._decision("get_time", {}, "time rule")
+        if DATE_PATTERN.match(message):
+            return self._decision("get_date", {}, "date rule")
+
+        match = WEATHER_PATTERN.match(message)
+        if match:
+            return self._decision("get_weather", {"city": match.group("city").strip()}, "weather rule")
+
+        for pattern in PRICE_PATTERNS:
+            match = pattern.match(message)
+            if not match:
+                continue
+
+            currency = (match.group("currency") or "usd").lower()
+            if currency not in CURRENCIES:
+                return RouteDecision(intent="llm", reason="unknown currency")
+
+            coin_id = await self._find_coin(match.group("coin"))
+            if coin_id is None:
+                return RouteDecision(intent="llm", reason="unknown coin")
+            return self._decision("get_crypto_price", {"coin_id": coin_id, "vs_currency": currency}, "price rule")
+
+        return RouteDecision(intent="llm", reason="no rule")
+
+    async def _find_coin(self, name: str) -> str | None:
+        """
+        Id of a well known coin whose id, symbol or name is exactly `name`
+        """
+        key = name.strip().lower()
+        await self.coins.ensure_ready()
+        for coin in self.coins.search(key, limit=5):
+            exact = key in (coin["id"], coin["symbol"].lower(), coin["name"].lower())
+            if exact and coin["market_cap_rank"] and coin["market_cap_rank"] <= self.max_coin_rank:
+                return coin["id"]
+        return None
+
+    @staticmethod
+    def _decision(tool_name: str, args: dict[str, Any], reason: str) -> RouteDecision:
+        tool_call = {"name": tool_name, "args": args, "id": f"route_{uuid4().hex}", "type": "tool_call"}
+        return RouteDecision(intent=tool_name, tool_calls=[tool_call], reason=reason)
+
+    def stats(self) -> dict[str, int]:
+        routed = sum(count for intent, count in self.counts.items() if intent != "llm")
+        return {"routed": routed, "llm": self.counts.get("llm", 0), "intents": dict(self.counts)}
+
+intent_router = IntentRouter()
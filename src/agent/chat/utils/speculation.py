@@ -0,0 +1,159 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+from langchain_core.tools import BaseTool
+from src.tools.search_tools import tavily_search
+from src.agent.timeline.utils.evidence import tokenize
+
+# Search arguments set by the chat graph itself, the LLM must not set any other for a speculative result to be used
+GRAPH_ARGS = {"query", "topic", "max_results"}
+
+def query_terms(text: str) -> set[str]:
+    """
+    Content words of a query, with plurals folded ("ETFs" and "ETF" match)
+    """
+    return {token[:-1] if len(token) > 3 and token.endswith("s") else token for token in tokenize(text)}
+
+def query_similarity(first: str, second: str) -> float:
+    first_terms, second_terms = query_terms(first), query_terms(second)
+    if not first_terms or not second_terms:
+        return 0.0
+    return len(first_terms & second_terms) / len(first_terms | second_terms)
+
+@dataclass(slots=True)
+class Speculation:
+    query: str
+    topic: str
+    max_results: int
+    task: asyncio.Task
+    started_at: float
+    finished_at: float | None = None
+
+class SpeculativeSearch:
+    """
+    Searches the user message while the initial LLM call decides which searches to run
+
+    The search goes through the search cache, so a tool call using the same query is served by the
+    cached (or still running) speculative search. Tool calls whose query is close enough to the user
+    message are rewritten to that query.
+    """
+    def __init__(self, search: BaseTool = tavily_search, similarity: float = 0.5, max_pending: int = 256):
+        """
+        Initializes a new instance of SpeculativeSearch class
+
+        Args:
+            search (BaseTool): Search tool (must cache its results)
+            similarity (float): Min word overlap (0-1) between the tool call query and the user message to use the speculative result
+            max_pending (int): Max number of speculative searches waiting for their tool calls
+        """
+        self.search = search
+        self.similarity = similarity
+        self.max_pending = max_pending
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._pending: OrderedDict[str, Speculation] = OrderedDict()
+
+    def start(self, key: str, query: str, topic: str, max_results: int):
+        """
+        Start searching the user message in the background
+
+        Args:
+            key (str): Run key (the conversation id)
+            query (str): User message
+            topic (str): Search topic
+            max_results (int): Number of results the tool node will request
+        """
+        self.discard(key)
+        while len(self._pending) >= self.max_pending:
+            _, oldest = self._pending.popitem(last=False)
+            self._record_miss(oldest)
+
+        query = " ".join(query.split())
+        task = asyncio.ensure_future(self._run(query, topic, max_results))
+        speculation = Speculation(query=query, topic=topic, max_results=max_results, task=task, started_at=time.perf_counter())
+        task.add_done_callback(lambda _: setattr(speculation, "finished_at", time.perf_counter()))
+
+        self._pending[key] = speculation
+        self.started += 1
+
+    async def _run(self, query: str, topic: str, max_results: int):
+        try:
+            await self.search.ainvoke({"query": query, "topic": topic, "max_results": max_results})
+        except Exception as e:
+            logging.info(f"Speculative search failed: {e}")
+
+    def claim(self, key: str, tool_calls: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Point the closest matching search call to the speculative search
+
+        Args:
+            key (str): Run key (the conversation id)
+            tool_calls (list[dict]): Tool calls with their final arguments
+
+        Returns:
+            list[dict]: Tool calls, the matching search using the speculative query
+        """
+        speculation = self._pending.pop(key, None)
+        if speculation is None:
+            return tool_calls
+
+        best_index, best_similarity = None, 0.0
+        for index, tool_call in enumerate(tool_calls):
+            args = tool_call["args"]
+            if tool_call["name"] != self.search.name or any(value for name, value in args.items() if name not in GRAPH_ARGS):
+                continue
+            if args.get("topic") != speculation.topic or args.get("max_results") != speculation.max_results:
+                continue
+
+            similarity = query_similarity(args.get("query", ""), speculation.query)
+            if similarity >= self.similarity and similarity > best_similarity:
+                best_index, best_similarity = index, similarity
+
+        if best_index is None:
+            self._record_miss(speculation)
+            return tool_calls
+
+        # Without speculation the search would have started now and lasted as long
+        now = time.perf_counter()
+        self.saved_seconds += (speculation.finished_at or now) - speculation.started_at
+        self.hits += 1
+
+        tool_calls = list(tool_calls)
+        tool_call = tool_calls[best_index]
+        tool_calls[best_index] = {**tool_call, "args": {**tool_call["args"], "query": speculation.query}}
+        return tool_calls
+
+    def discard(self, key: str):
+        """
+        Drop the speculative search of a run that ended without searching
+        """
+        speculation = self._pending.pop(key, None)
+        if speculation is not None:
+            self._record_miss(speculation)
+
+    def _record_miss(self, speculation: Speculation):
+        self.misses += 1
+        logging.info(f"Speculative search not used: {speculation.query}")
+
+    def stats(self) -> dict[str, float]:
+        """
+        Hit rate, latency saved by the used searches and searches spent for nothing
+        """
+        decided = self.hits + self.misses
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / decided, 3) if decided else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "average_saved_seconds": round(self.saved_seconds / self.hits, 3) if self.hits else 0.0,
+            "wasted_searches": self.misses
+        }
+
+speculative_search = SpeculativeSearch(similarity=float(os.getenv("SPECULATIVE_SEARCH_SIMILARITY", "0.5")))
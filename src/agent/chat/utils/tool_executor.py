@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import Any, Callable
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+from src.utils.tracing import tracer
+
+class ToolExecutor:
+    """
+    Runs a batch of tool calls concurrently
+    """
+    def __init__(self, tools: dict[str, BaseTool], max_concurrency: int = 4, tool_timeout: float = 15.0, batch_timeout: float = 30.0,
+                 formatters: dict[str, Callable[[Any], tuple[str, Any]]] | None = None):
+        """
+        Initializes a new instance of ToolExecutor class
+
+        Args:
+            tools (dict[str, BaseTool]): Map of tool name to tool
+            max_concurrency (int): Max number of tools running at the same time
+            tool_timeout (float): Seconds a single tool call is allowed to run
+            batch_timeout (float): Seconds the whole batch is allowed to run
+            formatters (dict | None): Map of tool name to a function turning the raw result into (content, artifact)
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.tools = tools
+        self.max_concurrency = max_concurrency
+        self.tool_timeout = tool_timeout
+        self.batch_timeout = batch_timeout
+        self.formatters = formatters or {}
+
+    async def run(self, tool_calls: list[dict[str, Any]]) -> list[ToolMessage]:
+        """
+        Execute all tool calls and return one ToolMessage per call, in the same order
+
+        Args:
+            tool_calls (list[dict]): Tool calls with `name`, `id` and `args`
+
+        Returns:
+            list[ToolMessage]: Tool results (failed calls become error messages)
+        """
+        if not tool_calls:
+            return []
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        deadline = asyncio.get_running_loop().time() + self.batch_timeout
+
+        return await asyncio.gather(*[
+            self._run_call(tool_call, semaphore, deadline) for tool_call in tool_calls
+        ])
+
+    async def _run_call(self, tool_call: dict[str, Any], semaphore: asyncio.Semaphore, deadline: float) -> ToolMessage:
+        """
+        Execute a single tool call, turning any failure into an error ToolMessage
+        """
+        tool_name = tool_call["name"]
+        tool_id = tool_call["id"]
+
+        if tool_name not in self.tools:
+            logging.warning(f"Unknown tool: {tool_name}")
+            return self._error_message(tool_name, tool_id, f"Unknown tool '{tool_name}'")
+
+        try:
+            async with semaphore:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+
+                logging.info(f"Calling {tool_name} tool")
+                with tracer.span(f"tool.{tool_name}", {"tool.name": tool_name, "tool.call_id": tool_id}):
+                    result = await asyncio.wait_for(
+                        self.tools[tool_name].ainvoke(tool_call["args"]),
+                        timeout=min(self.tool_timeout, remaining)
+                    )
+        except asyncio.TimeoutError:
+            logging.warning(f"Tool {tool_name} timed out")
+            return self._error_message(tool_name, tool_id, f"Tool '{tool_name}' timed out")
+        except Exception as e:
+            logging.error(f"Tool {tool_name} failed: {str(e)}")
+            return self._error_message(tool_name, tool_id, f"Tool '{tool_name}' failed: {str(e)}")
+
+        if tool_name in self.formatters:
+            content, artifact = self.formatters[tool_name](result)
+        else:
+            content, artifact = str(result), None
+
+        return ToolMessage(
+            name=tool_name,
+            content=content,
+            artifact=artifact,
+            tool_call_id=tool_id
+        )
+
+    @staticmethod
+    def _error_message(tool_name: str, tool_id: str, error: str) -> ToolMessage:
+        return ToolMessage(
+            name=tool_name,
+            content=str({"error": error}),
+            tool_call_id=tool_id,
+            status="error"
+        )
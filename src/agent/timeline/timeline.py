@@ -1,9 +1,20 @@
+import time
+import asyncio
 import logging
-from typing import TypedDict
+import operator
+from typing import TypedDict, Annotated
 from langgraph.graph import StateGraph, END
+from pydantic import ValidationError
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.runnables import Runnable, RunnableSequence
 from langchain_google_genai import ChatGoogleGenerativeAI
+from src.utils.metrics import TIMELINE_ITERATION_LATENCY, TIMELINE_ITERATION_SCORE
+from src.utils.tracing import tracer, traced
 from .models.output import TimelineEvent, TimelineOutput, EvaluateTimelineOutput
 from .utils.prompts import TIMELINE_PROMPT, EVALUATE_TIMELINE_PROMPT
+from .utils.refinement import RefinementController, IterationMetrics
+from .utils.streaming import JSONArrayStreamParser
+from .utils.validation import autofix_events, validate_events, STRUCTURAL_WEIGHT
 
 class State(TypedDict):
     events: list[TimelineEvent]
@@ -11,22 +22,38 @@ class State(TypedDict):
     improvements: str | None
 
     user_query: str
-    search_info: list
+    search_info: str
+
+    # Refinement
+    iteration: int
+    started_at: float
+    generation_latency: float
+    best_events: list[TimelineEvent]
+    best_score: float
+    stalled: int
+    iterations: Annotated[list[dict], operator.add]
 
 class Timeline:
     """
     Timeline generator agent
     """
-    def __init__(self, llm: ChatGoogleGenerativeAI):
+    def __init__(self, llm: ChatGoogleGenerativeAI, controller: RefinementController | None = None,
+                 stream_events: bool = True, stream_drafts: bool = True):
         """
         Initializes a new instance of the Timeline workflow
 
         Args:
             llm (ChatGoogleGenerativeAI): Instance of google gerative model (gemini)
+            controller (RefinementController | None): Limits of the generate/evaluate loop
+            stream_events (bool): Dispatch a `timeline_event` custom event for every event of the first draft, as it is generated
+            stream_drafts (bool): Dispatch a `timeline_draft` custom event for every improved draft
         """
         if llm is None:
             raise ValueError("LLM instance must be provided")
         self.llm = llm
+        self.controller = controller or RefinementController()
+        self.stream_events = stream_events
+        self.stream_drafts = stream_drafts
         self.graph = self._build_graph()
 
     def _build_graph(self) -> StateGraph:
@@ -39,6 +66,7 @@ class Timeline:
         graph.add_node("evaluation_node", self._evaluate_timeline)
 
         graph.set_entry_point("generation_node")
+        graph.add_edge("generation_node", "evaluation_node")
         graph.add_conditional_edges(
             "evaluation_node",
             self._validate_timeline,
@@ -50,18 +78,25 @@ class Timeline:
 
         return graph.compile()
 
+    @traced("timeline.generation_node", lambda self, state, *args, **kwargs: {"iteration": state["iteration"] + 1})
     async def _generate_timeline(self, state: State):
         """
         Generates timeline using LLM with structured output
         """
+        start = time.monotonic()
         structured_llm = self.llm.with_structured_output(TimelineOutput)
-        chain = TIMELINE_PROMPT | structured_llm
-
-        response = await chain.ainvoke({
+        inputs = {
             "user_query": state["user_query"],
             "search_info": state["search_info"],
             "improvements": state["improvements"],
-        })
+        }
+
+        # Events of the first draft are sent as soon as the model writes them
+        if self.stream_events and state["iteration"] == 0 and isinstance(structured_llm, RunnableSequence) and not structured_llm.middle:
+            response = await self._stream_timeline(inputs, model=structured_llm.first, parser=structured_llm.last)
+        else:
+            chain = TIMELINE_PROMPT | structured_llm
+            response = await chain.ainvoke(inputs)
 
         if isinstance(response, TimelineOutput):
             timeline_data = {"events": response.events}
@@ -70,41 +105,95 @@ class Timeline:
             timeline_data = {"events": response_data.get("events", [])}
 
         return {
-            "events": timeline_data["events"]
+            "events": timeline_data["events"],
+            "iteration": state["iteration"] + 1,
+            "generation_latency": time.monotonic() - start
         }
 
+    async def _stream_timeline(self, inputs: dict, model: Runnable, parser: Runnable) -> TimelineOutput:
+        """
+        Generate the timeline streaming the model output, dispatching a `timeline_event` custom event
+        for every event completed in the stream
+        """
+        events_parser = JSONArrayStreamParser("events")
+        message = None
+        index = 0
+
+        async for chunk in (TIMELINE_PROMPT | model).astream(inputs):
+            message = chunk if message is None else message + chunk
+            for item in events_parser.feed(chunk.text):
+                try:
+                    event = TimelineEvent.model_validate(item)
+                except ValidationError:
+                    continue
+                await adispatch_custom_event("timeline_event", {"index": index, "event": event})
+                index += 1
+
+        return await parser.ainvoke(message)
+
+    @traced("timeline.evaluation_node", lambda self, state, *args, **kwargs: {"iteration": state["iteration"]})
     async def _evaluate_timeline(self, state: State):
         """
-        Evaluates that the timeline was properly generated using certain parameters and generates a score
+        Evaluates that the timeline was properly generated using certain parameters and generates a score.
+        Structure (order, dates, conciseness, event count) is fixed and scored locally, the LLM only scores
+        accuracy and completeness of timelines passing the structural checks.
         """
-        structured_llm = self.llm.with_structured_output(EvaluateTimelineOutput)
-        chain = EVALUATE_TIMELINE_PROMPT | structured_llm
+        start = time.monotonic()
+        events = autofix_events(state["events"])
+        report = validate_events(events)
 
-        response = await chain.ainvoke({
-            "events": state["events"],
-        })
-
-        if isinstance(response, EvaluateTimelineOutput):
+        if not report.passed:
             evaluation_data = {
-                "score": response.score,
-                "improvements": response.improvements,
+                "score": STRUCTURAL_WEIGHT * report.score,
+                "improvements": "\n".join(report.issues),
             }
         else:
-            response_data = response.model_dump()
+            structured_llm = self.llm.with_structured_output(EvaluateTimelineOutput)
+            chain = EVALUATE_TIMELINE_PROMPT | structured_llm
+
+            response = await chain.ainvoke({
+                "user_query": state["user_query"],
+                "events": events,
+            })
+
+            if isinstance(response, EvaluateTimelineOutput):
+                content_score, improvements = response.score, response.improvements
+            else:
+                response_data = response.model_dump()
+                content_score, improvements = response_data.get("score", 0.0), response_data.get("improvements", "")
+
             evaluation_data = {
-                "score": response_data.get("score", []),
-                "improvements": response_data.get("improvements", [])
+                "score": STRUCTURAL_WEIGHT * report.score + (1 - STRUCTURAL_WEIGHT) * min(max(content_score, 0.0), 1.0),
+                "improvements": "\n".join(report.issues + ([improvements] if improvements else [])),
             }
 
-        return {**evaluation_data}
+        metrics = IterationMetrics(
+            iteration=state["iteration"],
+            score=evaluation_data["score"],
+            generation_latency=state["generation_latency"],
+            evaluation_latency=time.monotonic() - start
+        )
+        updates = self.controller.record(state, events, metrics)
+        tracer.record("timeline.iteration", metrics.latency, {"iteration": metrics.iteration, "score": metrics.score})
+        TIMELINE_ITERATION_LATENCY.labels(str(metrics.iteration)).observe(metrics.latency)
+        TIMELINE_ITERATION_SCORE.labels(str(metrics.iteration)).observe(metrics.score)
+
+        if self.stream_drafts and "best_events" in updates:
+            await adispatch_custom_event("timeline_draft", {
+                "iteration": metrics.iteration,
+                "score": metrics.score,
+                "events": updates["best_events"]
+            })
+
+        return {"events": events, **evaluation_data, **updates, "iterations": [metrics.to_dict()]}
 
     def _validate_timeline(self, state: State):
         """
         Validator method to check score and decide if we should re-iterate or end process
         """
-        return "end" if state["score"] >= 0.8 else "continue"
+        return "continue" if self.controller.should_continue(state) else "end"
 
-    async def run(self, user_query: str, search_info: list):
+    async def run(self, user_query: str, search_info: str):
         """
         Run timeline agent
         """
@@ -113,10 +202,28 @@ class Timeline:
             score=0,
             improvements="",
             user_query=user_query,
-            search_info=search_info
+            search_info=search_info,
+            iteration=0,
+            started_at=time.monotonic(),
+            generation_latency=0.0,
+            best_events=[],
+            best_score=0.0,
+            stalled=0,
+            iterations=[]
         )
 
         logging.info("Running timeline agent")
-        results = await self.graph.ainvoke(initial_state)
+        results = initial_state
+
+        async def refine():
+            nonlocal results
+            async for results in self.graph.astream(initial_state, stream_mode="values"):
+                pass
+
+        try:
+            # Hard stop: an iteration still running at the deadline is dropped
+            await asyncio.wait_for(refine(), self.controller.deadline)
+        except asyncio.TimeoutError:
+            logging.warning("Timeline refinement deadline reached, returning the best draft")
 
-        return results["events"]
+        return results["best_events"] or results["events"]
@@ -0,0 +1,146 @@
+import re
+import math
+import urllib.parse
+from dataclasses import dataclass
+from datetime import date
+from src.tools.search_results import SearchResults
+from .validation import split_sentences
+
+MONTHS = {name: index for index, names in enumerate((
+    ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+    ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+), start=1) for name in names}
+
+_MONTH = r"(?P<month>" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+_DAY = r"(?P<day>\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?P<year>(?:19|20)\d{2})"
+
+# From the most to the least precise
+DATE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"\b(?P<year>(?:19|20)\d{2})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\b",
+    rf"\b{_MONTH}\s+{_DAY},?\s+{_YEAR}\b",
+    rf"\b{_DAY}\s+{_MONTH},?\s+{_YEAR}\b",
+    rf"\b{_MONTH},?\s+{_YEAR}\b",
+    rf"\b{_YEAR}\b",
+))
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "to", "for", "and", "or", "is", "are", "was", "were", "be", "by",
+    "with", "from", "as", "it", "its", "this", "that", "what", "when", "how", "about", "timeline", "history",
+    "events", "latest", "news", "me", "show", "give", "make", "create",
+}
+
+@dataclass(slots=True)
+class Evidence:
+    date: str
+    text: str
+    source: str
+    relevance: float = 0.0
+
+def find_date(text: str) -> str | None:
+    """
+    Most precise date mentioned in a text
+
+    Args:
+        text (str): Sentence
+
+    Returns:
+        str | None: Date as `YYYY-MM-DD`, `YYYY-MM` or `YYYY`, None when the text has no date
+    """
+    for pattern in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            parts = match.groupdict()
+            year = int(parts["year"])
+            month = parts.get("month")
+            month = (int(month) if month.isdigit() else MONTHS[month.lower()]) if month else None
+            day = int(parts["day"]) if parts.get("day") else None
+
+            try:
+                date(year, month or 1, day or 1)
+            except ValueError:
+                continue
+
+            if day:
+                return f"{year:04d}-{month:02d}-{day:02d}"
+            if month:
+                return f"{year:04d}-{month:02d}"
+            return f"{year:04d}"
+    return None
+
+def tokenize(text: str) -> set[str]:
+    return {token for token in re.findall(r"\w+", text.lower()) if token not in STOPWORDS and len(token) > 1}
+
+def _similarity(first: set[str], second: set[str]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+def extract_evidence(user_query: str, search_results: list[SearchResults], token_budget: int = 3000,
+                     max_sentence_chars: int = 300, similarity: float = 0.7) -> list[Evidence]:
+    """
+    Pull the dated sentences of search results most relevant to a query
+
+    Args:
+        user_query (str): User query
+        search_results (list[SearchResults]): Search results of the turn
+        token_budget (int): Approximate number of tokens of the returned sentences (~4 characters per token)
+        max_sentence_chars (int): Sentences longer than this are cut
+        similarity (float): Token overlap above which two sentences are considered the same fact
+
+    Returns:
+        list[Evidence]: Unique dated sentences, in chronological order
+    """
+    candidates: list[tuple[Evidence, set[str], float]] = []
+    seen = set()
+
+    for results in search_results:
+        for result in results.results:
+            source = urllib.parse.urlparse(result.url).netloc.removeprefix("www.")
+            for sentence in split_sentences(f"{result.title}. {result.content}"):
+                text = " ".join(sentence.split())
+                key = text.lower()
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                found_date = find_date(text)
+                if found_date is None:
+                    continue
+                if len(text) > max_sentence_chars:
+                    text = text[:max_sentence_chars].rsplit(" ", 1)[0] + "..."
+                candidates.append((Evidence(date=found_date, text=text, source=source), tokenize(text), result.score))
+
+    if not candidates:
+        return []
+
+    # Relevance: idf weighted query term coverage, plus the search score and date precision
+    query_tokens = tokenize(user_query)
+    document_frequency: dict[str, int] = {}
+    for _, tokens, _ in candidates:
+        for token in tokens & query_tokens:
+            document_frequency[token] = document_frequency.get(token, 0) + 1
+    idf = {token: math.log(1 + len(candidates) / count) for token, count in document_frequency.items()}
+    max_weight = sum(idf.values()) or 1.0
+
+    for evidence, tokens, score in candidates:
+        coverage = sum(idf.get(token, 0.0) for token in tokens & query_tokens) / max_weight
+        evidence.relevance = coverage + 0.2 * score + 0.05 * evidence.date.count("-")
+
+    selected: list[tuple[Evidence, set[str]]] = []
+    used_tokens = 0
+    for evidence, tokens, _ in sorted(candidates, key=lambda candidate: candidate[0].relevance, reverse=True):
+        if any(_similarity(tokens, kept) >= similarity for _, kept in selected):
+            continue
+        cost = (len(evidence.text) + len(evidence.source) + 16) // 4
+        if used_tokens + cost > token_budget:
+            continue
+        selected.append((evidence, tokens))
+        used_tokens += cost
+
+    return sorted((evidence for evidence, _ in selected), key=lambda evidence: evidence.date)
+
+def format_evidence(evidence: list[Evidence]) -> str:
+    """
+    Text of the evidence for the timeline prompt
+    """
+    return "\n".join(f"- {item.date}: {item.text} ({item.source})" for item in evidence)
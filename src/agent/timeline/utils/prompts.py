@@ -27,14 +27,14 @@ If `improvements` is provided, integrate them into the new timeline:
 
 EVALUATE_TIMELINE_PROMPT = ChatPromptTemplate.from_template("""
 You are a timeline builder and evaluator expert.
-Your task is to assess the quality of the following timeline and it's events, then provide a score and improvement suggestions.
+Your task is to assess the content of the following timeline and it's events, then provide a score and improvement suggestions.
+Chronology, date formatting and conciseness are already checked, only evaluate the criteria below.
+
+User query: {user_query}
 
 Scoring criteria (0 to 1 scale):
-- Chronology (0-0.25): Are all events in correct chronological order? Full points if perfectly ordered.
-- Accuracy (0-0.25): Are the dates and descriptions factually correct and consistent with the known data?
-- Clarity & Conciseness (0-0.20): Are events described in clear, neutral, and concise language (≤2 sentences)?
-- Completeness (0-0.20): Does the timeline include all key events from the provided information without major omissions?
-- Formatting & Consistency (0-0.10): Are dates formatted uniformly (e.g., `YYYY-MM-DD`) and entries presented in a consistent style?
+- Accuracy (0-0.5): Are the dates and descriptions factually correct and consistent with the known data?
+- Completeness (0-0.5): Does the timeline include all key events about the user query without major omissions?
 
 Instructions:
 - Provide a 'score' between 0 (very poor) and 1 (perfect).
@@ -42,4 +42,4 @@ Instructions:
 - If the timeline is already optimal, return an empty list for 'improvements'
 
 Timeline events: {events}
-""")
\ No newline at end of file
+""")
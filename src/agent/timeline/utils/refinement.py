@@ -0,0 +1,88 @@
+import time
+import logging
+from dataclasses import dataclass, asdict
+
+@dataclass(slots=True, frozen=True)
+class IterationMetrics:
+    iteration: int
+    score: float
+    generation_latency: float
+    evaluation_latency: float
+
+    @property
+    def latency(self) -> float:
+        return self.generation_latency + self.evaluation_latency
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "latency": self.latency}
+
+class RefinementController:
+    """
+    Decides when the generate/evaluate loop of the timeline stops
+    """
+    def __init__(self, max_iterations: int = 3, deadline: float = 45.0, target_score: float = 0.8,
+                 patience: int = 1, min_improvement: float = 0.02):
+        """
+        Initializes a new instance of RefinementController class
+
+        Args:
+            max_iterations (int): Max number of generations
+            deadline (float): Seconds the whole refinement is allowed to run
+            target_score (float): Score good enough to stop
+            patience (int): Iterations without improvement allowed before stopping
+            min_improvement (float): Score increase counted as an improvement
+        """
+        if max_iterations < 1:
+            raise ValueError("max_iterations must be at least 1")
+        self.max_iterations = max_iterations
+        self.deadline = deadline
+        self.target_score = target_score
+        self.patience = patience
+        self.min_improvement = min_improvement
+
+    def record(self, state: dict, events: list, metrics: IterationMetrics) -> dict:
+        """
+        Record an evaluated draft, keeping the best one seen so far
+
+        Args:
+            state (dict): Refinement state (`best_events`, `best_score`, `stalled`)
+            events (list): Evaluated draft
+            metrics (IterationMetrics): Score and latency of the iteration
+
+        Returns:
+            dict: State updates
+        """
+        logging.info(f"Timeline iteration {metrics.iteration}: score {metrics.score:.2f} in {metrics.latency:.2f}s")
+
+        if metrics.score >= state["best_score"] + self.min_improvement or not state["best_events"]:
+            return {"best_events": events, "best_score": metrics.score, "stalled": 0}
+
+        return {"stalled": state["stalled"] + 1}
+
+    def should_continue(self, state: dict) -> bool:
+        """
+        Whether another generation should run
+
+        Args:
+            state (dict): Refinement state (`iteration`, `best_score`, `stalled`, `started_at`, `iterations`)
+
+        Returns:
+            bool: True to refine the timeline again
+        """
+        if state["best_score"] >= self.target_score:
+            return False
+        if state["iteration"] >= self.max_iterations:
+            logging.info("Timeline refinement stopped: max iterations reached")
+            return False
+        if state["stalled"] >= self.patience:
+            logging.info("Timeline refinement stopped: score is not improving")
+            return False
+
+        # Only start an iteration expected to finish before the deadline
+        elapsed = time.monotonic() - state["started_at"]
+        last_latency = state["iterations"][-1]["latency"] if state["iterations"] else 0.0
+        if elapsed + last_latency > self.deadline:
+            logging.info("Timeline refinement stopped: deadline reached")
+            return False
+
+        return True
@@ -0,0 +1,78 @@
+import re
+import json
+from typing import Any
+
+class JSONArrayStreamParser:
+    """
+    Incremental JSON parser returning the objects of an array (the value of `key`) as soon as each one is complete
+    """
+    def __init__(self, key: str):
+        """
+        Initializes a new instance of JSONArrayStreamParser class
+
+        Args:
+            key (str): Key of the array in the streamed JSON object
+        """
+        self._array_start = re.compile(rf'"{re.escape(key)}"\s*:\s*\[')
+        self._text = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = 0
+
+    def feed(self, chunk: str) -> list[Any]:
+        """
+        Add streamed text
+
+        Args:
+            chunk (str): Next part of the JSON text
+
+        Returns:
+            list: Array items completed by this chunk
+        """
+        self._text += chunk
+        if self._done:
+            return []
+
+        if not self._in_array:
+            match = self._array_start.search(self._text)
+            if match is None:
+                return []
+            self._in_array = True
+            self._pos = match.end()
+
+        items = []
+        text = self._text
+        for index in range(self._pos, len(text)):
+            char = text[index]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._object_start = index
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # End of the array
+                    self._done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        items.append(json.loads(text[self._object_start:index + 1]))
+                    except json.JSONDecodeError:
+                        pass
+
+        self._pos = len(text)
+        return items
@@ -0,0 +1,153 @@
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from ..models.output import TimelineEvent
+
+MIN_EVENTS = 6
+MAX_EVENTS = 20
+MAX_SENTENCES = 2
+
+# Weights of the criteria checked in code, the rest of the score comes from the LLM evaluator
+CHRONOLOGY_WEIGHT = 0.25
+CLARITY_WEIGHT = 0.20
+FORMATTING_WEIGHT = 0.10
+STRUCTURAL_WEIGHT = CHRONOLOGY_WEIGHT + CLARITY_WEIGHT + FORMATTING_WEIGHT
+
+DATE_FORMATS = (
+    "%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%Y%m%d",
+    "%B %d, %Y", "%b %d, %Y", "%B %d %Y", "%b %d %Y",
+    "%d %B %Y", "%d %b %Y", "%d %B, %Y", "%d %b, %Y",
+)
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+_ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "st", "vs", "inc", "corp", "ltd", "co", "approx", "e.g", "i.e", "u.s", "no",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+}
+_ORDINAL_SUFFIX = re.compile(r"(\d)(st|nd|rd|th)\b")
+
+def normalize_date(value: str | None) -> str | None:
+    """
+    Convert a date to `YYYY-MM-DD`
+
+    Args:
+        value (str | None): Date in any of the supported formats
+
+    Returns:
+        str | None: Normalized date, None when it can not be parsed
+    """
+    if not value:
+        return None
+
+    text = _ORDINAL_SUFFIX.sub(r"\1", " ".join(value.replace("Sept ", "Sep ").split()))
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+def split_sentences(text: str) -> list[str]:
+    """
+    Split a text into sentences (abbreviations like "Jan." or "approx." do not end a sentence)
+    """
+    sentences = []
+    current = ""
+    for piece in _SENTENCE_BREAK.split(text.strip()):
+        if not piece:
+            continue
+        current = f"{current} {piece}" if current else piece
+        if current[-1] != "." or current.rsplit(None, 1)[-1].strip("()[]\"'").rstrip(".").lower() not in _ABBREVIATIONS:
+            sentences.append(current)
+            current = ""
+
+    if current:
+        sentences.append(current)
+    return sentences
+
+def count_sentences(text: str) -> int:
+    return len(split_sentences(text))
+
+def autofix_events(events: list[TimelineEvent]) -> list[TimelineEvent]:
+    """
+    Fix what can be fixed without the LLM: date formats, reversed or empty ranges and ordering
+
+    Args:
+        events (list[TimelineEvent]): Generated events
+
+    Returns:
+        list[TimelineEvent]: Fixed events, in chronological order (events without a known date last)
+    """
+    fixed = []
+    for event in events:
+        start_date = normalize_date(event.start_date) or event.start_date
+        end_date = normalize_date(event.end_date) or event.end_date
+
+        if normalize_date(start_date) and normalize_date(end_date):
+            if end_date < start_date:
+                start_date, end_date = end_date, start_date
+            elif end_date == start_date:
+                end_date = None
+
+        fixed.append(event.model_copy(update={"start_date": start_date, "end_date": end_date}))
+
+    return sorted(fixed, key=lambda event: (normalize_date(event.start_date) is None, event.start_date))
+
+@dataclass(slots=True)
+class ValidationReport:
+    score: float
+    passed: bool
+    issues: list[str] = field(default_factory=list)
+
+def validate_events(events: list[TimelineEvent], threshold: float = 0.9) -> ValidationReport:
+    """
+    Score the structural criteria of a timeline (chronology, clarity, formatting and event count)
+
+    Args:
+        events (list[TimelineEvent]): Timeline events
+        threshold (float): Min structural score (0-1) for the timeline to pass
+
+    Returns:
+        ValidationReport: Structural score (0-1), whether the timeline passed and the issues found
+    """
+    issues = []
+
+    if not MIN_EVENTS <= len(events) <= MAX_EVENTS:
+        issues.append(f"The timeline has {len(events)} events, it must have between {MIN_EVENTS} and {MAX_EVENTS}.")
+    if not events:
+        return ValidationReport(score=0.0, passed=False, issues=issues)
+
+    dates = [normalize_date(event.start_date) for event in events]
+    known_dates = [date for date in dates if date]
+    in_order = sum(earlier <= later for earlier, later in zip(known_dates, known_dates[1:]))
+    chronology = in_order / (len(known_dates) - 1) if len(known_dates) > 1 else 1.0
+    if chronology < 1:
+        issues.append("Events are not in chronological order.")
+
+    well_formatted = 0
+    concise = 0
+    for event, date in zip(events, dates):
+        valid_start = date is not None or event.start_date.strip().lower() == "date unknown"
+        end_date = normalize_date(event.end_date)
+        valid_end = event.end_date is None or (end_date is not None and (date is None or end_date >= date))
+        if valid_start and valid_end:
+            well_formatted += 1
+        else:
+            issues.append(f"Event '{event.title}' must use YYYY-MM-DD dates with end_date after start_date.")
+
+        if event.content.strip() and count_sentences(event.content) <= MAX_SENTENCES:
+            concise += 1
+        else:
+            issues.append(f"Event '{event.title}' must be described in at most {MAX_SENTENCES} sentences.")
+
+    score = (
+        CHRONOLOGY_WEIGHT * chronology
+        + CLARITY_WEIGHT * concise / len(events)
+        + FORMATTING_WEIGHT * well_formatted / len(events)
+    ) / STRUCTURAL_WEIGHT
+
+    return ValidationReport(
+        score=score,
+        passed=score >= threshold and MIN_EVENTS <= len(events) <= MAX_EVENTS,
+        issues=issues
+    )
@@ -0,0 +1,418 @@
+import time
+import random
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Sequence
+from typing import Any
+import ormsgpack
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+# Record keys are made of parts joined by a separator that never shows up in ids or channel names
+SEP = "\x1f"
+# Blob type of message lists stored as references to individually stored messages
+MESSAGE_REFS = "message_refs"
+
+def _key(*parts: Any) -> str:
+    return SEP.join(str(part) for part in parts)
+
+def _pack(*values: Any) -> bytes:
+    return ormsgpack.packb(list(values))
+
+def _unpack(data: bytes) -> list:
+    return ormsgpack.unpackb(data)
+
+class CompactCheckpointSaver(BaseCheckpointSaver[str], ABC):
+    """
+    Checkpoint saver storing a thread as a set of key/value records, with idle thread eviction.
+
+    Message lists are stored as references to messages that are serialized once, so a step only
+    writes the messages it added instead of the whole history. Old checkpoints of a thread are pruned.
+
+    Subclasses provide the record store (`_put_records`, `_get_records`, `_scan_keys`, `_delete_records`,
+    `_delete_thread`, `_list_threads`, `_record_access` and `_evict`).
+    """
+    def __init__(self, *, ttl: float | None = 86400, max_threads: int | None = 1000, max_checkpoints: int = 10,
+                 evict_interval: float = 30, serde: SerializerProtocol | None = None):
+        """
+        Initializes a new instance of CompactCheckpointSaver class
+
+        Args:
+            ttl (float | None): Seconds a thread may stay idle before it is evicted
+            max_threads (int | None): Max number of threads kept (least recently used are evicted first)
+            max_checkpoints (int): Checkpoints kept per thread
+            evict_interval (float): Min seconds between two eviction passes
+            serde (SerializerProtocol | None): Serializer of checkpoints and values
+        """
+        super().__init__(serde=serde)
+        if max_checkpoints < 1:
+            raise ValueError("max_checkpoints must be at least 1")
+        self.ttl = ttl
+        self.max_threads = max_threads
+        self.max_checkpoints = max_checkpoints
+        self.evict_interval = evict_interval
+        self._next_eviction = 0.0
+        # thread id -> message id -> (message, ref) of the messages already stored
+        self._message_refs: OrderedDict[str, dict[str, tuple[BaseMessage, str]]] = OrderedDict()
+
+    # Record store
+
+    @abstractmethod
+    async def _put_records(self, thread_id: str, records: dict[str, bytes]) -> None:
+        """Insert or replace records of a thread"""
+
+    @abstractmethod
+    async def _get_records(self, thread_id: str, keys: list[str]) -> dict[str, bytes]:
+        """Records of a thread by key (missing keys are left out)"""
+
+    @abstractmethod
+    async def _scan_keys(self, thread_id: str, prefix: str) -> list[str]:
+        """Keys of a thread starting with `prefix`"""
+
+    @abstractmethod
+    async def _delete_records(self, thread_id: str, keys: list[str]) -> None:
+        """Delete records of a thread"""
+
+    @abstractmethod
+    async def _delete_thread(self, thread_id: str) -> None:
+        """Delete every record of a thread"""
+
+    @abstractmethod
+    async def _list_threads(self) -> list[str]:
+        """Stored thread ids, most recently used first"""
+
+    @abstractmethod
+    async def _record_access(self, thread_id: str, now: float) -> None:
+        """Mark a thread as used at `now`"""
+
+    @abstractmethod
+    async def _evict(self, now: float) -> list[str]:
+        """Delete idle and least recently used threads, returning their ids"""
+
+    # Eviction
+
+    async def _touch(self, thread_id: str):
+        """
+        Mark a thread as used and run an eviction pass when it is due
+        """
+        now = time.time()
+        await self._record_access(thread_id, now)
+
+        if now < self._next_eviction:
+            return
+
+        self._next_eviction = now + self.evict_interval
+        evicted = await self._evict(now)
+        for evicted_thread_id in evicted:
+            self._message_refs.pop(evicted_thread_id, None)
+
+        if evicted:
+            logging.info(f"Evicted {len(evicted)} idle conversation threads")
+
+    def _thread_message_refs(self, thread_id: str) -> dict[str, tuple[BaseMessage, str]]:
+        refs = self._message_refs.get(thread_id)
+        if refs is None:
+            refs = self._message_refs[thread_id] = {}
+        self._message_refs.move_to_end(thread_id)
+
+        while len(self._message_refs) > (self.max_threads or 1000):
+            self._message_refs.popitem(last=False)
+
+        return refs
+
+    # Serialization
+
+    def _dump_value(self, thread_id: str, value: Any, records: dict[str, bytes]) -> bytes:
+        """
+        Serialize a channel value. Messages not stored yet are added to `records`.
+        """
+        if isinstance(value, list) and value and all(isinstance(message, BaseMessage) and message.id for message in value):
+            known_refs = self._thread_message_refs(thread_id)
+            refs = []
+
+            for message in value:
+                known = known_refs.get(message.id)
+                if known is not None and known[0] is message:
+                    refs.append(known[1])
+                    continue
+
+                value_type, data = self.serde.dumps_typed(message)
+                ref = hashlib.blake2b(data, digest_size=12).hexdigest()
+                records[_key("m", ref)] = _pack(value_type, data)
+                known_refs[message.id] = (message, ref)
+                refs.append(ref)
+
+            return _pack(MESSAGE_REFS, _pack(*refs))
+
+        return _pack(*self.serde.dumps_typed(value))
+
+    async def _load_values(self, thread_id: str, blobs: dict[str, bytes]) -> dict[str, Any]:
+        """
+        Deserialize channel values keyed by channel name
+        """
+        values = {}
+        message_lists = {}
+
+        for channel, blob in blobs.items():
+            value_type, data = _unpack(blob)
+            if value_type == "empty":
+                continue
+            if value_type == MESSAGE_REFS:
+                message_lists[channel] = _unpack(data)
+            else:
+                values[channel] = self.serde.loads_typed((value_type, data))
+
+        if message_lists:
+            refs = list({ref for refs in message_lists.values() for ref in refs})
+            records = await self._get_records(thread_id, [_key("m", ref) for ref in refs])
+            messages = {ref: self.serde.loads_typed(tuple(_unpack(records[_key("m", ref)]))) for ref in refs if _key("m", ref) in records}
+            known_refs = self._thread_message_refs(thread_id)
+
+            for channel, refs in message_lists.items():
+                values[channel] = [messages[ref] for ref in refs if ref in messages]
+                for ref in refs:
+                    if ref in messages:
+                        known_refs[messages[ref].id] = (messages[ref], ref)
+
+        return values
+
+    # Checkpoint saver API
+
+    async def _checkpoint_ids(self, thread_id: str, checkpoint_ns: str) -> list[str]:
+        prefix = _key("c", checkpoint_ns, "")
+        return sorted((key[len(prefix):] for key in await self._scan_keys(thread_id, prefix)), reverse=True)
+
+    async def _load_tuple(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, record: bytes) -> CheckpointTuple:
+        checkpoint_type, checkpoint_data, metadata_type, metadata_data, parent_checkpoint_id = _unpack(record)
+        checkpoint: Checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_data))
+
+        blob_keys = {_key("b", checkpoint_ns, channel, version): channel for channel, version in checkpoint["channel_versions"].items()}
+        blobs = await self._get_records(thread_id, list(blob_keys))
+        channel_values = await self._load_values(thread_id, {blob_keys[key]: blob for key, blob in blobs.items()})
+
+        write_keys = await self._scan_keys(thread_id, _key("w", checkpoint_ns, checkpoint_id, ""))
+        writes = [_unpack(record) for record in (await self._get_records(thread_id, write_keys)).values()]
+        writes.sort(key=lambda write: writes_sort_key(write[5], write[0], write[1]))
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata_data)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, data)))
+                for task_id, _, channel, value_type, data, _ in writes
+            ],
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        if checkpoint_id is None:
+            checkpoint_ids = await self._checkpoint_ids(thread_id, checkpoint_ns)
+            if not checkpoint_ids:
+                return None
+            checkpoint_id = checkpoint_ids[0]
+
+        key = _key("c", checkpoint_ns, checkpoint_id)
+        record = (await self._get_records(thread_id, [key])).get(key)
+        if record is None:
+            return None
+
+        # Only threads that exist are tracked, lookups of unknown threads leave no trace
+        await self._touch(thread_id)
+        return await self._load_tuple(thread_id, checkpoint_ns, checkpoint_id, record)
+
+    async def alist(self, config: RunnableConfig | None, *, filter: dict[str, Any] | None = None,
+                    before: RunnableConfig | None = None, limit: int | None = None) -> AsyncIterator[CheckpointTuple]:
+        thread_ids = [config["configurable"]["thread_id"]] if config else await self._list_threads()
+        config_checkpoint_ns = config["configurable"].get("checkpoint_ns") if config else None
+        config_checkpoint_id = get_checkpoint_id(config) if config else None
+        before_checkpoint_id = get_checkpoint_id(before) if before else None
+
+        for thread_id in thread_ids:
+            checkpoint_keys = sorted(await self._scan_keys(thread_id, _key("c", "")), key=lambda key: key.split(SEP)[2], reverse=True)
+
+            for key in checkpoint_keys:
+                _, checkpoint_ns, checkpoint_id = key.split(SEP)
+
+                if config_checkpoint_ns is not None and checkpoint_ns != config_checkpoint_ns:
+                    continue
+                if config_checkpoint_id and checkpoint_id != config_checkpoint_id:
+                    continue
+                if before_checkpoint_id and checkpoint_id >= before_checkpoint_id:
+                    continue
+
+                record = (await self._get_records(thread_id, [key])).get(key)
+                if record is None:
+                    continue
+
+                checkpoint_tuple = await self._load_tuple(thread_id, checkpoint_ns, checkpoint_id, record)
+                if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+
+                if limit is not None:
+                    if limit <= 0:
+                        return
+                    limit -= 1
+
+                yield checkpoint_tuple
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_copy = checkpoint.copy()
+        values: dict[str, Any] = checkpoint_copy.pop("channel_values")
+
+        records: dict[str, bytes] = {}
+        for channel, version in new_versions.items():
+            records[_key("b", checkpoint_ns, channel, version)] = (
+                self._dump_value(thread_id, values[channel], records) if channel in values else _pack("empty", b"")
+            )
+
+        records[_key("c", checkpoint_ns, checkpoint["id"])] = _pack(
+            *self.serde.dumps_typed(checkpoint_copy),
+            *self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)),
+            config["configurable"].get("checkpoint_id")
+        )
+
+        await self._put_records(thread_id, records)
+        await self._touch(thread_id)
+
+        if not checkpoint_ns:
+            await self._prune(thread_id)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        records = {}
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            records[_key("w", checkpoint_ns, checkpoint_id, task_id, write_idx)] = _pack(
+                task_id, write_idx, channel, *self.serde.dumps_typed(value), task_path
+            )
+
+        # Regular writes are only stored once, special writes (errors, interrupts...) are replaced
+        existing = await self._get_records(thread_id, [key for key in records if int(key.rsplit(SEP, 1)[1]) >= 0])
+        for key in existing:
+            del records[key]
+
+        if records:
+            await self._put_records(thread_id, records)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self._message_refs.pop(thread_id, None)
+        await self._delete_thread(thread_id)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # Pruning
+
+    async def _prune(self, thread_id: str):
+        """
+        Keep the latest `max_checkpoints` root checkpoints of a thread, dropping whatever only older
+        checkpoints use (writes, blobs, messages and finished sub-graph namespaces)
+        """
+        checkpoint_ids = await self._checkpoint_ids(thread_id, "")
+        # Prune in batches so the cost is amortized over several steps
+        if len(checkpoint_ids) <= self.max_checkpoints * 2:
+            return
+
+        kept_ids = set(checkpoint_ids[:self.max_checkpoints])
+        oldest_kept_id = min(kept_ids)
+        keys = await self._scan_keys(thread_id, "")
+
+        namespaces_latest: dict[str, str] = {}
+        for key in keys:
+            parts = key.split(SEP)
+            if parts[0] == "c" and parts[1]:
+                namespaces_latest[parts[1]] = max(namespaces_latest.get(parts[1], ""), parts[2])
+        finished_namespaces = {ns for ns, latest_id in namespaces_latest.items() if latest_id < oldest_kept_id}
+
+        kept_records = await self._get_records(thread_id, [_key("c", "", checkpoint_id) for checkpoint_id in kept_ids])
+        kept_blobs = set()
+        for record in kept_records.values():
+            checkpoint = self.serde.loads_typed(tuple(_unpack(record)[:2]))
+            kept_blobs.update(_key("b", "", channel, version) for channel, version in checkpoint["channel_versions"].items())
+
+        deleted, blob_keys, message_keys = [], [], []
+        for key in keys:
+            parts = key.split(SEP)
+            if parts[0] == "m":
+                message_keys.append(key)
+            elif parts[1] in finished_namespaces:
+                deleted.append(key)
+            elif parts[1]:
+                if parts[0] == "b":
+                    blob_keys.append(key)
+            elif parts[0] in ("c", "w") and parts[2] not in kept_ids:
+                deleted.append(key)
+            elif parts[0] == "b" and key not in kept_blobs:
+                deleted.append(key)
+            elif parts[0] == "b":
+                blob_keys.append(key)
+
+        referenced = set()
+        for blob in (await self._get_records(thread_id, blob_keys)).values():
+            value_type, data = _unpack(blob)
+            if value_type == MESSAGE_REFS:
+                referenced.update(_key("m", ref) for ref in _unpack(data))
+        unreferenced = {key for key in message_keys if key not in referenced}
+        deleted.extend(unreferenced)
+
+        await self._delete_records(thread_id, deleted)
+
+        known_refs = self._message_refs.get(thread_id, {})
+        for message_id in [message_id for message_id, (_, ref) in known_refs.items() if _key("m", ref) in unreferenced]:
+            del known_refs[message_id]
@@ -0,0 +1,45 @@
+import os
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from .memory_saver import BoundedMemorySaver
+
+def get_checkpointer(backend: str | None = None) -> BaseCheckpointSaver:
+    """
+    Initializes and returns the checkpoint saver configured through environment variables.
+
+    Args:
+        backend (str | None): "memory", "sqlite" or "redis". Defaults to the
+                              `CHECKPOINTER` environment variable ("memory").
+
+    Returns:
+        BaseCheckpointSaver: Checkpoint saver for the chat graph
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = (backend or os.getenv("CHECKPOINTER", "memory")).lower()
+    ttl = float(os.getenv("CHECKPOINT_TTL", "86400"))
+    max_threads = int(os.getenv("CHECKPOINT_MAX_THREADS", "1000"))
+    max_checkpoints = int(os.getenv("CHECKPOINT_MAX_HISTORY", "10"))
+
+    if backend == "memory":
+        return BoundedMemorySaver(ttl=ttl, max_threads=max_threads, max_checkpoints=max_checkpoints)
+
+    if backend == "sqlite":
+        from .sqlite_saver import SQLiteSaver
+        return SQLiteSaver(
+            path=os.getenv("CHECKPOINT_SQLITE_PATH", "data/checkpoints.sqlite"),
+            ttl=ttl,
+            max_threads=max_threads,
+            max_checkpoints=max_checkpoints
+        )
+
+    if backend == "redis":
+        from .redis_saver import RedisSaver
+        return RedisSaver.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            ttl=ttl,
+            max_threads=max_threads,
+            max_checkpoints=max_checkpoints
+        )
+
+    raise ValueError(f"Unknown checkpointer backend '{backend}'. Use 'memory', 'sqlite' or 'redis'.")
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from .base import CompactCheckpointSaver
+
+class BoundedMemorySaver(CompactCheckpointSaver):
+    """
+    In-process checkpoint saver that evicts idle and least recently used threads. Records are kept in
+    dictionaries, with the same message references and pruning as the persistent backends.
+    """
+    def __init__(self, *, evict_interval: float = 0, **kwargs):
+        """
+        Initializes a new instance of BoundedMemorySaver class
+
+        Args:
+            evict_interval (float): Min seconds between two eviction passes (a pass stops at the first fresh
+                                    thread, so it runs on every access by default)
+            **kwargs: Eviction and pruning settings (see CompactCheckpointSaver)
+        """
+        super().__init__(evict_interval=evict_interval, **kwargs)
+        # thread id -> record key -> record
+        self.storage: dict[str, dict[str, bytes]] = {}
+        # thread id -> last access, least recently used first
+        self._last_access: OrderedDict[str, float] = OrderedDict()
+
+    async def _put_records(self, thread_id: str, records: dict[str, bytes]) -> None:
+        self.storage.setdefault(thread_id, {}).update(records)
+
+    async def _get_records(self, thread_id: str, keys: list[str]) -> dict[str, bytes]:
+        records = self.storage.get(thread_id, {})
+        return {key: records[key] for key in keys if key in records}
+
+    async def _scan_keys(self, thread_id: str, prefix: str) -> list[str]:
+        return [key for key in self.storage.get(thread_id, ()) if key.startswith(prefix)]
+
+    async def _delete_records(self, thread_id: str, keys: list[str]) -> None:
+        records = self.storage.get(thread_id, {})
+        for key in keys:
+            records.pop(key, None)
+
+    async def _delete_thread(self, thread_id: str) -> None:
+        self.storage.pop(thread_id, None)
+        self._last_access.pop(thread_id, None)
+
+    async def _list_threads(self) -> list[str]:
+        return list(reversed(self._last_access))
+
+    async def _record_access(self, thread_id: str, now: float) -> None:
+        self._last_access[thread_id] = now
+        self._last_access.move_to_end(thread_id)
+
+    async def _evict(self, now: float) -> list[str]:
+        evicted = []
+
+        # Oldest accesses come first, so stop at the first thread that is still fresh and within capacity
+        for thread_id, last_access in list(self._last_access.items()):
+            expired = self.ttl is not None and now - last_access > self.ttl
+            over_capacity = self.max_threads is not None and len(self._last_access) > self.max_threads
+            if not expired and not over_capacity:
+                break
+            await self._delete_thread(thread_id)
+            evicted.append(thread_id)
+
+        return evicted
@@ -0,0 +1,106 @@
+from typing import Any
+from .base import CompactCheckpointSaver
+
+class RedisSaver(CompactCheckpointSaver):
+    """
+    Checkpoint saver backed by a Redis compatible server. Each thread is one hash, expired by the server
+    once it has been idle for `ttl` seconds, and a sorted set of the hash fields (all scored 0, so prefix
+    scans are ZRANGEBYLEX range queries instead of a HKEYS of the whole thread).
+    """
+    def __init__(self, client: Any, prefix: str = "chat:", **kwargs):
+        """
+        Initializes a new instance of RedisSaver class
+
+        Args:
+            client (Any): Async Redis client (`redis.asyncio.Redis`, without `decode_responses`) or compatible,
+                          with MULTI/EXEC pipelines
+            prefix (str): Prefix of every key written
+            **kwargs: Eviction and pruning settings (see CompactCheckpointSaver)
+        """
+        super().__init__(**kwargs)
+        self.client = client
+        self.prefix = prefix
+        self._threads_key = f"{prefix}threads"
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisSaver":
+        """
+        Create a saver connected to a Redis URL (needs the optional `redis` package)
+        """
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise ImportError("The redis checkpointer needs the 'redis' package: pip install redis") from e
+        return cls(Redis.from_url(url), **kwargs)
+
+    def _thread_key(self, thread_id: str) -> str:
+        return f"{self.prefix}thread:{thread_id}"
+
+    def _index_key(self, thread_id: str) -> str:
+        return f"{self.prefix}keys:{thread_id}"
+
+    @staticmethod
+    def _decode(value: bytes | str) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def _put_records(self, thread_id: str, records: dict[str, bytes]) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._thread_key(thread_id), mapping=records)
+            pipe.zadd(self._index_key(thread_id), {key: 0 for key in records})
+            await pipe.execute()
+
+    async def _get_records(self, thread_id: str, keys: list[str]) -> dict[str, bytes]:
+        if not keys:
+            return {}
+        values = await self.client.hmget(self._thread_key(thread_id), keys)
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    async def _scan_keys(self, thread_id: str, prefix: str) -> list[str]:
+        if prefix:
+            # 0xff never shows up in UTF-8, so it sorts after every key starting with the prefix
+            minimum, maximum = b"[" + prefix.encode(), b"(" + prefix.encode() + b"\xff"
+        else:
+            minimum, maximum = b"-", b"+"
+        return [self._decode(key) for key in await self.client.zrangebylex(self._index_key(thread_id), minimum, maximum)]
+
+    async def _delete_records(self, thread_id: str, keys: list[str]) -> None:
+        if keys:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.hdel(self._thread_key(thread_id), *keys)
+                pipe.zrem(self._index_key(thread_id), *keys)
+                await pipe.execute()
+
+    async def _delete_thread(self, thread_id: str) -> None:
+        await self.client.delete(self._thread_key(thread_id), self._index_key(thread_id))
+        await self.client.zrem(self._threads_key, thread_id)
+
+    async def _list_threads(self) -> list[str]:
+        return [self._decode(thread_id) for thread_id in await self.client.zrange(self._threads_key, 0, -1, desc=True)]
+
+    async def _record_access(self, thread_id: str, now: float) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            if self.ttl is not None:
+                pipe.expire(self._thread_key(thread_id), int(self.ttl))
+                pipe.expire(self._index_key(thread_id), int(self.ttl))
+            pipe.zadd(self._threads_key, {thread_id: now})
+            await pipe.execute()
+
+    async def _evict(self, now: float) -> list[str]:
+        evicted = []
+
+        if self.ttl is not None:
+            # Hashes of these threads already expired, only the index entry is left
+            expired = await self.client.zrangebyscore(self._threads_key, "-inf", now - self.ttl)
+            if expired:
+                await self.client.zrem(self._threads_key, *expired)
+            evicted += [self._decode(thread_id) for thread_id in expired]
+
+        if self.max_threads is not None:
+            excess = await self.client.zcard(self._threads_key) - self.max_threads
+            if excess > 0:
+                oldest = [self._decode(thread_id) for thread_id in await self.client.zrange(self._threads_key, 0, excess - 1)]
+                await self.client.delete(*[key for thread_id in oldest for key in (self._thread_key(thread_id), self._index_key(thread_id))])
+                await self.client.zrem(self._threads_key, *oldest)
+                evicted += oldest
+
+        return evicted
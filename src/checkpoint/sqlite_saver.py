@@ -0,0 +1,136 @@
+import os
+import asyncio
+import sqlite3
+import threading
+from typing import Any, Callable
+from .base import CompactCheckpointSaver
+
+class SQLiteSaver(CompactCheckpointSaver):
+    """
+    Checkpoint saver backed by a SQLite file in WAL mode
+    """
+    def __init__(self, path: str, **kwargs):
+        """
+        Initializes a new instance of SQLiteSaver class
+
+        Args:
+            path (str): Path of the SQLite database file
+            **kwargs: Eviction and pruning settings (see CompactCheckpointSaver)
+        """
+        super().__init__(**kwargs)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                thread_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                PRIMARY KEY (thread_id, key)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS threads_last_access ON threads (last_access)")
+
+    async def _run(self, operation: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        Run a database operation in a worker thread, inside a transaction
+        """
+        def run():
+            with self._lock:
+                self._conn.execute("BEGIN")
+                try:
+                    result = operation(self._conn)
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+                return result
+
+        return await asyncio.to_thread(run)
+
+    async def _put_records(self, thread_id: str, records: dict[str, bytes]) -> None:
+        await self._run(lambda conn: conn.executemany(
+            "INSERT OR REPLACE INTO records (thread_id, key, value) VALUES (?, ?, ?)",
+            [(thread_id, key, value) for key, value in records.items()]
+        ))
+
+    async def _get_records(self, thread_id: str, keys: list[str]) -> dict[str, bytes]:
+        if not keys:
+            return {}
+
+        def get(conn: sqlite3.Connection) -> dict[str, bytes]:
+            records = {}
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, value FROM records WHERE thread_id = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [thread_id, *chunk]
+                )
+                records.update(rows.fetchall())
+            return records
+
+        return await self._run(get)
+
+    async def _scan_keys(self, thread_id: str, prefix: str) -> list[str]:
+        return await self._run(lambda conn: [row[0] for row in conn.execute(
+            "SELECT key FROM records WHERE thread_id = ? AND key >= ? AND key < ?",
+            (thread_id, prefix, prefix + "\U0010ffff")
+        )])
+
+    async def _delete_records(self, thread_id: str, keys: list[str]) -> None:
+        if keys:
+            await self._run(lambda conn: conn.executemany(
+                "DELETE FROM records WHERE thread_id = ? AND key = ?",
+                [(thread_id, key) for key in keys]
+            ))
+
+    async def _delete_thread(self, thread_id: str) -> None:
+        def delete(conn: sqlite3.Connection):
+            conn.execute("DELETE FROM records WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+
+        await self._run(delete)
+
+    async def _list_threads(self) -> list[str]:
+        return await self._run(lambda conn: [row[0] for row in conn.execute(
+            "SELECT thread_id FROM threads ORDER BY last_access DESC"
+        )])
+
+    async def _record_access(self, thread_id: str, now: float) -> None:
+        await self._run(lambda conn: conn.execute(
+            "INSERT INTO threads (thread_id, last_access) VALUES (?, ?) ON CONFLICT (thread_id) DO UPDATE SET last_access = excluded.last_access",
+            (thread_id, now)
+        ))
+
+    async def _evict(self, now: float) -> list[str]:
+        def evict(conn: sqlite3.Connection) -> list[str]:
+            evicted = []
+            if self.ttl is not None:
+                evicted += [row[0] for row in conn.execute("SELECT thread_id FROM threads WHERE last_access < ?", (now - self.ttl,))]
+            if self.max_threads is not None:
+                evicted += [row[0] for row in conn.execute(
+                    "SELECT thread_id FROM threads WHERE last_access >= ? ORDER BY last_access DESC LIMIT -1 OFFSET ?",
+                    (now - self.ttl if self.ttl is not None else float("-inf"), self.max_threads)
+                )]
+
+            conn.executemany("DELETE FROM records WHERE thread_id = ?", [(thread_id,) for thread_id in evicted])
+            conn.executemany("DELETE FROM threads WHERE thread_id = ?", [(thread_id,) for thread_id in evicted])
+            return evicted
+
+        return await self._run(evict)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
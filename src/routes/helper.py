@@ -1,11 +1,33 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from src.tools.date_tools import get_current_date, get_current_time
 from src.tools.search_tools import tavily_search
 from src.tools.weather import get_weather
-from src.tools.crypto_markets import get_crypto_price, get_crypto_details, get_trending_cryptos, search_crypto_coins, get_crypto_market_overview, get_top_cryptos
+from src.utils.runs import run_manager
+from src.agent.chat.utils.router import intent_router
+from src.agent.chat.utils.speculation import speculative_search
+from src.utils.answer_cache import answer_cache
+from src.utils.metrics import stats_collector
+from src.utils.watchdog import loop_watchdog
+from src.tools.crypto_markets import CryptoDataTool, get_crypto_price, get_crypto_details, get_trending_cryptos, search_crypto_coins, get_crypto_market_overview, get_top_cryptos
 
 helper_router = APIRouter()
 
+def register_stats_collector():
+    """
+    Expose the counters of the caches, the intent router, the speculative search and the run manager on
+    /metrics (called once by the app setup)
+    """
+    stats_collector.caches.update({
+        "answer": answer_cache,
+        "search": tavily_search.cache,
+        "crypto": CryptoDataTool.cache
+    })
+    stats_collector.router = intent_router
+    stats_collector.speculation = speculative_search
+    stats_collector.run_manager = run_manager
+    stats_collector.register()
+
 tools = [
     tavily_search,
     get_weather,
@@ -26,6 +48,13 @@ async def health_check():
     """
     return {"status": "healthy"}
 
+@helper_router.get("/metrics", status_code=200)
+async def metrics():
+    """
+    Endpoint to scrape Prometheus metrics
+    """
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @helper_router.get("/debug/tools", status_code=200)
 async def debug_tools():
     """
@@ -41,3 +70,31 @@ async def debug_tools():
         })
 
     return {"tools": tools_info}
+
+@helper_router.get("/debug/loop", status_code=200)
+async def debug_loop(top: int = 10):
+    """
+    Endpoint to see the event loop lag and the code blocking the loop the longest
+    """
+    return loop_watchdog.stats(top=top)
+
+@helper_router.get("/debug/runs", status_code=200)
+async def debug_runs():
+    """
+    Endpoint to see the load of the run manager
+    """
+    return run_manager.stats()
+
+@helper_router.get("/debug/router", status_code=200)
+async def debug_router():
+    """
+    Endpoint to see how many requests skipped the initial LLM call
+    """
+    return intent_router.stats()
+
+@helper_router.get("/debug/speculation", status_code=200)
+async def debug_speculation():
+    """
+    Endpoint to see the hit rate of speculative searches, the latency they saved and the searches they wasted
+    """
+    return speculative_search.stats()
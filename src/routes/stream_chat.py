@@ -1,39 +1,135 @@
 import os
 import logging
+from uuid import uuid4
 from typing import Literal
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, Header, HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
 from src.utils.responses import generate_chat_responses
+from src.utils.answer_cache import answer_cache
+from src.utils.batch import BatchQuestion, run_batch
+from src.utils.sse import coalesce_frames, dumps
+from src.utils.runs import run_manager, RunConflictError, QueueFullError
 from src.agent.chat.chat import Chat
 
 chat_router = APIRouter()
-graph_instance = Chat(model_name=os.getenv("MODEL_NAME", "gemini-2.5-flash")).graph
+graph_instance = Chat.from_env().graph
+SSE_MAX_LATENCY = float(os.getenv("SSE_MAX_LATENCY", "0.01"))
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "1000"))
+BATCH_MAX_PARALLELISM = int(os.getenv("BATCH_MAX_PARALLELISM", "8"))
+
+class ChatRequest(BaseModel):
+    message: str
+    topic: Literal["general", "news", "finance"]
+    mode: Literal["informative", "timeline"] = "informative"
+    checkpoint_id: str | None = None
+
+class BatchRequest(BaseModel):
+    questions: list[BatchQuestion] = Field(min_length=1, max_length=BATCH_MAX_QUESTIONS)
+    parallelism: int = Field(BATCH_MAX_PARALLELISM, ge=1, le=BATCH_MAX_PARALLELISM)
 
 @chat_router.get("/chat_stream/{message}")
 async def chat_stream(message: str, topic: Literal["general", "news", "finance"],
                       mode: Literal["informative", "timeline"] = "informative",
-                      checkpoint_id: str | None = Query(None)):
+                      checkpoint_id: str | None = Query(None),
+                      last_event_id: str | None = Header(None)):
     """
     Endpoint to stream chat responses
+
+    A reconnect with the `Last-Event-ID` header replays the missed events and follows the run if it is still going
+    """
+    return _stream_chat(message, topic, mode, checkpoint_id, last_event_id)
+
+@chat_router.post("/chat")
+async def chat(request: ChatRequest, last_event_id: str | None = Header(None)):
+    """
+    Endpoint to stream chat responses, with the message in the request body
+    """
+    return _stream_chat(request.message, request.topic, request.mode, request.checkpoint_id, last_event_id)
+
+@chat_router.post("/chat/batch")
+async def chat_batch(request: BatchRequest):
+    """
+    Endpoint to answer many questions concurrently, streaming one JSON line per question as they finish
+    """
+    if any(not question.message.strip() for question in request.questions):
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+
+    try:
+        release = run_manager.reserve_batch()
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    async def lines():
+        async for result in run_batch(graph_instance, request.questions, parallelism=request.parallelism,
+                                      answer_cache=answer_cache, run_manager=run_manager):
+            yield dumps(result) + b"\n"
+
+    # Released once the response is over, even when the client left before it started
+    return StreamingResponse(lines(), media_type="application/x-ndjson", background=BackgroundTask(release))
+
+@chat_router.delete("/runs/{run_id}")
+async def cancel_run(run_id: str):
+    """
+    Endpoint to cancel a run in progress
+    """
+    if not run_manager.cancel(run_id):
+        raise HTTPException(status_code=404, detail="Run not found")
+    return {"status": "cancelled"}
+
+def _stream_chat(message: str, topic: Literal["general", "news", "finance"], mode: Literal["informative", "timeline"],
+                 checkpoint_id: str | None, last_event_id: str | None) -> StreamingResponse:
+    """
+    Start (or resume) the run answering a message and stream its events
     """
     if not message or not message.strip():
         raise HTTPException(status_code=400, detail="Message cannot be empty")
 
+    if last_event_id:
+        resumed = run_manager.resume(last_event_id)
+        if resumed is None:
+            raise HTTPException(status_code=404, detail="Stream not found")
+        buffer, last_seq = resumed
+        logging.info(f"Resuming stream {buffer.checkpoint_id} after event {last_seq}")
+        frames = buffer.subscribe(after_seq=last_seq)
+    else:
+        new_conversation = checkpoint_id is None
+        checkpoint_id = checkpoint_id or str(uuid4())
+        try:
+            buffer = run_manager.start(
+                checkpoint_id,
+                message,
+                lambda: generate_chat_responses(
+                    graph=graph_instance,
+                    message=message,
+                    topic=topic,
+                    mode=mode,
+                    checkpoint_id=checkpoint_id,
+                    answer_cache=answer_cache,
+                    new_conversation=new_conversation
+                )
+            )
+        except RunConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except QueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        frames = buffer.subscribe(after_seq=buffer.run_start_seq - 1)
 
     logging.info("Server-Sent Events (SSE) connection stablished")
     return StreamingResponse(
-        generate_chat_responses(
-            graph=graph_instance,
-            message=message,
-            topic=topic,
-            mode=mode,
-            checkpoint_id=checkpoint_id
+        coalesce_frames(
+            frames,
+            max_latency=SSE_MAX_LATENCY,
+            heartbeat_interval=SSE_HEARTBEAT_INTERVAL
         ),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
+            "X-Accel-Buffering": "no",
+            "X-Run-Id": buffer.run_id
         }
     )
 
@@ -0,0 +1,246 @@
+import os
+import json
+import math
+import time
+import bisect
+import asyncio
+import difflib
+import logging
+from typing import Awaitable, Callable
+
+RETRY_INTERVAL = 300
+
+# Snapshots live in the user cache directory, outside the source tree
+DEFAULT_PATH = os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "langgraph-web-search-agent", "coins_list.json")
+
+# Row of the on-disk snapshot: [id, symbol, name, market_cap_rank | None]
+CoinRow = tuple[str, str, str, int | None]
+
+class CoinIndex:
+    """
+    In-process index of CoinGecko coins, loaded from a periodically refreshed `/coins/list` snapshot
+    """
+    def __init__(self, path: str | None, loader: Callable[[], Awaitable[list[CoinRow]]], refresh_interval: float = 86400):
+        """
+        Initializes a new instance of CoinIndex class
+
+        Args:
+            path (str | None): Path of the JSON snapshot on disk (`DEFAULT_PATH` when None)
+            loader (Callable): Coroutine function returning fresh coin rows from CoinGecko
+            refresh_interval (float): Seconds after which the snapshot is refreshed
+        """
+        self.path = path or DEFAULT_PATH
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+        self.updated_at = 0.0
+        self._next_refresh = 0.0
+        self._load_task: asyncio.Future | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self._set_rows([])
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _set_rows(self, rows: list[CoinRow]):
+        """
+        Build the lookup tables (ids are stored once, lookups keep tuples of row positions)
+        """
+        self._ids = tuple(row[0] for row in rows)
+        self._symbols = tuple(row[1].lower() for row in rows)
+        self._names = tuple(row[2] for row in rows)
+        self._ranks = tuple(row[3] for row in rows)
+        self._positions = {coin_id: position for position, coin_id in enumerate(self._ids)}
+
+        by_key: dict[str, list[int]] = {}
+        for position, row in enumerate(rows):
+            for key in {row[1].lower(), row[2].lower()}:
+                by_key.setdefault(key, []).append(position)
+
+        self._by_key = {key: tuple(sorted(positions, key=self._sort_key)) for key, positions in by_key.items()}
+        self._keys = sorted(self._by_key)
+
+        # Fuzzy matching candidates by (first character, length), see `_close_matches`
+        buckets: dict[tuple[str, int], list[str]] = {}
+        for key in self._keys:
+            if key:
+                buckets.setdefault((key[0], len(key)), []).append(key)
+        self._buckets = buckets
+
+    def _sort_key(self, position: int) -> tuple:
+        rank = self._ranks[position]
+        return (rank if rank else float("inf"), len(self._ids[position]))
+
+    def load(self) -> bool:
+        """
+        Load the snapshot from disk
+
+        Returns:
+            bool: Whether a snapshot was found
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.info(f"No coin index snapshot loaded: {e}")
+            return False
+
+        self._set_rows([tuple(row) for row in snapshot.get("coins", [])])
+        self.updated_at = snapshot.get("updated_at", 0.0)
+        self._next_refresh = self.updated_at + self.refresh_interval
+        return True
+
+    async def refresh(self):
+        """
+        Fetch a fresh coin list and persist it on disk (concurrent calls share one refresh)
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+        await asyncio.shield(self._refresh_task)
+
+    async def _refresh(self):
+        try:
+            rows = await self.loader()
+        except Exception as e:
+            logging.warning(f"Coin index refresh failed: {e}")
+            rows = []
+
+        if not rows:
+            # Retry later instead of hitting the API on every lookup
+            self._next_refresh = time.time() + RETRY_INTERVAL
+            return
+
+        self._set_rows(rows)
+        self.updated_at = time.time()
+        self._next_refresh = self.updated_at + self.refresh_interval
+        await asyncio.to_thread(self._persist, rows)
+
+    def _persist(self, rows: list[CoinRow]):
+        """
+        Atomically write the snapshot to disk
+        """
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({"updated_at": self.updated_at, "coins": rows}, file, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not persist coin index snapshot: {e}")
+
+    async def ensure_ready(self):
+        """
+        Make sure the snapshot is loaded, refreshing it in the background once it is stale or missing
+
+        A cold start does not wait for the `/coins/list` download: the index stays empty until the refresh
+        lands, and callers fall back to CoinGecko `/search` meanwhile
+        """
+        # Concurrent first calls share one load, none of them sees the index before the snapshot is read
+        if self._load_task is None:
+            self._load_task = asyncio.ensure_future(asyncio.to_thread(self.load))
+        await asyncio.shield(self._load_task)
+
+        if time.time() >= self._next_refresh and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+
+    def _row(self, position: int) -> dict:
+        return {
+            "id": self._ids[position],
+            "name": self._names[position],
+            "symbol": self._symbols[position].upper(),
+            "market_cap_rank": self._ranks[position]
+        }
+
+    def _close_matches(self, key: str, n: int, cutoff: float) -> list[str]:
+        """
+        Fuzzy matches of `key`, among the keys sharing its first character and long enough to reach `cutoff`
+
+        Comparing against every key of the full coin list blocks the event loop for tens of milliseconds. The
+        similarity ratio is at most 2 * min(len) / (len(a) + len(b)), so keys outside the length range below
+        can never match; a typo in the first character is the only miss of the first character filter.
+        """
+        if not key:
+            return []
+
+        shortest = math.ceil(len(key) * cutoff / (2 - cutoff))
+        longest = math.floor(len(key) * (2 - cutoff) / cutoff)
+        candidates = [
+            candidate
+            for length in range(shortest, longest + 1)
+            for candidate in self._buckets.get((key[0], length), ())
+        ]
+        return difflib.get_close_matches(key, candidates, n=n, cutoff=cutoff)
+
+    def resolve(self, query: str) -> str | None:
+        """
+        Resolve a coin id, symbol or name to a CoinGecko id (exact matches only, a close spelling may be
+        another coin, see `suggest`)
+
+        Args:
+            query (str): Coin id, symbol or name (e.g. 'sol', 'Solana')
+
+        Returns:
+            str | None: Matching coin id (the best ranked one when several coins share a symbol or name)
+        """
+        key = query.strip().lower()
+
+        if key in self._positions:
+            return key
+
+        if key in self._by_key:
+            return self._ids[self._by_key[key][0]]
+
+        return None
+
+    def suggest(self, query: str, limit: int = 3) -> list[str]:
+        """
+        Ids of the coins spelled closest to an unknown coin, to be offered to the user
+
+        Args:
+            query (str): Coin id, symbol or name
+            limit (int): Max number of suggestions
+
+        Returns:
+            list[str]: Coin ids, best first
+        """
+        key = query.strip().lower()
+        suggestions = [self._ids[position] for match in self._close_matches(key, n=limit, cutoff=0.75) for position in self._by_key[match]]
+        return list(dict.fromkeys(suggestions))[:limit]
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Search coins by exact, prefix and fuzzy match on symbol or name
+
+        Args:
+            query (str): Search term
+            limit (int): Max number of results
+
+        Returns:
+            list[dict]: Matching coins, best first
+        """
+        key = query.strip().lower()
+        positions: list[int] = []
+
+        if key in self._positions:
+            positions.append(self._positions[key])
+        positions.extend(self._by_key.get(key, ()))
+
+        prefixed = []
+        index = bisect.bisect_left(self._keys, key)
+        while index < len(self._keys) and self._keys[index].startswith(key) and len(prefixed) < limit * 10:
+            prefixed.extend(self._by_key[self._keys[index]])
+            index += 1
+        positions.extend(sorted(prefixed, key=self._sort_key))
+
+        if len(set(positions)) < limit:
+            for match in self._close_matches(key, n=limit, cutoff=0.75):
+                positions.extend(self._by_key[match])
+
+        results = []
+        for position in dict.fromkeys(positions):
+            results.append(self._row(position))
+            if len(results) >= limit:
+                break
+
+        return results
@@ -1,58 +1,223 @@
-import requests
+import os
+import asyncio
+import httpx
 from typing import Dict
 from langchain.tools import tool
 import json
 from datetime import datetime
+from src.tools.coin_index import CoinIndex
+from src.utils.cache import TTLCache
+from src.utils.http_client import get_http_client
+from src.utils.tracing import tracer
 
 class CryptoDataTool:
     """
     Comprehensive crypto data tool using CoinGecko API
     """
 
-    BASE_URL = "https://api.coingecko.com/api/v3"
+    BASE_URL = os.getenv("COINGECKO_BASE_URL", "https://api.coingecko.com/api/v3")
+
+    # (fresh seconds, extra seconds a stale value is served while refreshing) per endpoint
+    CACHE_TTLS = {
+        "/simple/price": (30, 60),
+        "/coins/markets": (60, 120),
+        "/search/trending": (300, 600),
+        "/global": (120, 240),
+        "/search": (3600, 3600),
+        "/coins/": (120, 240),
+    }
+
+    cache = TTLCache(max_size=int(os.getenv("CRYPTO_CACHE_SIZE", "512")))
+
+    @staticmethod
+    def _cache_ttl(endpoint: str) -> tuple[float, float]:
+        """Get the cache TTLs of an endpoint"""
+        if endpoint in CryptoDataTool.CACHE_TTLS:
+            return CryptoDataTool.CACHE_TTLS[endpoint]
+        if endpoint.startswith("/coins/"):
+            return CryptoDataTool.CACHE_TTLS["/coins/"]
+        return (0, 0)
+
+    @staticmethod
+    async def _make_request(endpoint: str, params: Dict = None) -> Dict:
+        """Make API request through the cache (concurrent identical requests share one upstream call)"""
+        ttl, stale_ttl = CryptoDataTool._cache_ttl(endpoint)
+        if not ttl:
+            return await CryptoDataTool._fetch(endpoint, params)
+
+        key = (endpoint, tuple(sorted((params or {}).items())))
+        return await CryptoDataTool.cache.get_or_load(
+            key,
+            lambda: CryptoDataTool._fetch(endpoint, params),
+            ttl=ttl,
+            stale_ttl=stale_ttl,
+            cacheable=lambda result: not (isinstance(result, dict) and "error" in result)
+        )
 
     @staticmethod
-    def _make_request(endpoint: str, params: Dict = None) -> Dict:
+    async def _fetch(endpoint: str, params: Dict = None) -> Dict:
         """Make API request with error handling"""
         try:
             url = f"{CryptoDataTool.BASE_URL}{endpoint}"
-            response = requests.get(url, params=params or {}, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            with tracer.span("http.get", {"http.method": "GET", "http.url": url}) as span:
+                response = await get_http_client(url).get(url, params=params or {})
+                span.set_attribute("http.status_code", response.status_code)
+                response.raise_for_status()
+                return response.json()
+        except httpx.HTTPError as e:
             return {"error": f"API request failed: {str(e)}"}
         except json.JSONDecodeError:
             return {"error": "Invalid JSON response"}
 
+    @staticmethod
+    async def resolve_coin_id(coin_id: str) -> str:
+        """Resolve a coin id, symbol or name to a CoinGecko id using the local coin index"""
+        await coin_index.ensure_ready()
+        return coin_index.resolve(coin_id) or coin_id.strip().lower()
+
+    @staticmethod
+    def not_found(coin_id: str) -> Dict:
+        """Error of an unknown coin, with the closest known coins as suggestions (never looked up in its place)"""
+        error = {"error": f"Coin '{coin_id}' not found. Use search_crypto_coins to find the correct ID."}
+        suggestions = coin_index.suggest(coin_id)
+        if suggestions:
+            error["suggestions"] = suggestions
+        return error
+
+    @staticmethod
+    async def get_price(coin_id: str, vs_currency: str = "usd") -> Dict:
+        """Get /simple/price data of one coin (cached, and batched with other pending lookups)"""
+        ttl, stale_ttl = CryptoDataTool._cache_ttl("/simple/price")
+        return await CryptoDataTool.cache.get_or_load(
+            ("/simple/price", coin_id, vs_currency),
+            lambda: price_batcher.get(coin_id, vs_currency),
+            ttl=ttl,
+            stale_ttl=stale_ttl,
+            cacheable=lambda result: "error" not in result
+        )
+
+class PriceBatcher:
+    """
+    Merges the coin price lookups pending within a short window into a single /simple/price call
+    """
+    def __init__(self, window: float = 0.02, max_batch: int = 100):
+        """
+        Initializes a new instance of PriceBatcher class
+
+        Args:
+            window (float): Seconds to wait for more lookups before sending the request
+            max_batch (int): Max number of coins sent in one request
+        """
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: dict[str, dict[str, list[asyncio.Future]]] = {}
+        self._requests: set[asyncio.Task] = set()
+
+    async def get(self, coin_id: str, vs_currency: str = "usd") -> Dict:
+        """
+        Get the /simple/price response entry of a coin
+
+        Args:
+            coin_id (str): CoinGecko coin ID
+            vs_currency (str): Currency to compare against
+
+        Returns:
+            Dict: `{coin_id: data}` (empty if the coin does not exist) or an error
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        if vs_currency not in self._pending:
+            self._pending[vs_currency] = {}
+            loop.call_later(self.window, self._flush, vs_currency)
+
+        batch = self._pending[vs_currency]
+        batch.setdefault(coin_id, []).append(future)
+
+        if len(batch) >= self.max_batch:
+            self._flush(vs_currency)
+
+        return await future
+
+    def _flush(self, vs_currency: str):
+        """
+        Send the pending batch of a currency (no-op if it was already sent)
+        """
+        batch = self._pending.pop(vs_currency, None)
+        if batch:
+            request = asyncio.ensure_future(self._send(batch, vs_currency))
+            self._requests.add(request)
+            request.add_done_callback(self._requests.discard)
+
+    async def _send(self, batch: dict[str, list[asyncio.Future]], vs_currency: str):
+        """
+        Request every coin of the batch and fan the results back out
+        """
+        params = {
+            "ids": ",".join(batch),
+            "vs_currencies": vs_currency,
+            "include_market_cap": "true",
+            "include_24hr_vol": "true",
+            "include_24hr_change": "true",
+            "include_last_updated_at": "true"
+        }
+
+        try:
+            result = await CryptoDataTool._fetch("/simple/price", params)
+        except Exception as e:
+            result = {"error": f"API request failed: {str(e)}"}
+
+        for coin_id, futures in batch.items():
+            if "error" in result:
+                coin_result = result
+            else:
+                coin_result = {coin_id: result[coin_id]} if coin_id in result else {}
+
+            for future in futures:
+                if not future.done():
+                    future.set_result(coin_result)
+
+price_batcher = PriceBatcher(window=float(os.getenv("CRYPTO_PRICE_BATCH_WINDOW", "0.02")))
+
+async def _load_coin_list() -> list:
+    """Fetch every CoinGecko coin, ranked using the top coins by market cap"""
+    coins, markets = await asyncio.gather(
+        CryptoDataTool._fetch("/coins/list"),
+        CryptoDataTool._fetch("/coins/markets", {"vs_currency": "usd", "order": "market_cap_desc", "per_page": 250, "page": 1})
+    )
+
+    if "error" in coins:
+        raise RuntimeError(coins["error"])
+
+    ranks = {} if "error" in markets else {coin.get("id"): coin.get("market_cap_rank") for coin in markets}
+    return [[coin["id"], coin.get("symbol", ""), coin.get("name", ""), ranks.get(coin["id"])] for coin in coins if coin.get("id")]
+
+coin_index = CoinIndex(
+    path=os.getenv("COIN_INDEX_PATH"),
+    loader=_load_coin_list,
+    refresh_interval=float(os.getenv("COIN_INDEX_REFRESH_INTERVAL", "86400"))
+)
+
 @tool
-def get_crypto_price(coin_id: str, vs_currency: str = "usd") -> Dict:
+async def get_crypto_price(coin_id: str, vs_currency: str = "usd") -> Dict:
     """
     Get current price for a cryptocurrency
 
     Args:
-        coin_id: CoinGecko coin ID (e.g., 'bitcoin', 'ethereum', 'cardano')
+        coin_id: CoinGecko coin ID, symbol or name (e.g., 'bitcoin', 'eth', 'Cardano')
         vs_currency: Currency to compare against (default: 'usd')
 
     Returns:
         Dictionary with current price and basic market data
     """
-    endpoint = "/simple/price"
-    params = {
-        "ids": coin_id,
-        "vs_currencies": vs_currency,
-        "include_market_cap": "true",
-        "include_24hr_vol": "true",
-        "include_24hr_change": "true",
-        "include_last_updated_at": "true"
-    }
-
-    result = CryptoDataTool._make_request(endpoint, params)
+    coin_id = await CryptoDataTool.resolve_coin_id(coin_id)
+    result = await CryptoDataTool.get_price(coin_id, vs_currency)
 
     if "error" in result:
         return result
 
     if coin_id not in result:
-        return {"error": f"Coin '{coin_id}' not found. Use search_crypto_coins to find the correct ID."}
+        return CryptoDataTool.not_found(coin_id)
 
     data = result[coin_id]
     return {
@@ -66,16 +231,17 @@ def get_crypto_price(coin_id: str, vs_currency: str = "usd") -> Dict:
     }
 
 @tool
-def get_crypto_details(coin_id: str) -> Dict:
+async def get_crypto_details(coin_id: str) -> Dict:
     """
     Get detailed information about a cryptocurrency
 
     Args:
-        coin_id: CoinGecko coin ID (e.g., 'bitcoin', 'ethereum')
+        coin_id: CoinGecko coin ID, symbol or name (e.g., 'bitcoin', 'eth', 'Solana')
 
     Returns:
         Comprehensive crypto data including market stats, supply info, etc.
     """
+    coin_id = await CryptoDataTool.resolve_coin_id(coin_id)
     endpoint = f"/coins/{coin_id}"
     params = {
         "localization": "false",
@@ -85,10 +251,11 @@ def get_crypto_details(coin_id: str) -> Dict:
         "developer_data": "true"
     }
 
-    result = CryptoDataTool._make_request(endpoint, params)
+    result = await CryptoDataTool._make_request(endpoint, params)
 
     if "error" in result:
-        return result
+        # Coins missing from a loaded index are unknown to CoinGecko as well (or listed since the last refresh)
+        return CryptoDataTool.not_found(coin_id) if len(coin_index) and coin_index.resolve(coin_id) is None else result
 
     market_data = result.get("market_data", {})
 
@@ -114,7 +281,7 @@ def get_crypto_details(coin_id: str) -> Dict:
     }
 
 @tool
-def get_trending_cryptos() -> Dict:
+async def get_trending_cryptos() -> Dict:
     """
     Get currently trending cryptocurrencies
 
@@ -122,7 +289,7 @@ def get_trending_cryptos() -> Dict:
         List of trending crypto coins with basic info
     """
     endpoint = "/search/trending"
-    result = CryptoDataTool._make_request(endpoint)
+    result = await CryptoDataTool._make_request(endpoint)
 
     if "error" in result:
         return result
@@ -144,7 +311,7 @@ def get_trending_cryptos() -> Dict:
     }
 
 @tool
-def search_crypto_coins(query: str) -> Dict:
+async def search_crypto_coins(query: str) -> Dict:
     """
     Search for cryptocurrencies by name or symbol
 
@@ -154,9 +321,19 @@ def search_crypto_coins(query: str) -> Dict:
     Returns:
         List of matching cryptocurrencies with their IDs
     """
+    await coin_index.ensure_ready()
+    if len(coin_index):
+        coins = coin_index.search(query, limit=10)
+        return {
+            "query": query,
+            "results": coins,
+            "total_found": len(coins)
+        }
+
+    # Fall back to CoinGecko search while the local index is unavailable
     endpoint = "/search"
     params = {"query": query}
-    result = CryptoDataTool._make_request(endpoint, params)
+    result = await CryptoDataTool._make_request(endpoint, params)
 
     if "error" in result:
         return result
@@ -177,7 +354,7 @@ def search_crypto_coins(query: str) -> Dict:
     }
 
 @tool
-def get_crypto_market_overview() -> Dict:
+async def get_crypto_market_overview() -> Dict:
     """
     Get global cryptocurrency market overview
 
@@ -185,7 +362,7 @@ def get_crypto_market_overview() -> Dict:
         Global market statistics
     """
     endpoint = "/global"
-    result = CryptoDataTool._make_request(endpoint)
+    result = await CryptoDataTool._make_request(endpoint)
 
     if "error" in result:
         return result
@@ -204,7 +381,7 @@ def get_crypto_market_overview() -> Dict:
     }
 
 @tool
-def get_top_cryptos(limit: int = 10, vs_currency: str = "usd") -> Dict:
+async def get_top_cryptos(limit: int = 10, vs_currency: str = "usd") -> Dict:
     """
     Get top cryptocurrencies by market cap
 
@@ -225,7 +402,7 @@ def get_top_cryptos(limit: int = 10, vs_currency: str = "usd") -> Dict:
         "price_change_percentage": "24h,7d"
     }
 
-    result = CryptoDataTool._make_request(endpoint, params)
+    result = await CryptoDataTool._make_request(endpoint, params)
 
     if "error" in result:
         return result
@@ -2,7 +2,7 @@ from datetime import date, time, datetime
 from langchain_core.tools import tool
 
 @tool("get_date")
-def get_current_date() -> date:
+async def get_current_date() -> date:
     """
     Tool to get current date
 
@@ -12,7 +12,7 @@ def get_current_date() -> date:
     return date.today()
 
 @tool("get_time")
-def get_current_time() -> time:
+async def get_current_time() -> time:
     """
     Tool to get current time
 
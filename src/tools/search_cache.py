@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+from src.utils.cache import TTLCache
+from .search_results import normalize_url
+
+def dedupe_results(response: dict[str, Any]) -> dict[str, Any]:
+    """
+    Drop results pointing to the same page (keeping the first, best ranked one)
+
+    Args:
+        response (dict): Raw search response
+
+    Returns:
+        dict: Response with unique result URLs
+    """
+    results = []
+    seen = set()
+    for result in response.get("results", []):
+        if not isinstance(result, dict) or "url" not in result:
+            continue
+        url_key = normalize_url(result["url"])
+        if url_key not in seen:
+            seen.add(url_key)
+            results.append(result)
+
+    return {**response, "results": results}
+
+class _DiskStore:
+    """
+    SQLite table of search responses shared by processes and restarts
+    """
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Tables of older versions lack the `found` count, they only hold cached responses
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(searches)")}
+        if columns and "found" not in columns:
+            self._conn.execute("DROP TABLE searches")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS searches (
+                key TEXT PRIMARY KEY,
+                requested INTEGER NOT NULL,
+                found INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    def get(self, key: str) -> tuple[int, int, dict[str, Any]] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT requested, found, response FROM searches WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return (row[0], row[1], json.loads(row[2])) if row else None
+
+    def put(self, key: str, requested: int, found: int, response: dict[str, Any], ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches (key, requested, found, response, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, requested, found, json.dumps(response), now + ttl)
+            )
+            self._conn.execute("DELETE FROM searches WHERE expires_at <= ?", (now,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class SearchCache:
+    """
+    Cache of search responses. An entry stores the response of the biggest request made for a search,
+    so it also serves requests for fewer results, with the number of results the search returned before
+    the duplicates were dropped.
+    """
+    def __init__(self, ttls: dict[str, float] | None = None, max_size: int = 256, path: str | None = None):
+        """
+        Initializes a new instance of SearchCache class
+
+        Args:
+            ttls (dict[str, float] | None): Seconds responses are kept for each topic
+            max_size (int): Max number of responses kept in memory
+            path (str | None): SQLite file also storing the responses (memory only when None)
+        """
+        self.ttls = ttls or {"general": 3600, "news": 600, "finance": 300}
+        self.cache = TTLCache(max_size=max_size)
+        self.disk = _DiskStore(path) if path else None
+        self.hits = 0
+        self.misses = 0
+
+    def _ttl(self, topic: str) -> float:
+        return self.ttls.get(topic, self.ttls.get("general", 0))
+
+    @staticmethod
+    def _covers(requested: int, found: int, max_results: int) -> bool:
+        # A search returning fewer results than requested found everything there is (duplicates dropped
+        # afterwards do not count, the search may have more pages)
+        return requested >= max_results or found < requested
+
+    @staticmethod
+    def _slice(response: dict[str, Any], max_results: int) -> dict[str, Any]:
+        return {**response, "results": response.get("results", [])[:max_results]}
+
+    async def get_or_search(self, key: tuple[Hashable, ...], topic: str, max_results: int,
+                            search: Callable[[], Awaitable[dict[str, Any]]]) -> dict[str, Any]:
+        """
+        Get the response of a search, running it when no cached response has enough results
+
+        Args:
+            key (tuple): Search parameters (without the number of results)
+            topic (str): Search topic (sets the TTL)
+            max_results (int): Number of results requested
+            search (Callable): Coroutine function running the search for `max_results`
+
+        Returns:
+            dict: Search response with at most `max_results` unique results
+        """
+        cached = self.cache.get(key)
+        if cached is None and self.disk is not None:
+            cached = await asyncio.to_thread(self.disk.get, repr(key))
+            if cached is not None:
+                self.cache.set(key, cached, ttl=self._ttl(topic))
+
+        if cached is not None and self._covers(cached[0], cached[1], max_results):
+            self.hits += 1
+            return self._slice(cached[2], max_results)
+
+        self.misses += 1
+
+        async def load() -> tuple[int, dict[str, Any]]:
+            response = await search()
+            return len(response.get("results", [])), dedupe_results(response)
+
+        # Concurrent identical searches share one request
+        found, response = await self.cache.get_or_load(("search", key, max_results), load, cacheable=lambda _: False)
+
+        if "error" not in response:
+            current = self.cache.get(key)
+            if current is None or not self._covers(current[0], current[1], max_results):
+                ttl = self._ttl(topic)
+                self.cache.set(key, (max_results, found, response), ttl=ttl)
+                if self.disk is not None:
+                    try:
+                        await asyncio.to_thread(self.disk.put, repr(key), max_results, found, response, ttl)
+                    except (sqlite3.Error, TypeError, ValueError) as e:
+                        logging.error(f"Error storing search response: {str(e)}")
+
+        return response
+
+    def clear(self):
+        self.cache.clear()
@@ -0,0 +1,163 @@
+import urllib.parse
+from dataclasses import dataclass, replace
+from typing import Any
+from langchain_core.messages import BaseMessage, ToolMessage
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize an URL so the same page found through different links compares equal
+
+    Args:
+        url (str): URL to normalize
+
+    Returns:
+        str: URL without scheme, `www.`, fragment, tracking parameters and trailing slash
+    """
+    parsed_url = urllib.parse.urlparse(url.strip())
+    domain = parsed_url.netloc.lower()
+    if domain.startswith("www."):
+        domain = domain[4:]
+
+    query = urllib.parse.urlencode([
+        (key, value) for key, value in urllib.parse.parse_qsl(parsed_url.query)
+        if not key.startswith("utm_") and key not in ("ref", "fbclid", "gclid")
+    ])
+
+    return f"{domain}{parsed_url.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+@dataclass(slots=True, frozen=True)
+class SearchResult:
+    title: str
+    url: str
+    content: str
+    score: float = 0.0
+
+@dataclass(slots=True, frozen=True)
+class SearchResults:
+    """
+    Web search response kept as the artifact of the search ToolMessage
+    """
+    query: str
+    results: tuple[SearchResult, ...]
+    images: tuple[str, ...] = ()
+
+    @classmethod
+    def from_tavily(cls, response: dict[str, Any]) -> "SearchResults":
+        """
+        Build the records from a raw Tavily response, dropping duplicated pages
+
+        Args:
+            response (dict): Tavily search response
+
+        Returns:
+            SearchResults: Deduplicated search results
+        """
+        results = []
+        seen = set()
+
+        for result in response.get("results", []):
+            if not isinstance(result, dict) or not result.get("url"):
+                continue
+
+            url_key = normalize_url(result["url"])
+            content = (result.get("content") or "").strip()
+            content_key = " ".join(content.lower().split())[:200]
+            if url_key in seen or (content_key and content_key in seen):
+                continue
+            seen.update((url_key, content_key))
+
+            results.append(SearchResult(
+                title=result.get("title") or "",
+                url=result["url"],
+                content=content,
+                score=float(result.get("score") or 0.0)
+            ))
+
+        images = tuple(
+            image if isinstance(image, str) else image.get("url", "")
+            for image in response.get("images", []) or []
+            if isinstance(image, str) or isinstance(image, dict)
+        )
+
+        return cls(query=response.get("query", ""), results=tuple(results), images=tuple(image for image in images if image))
+
+    @classmethod
+    def coerce(cls, value: Any) -> "SearchResults | None":
+        """
+        Get SearchResults back from an artifact (restored checkpoints may hold it as a plain dict)
+        """
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict) and "results" in value:
+            return cls(
+                query=value.get("query", ""),
+                results=tuple(result if isinstance(result, SearchResult) else SearchResult(**result) for result in value["results"]),
+                images=tuple(value.get("images", ()))
+            )
+        return None
+
+    def render(self, max_results: int | None = None, max_chars: int = 800) -> str:
+        """
+        Compact text version of the results for LLM prompts
+
+        Args:
+            max_results (int | None): Max number of results rendered
+            max_chars (int): Max characters kept of each result content
+
+        Returns:
+            str: Numbered results with title, URL and trimmed content
+        """
+        lines = []
+        for index, result in enumerate(self.results[:max_results], start=1):
+            content = result.content if len(result.content) <= max_chars else result.content[:max_chars].rsplit(" ", 1)[0] + "..."
+            lines.append(f"[{index}] {result.title} ({result.url})\n{content}")
+
+        if not lines:
+            return f"No search results found for '{self.query}'."
+
+        return "\n\n".join(lines)
+
+def format_search_results(result: Any) -> tuple[str, SearchResults | None]:
+    """
+    ToolExecutor formatter of the web search tool
+
+    Args:
+        result (Any): Raw tool result (Tavily response, or an error string)
+
+    Returns:
+        tuple: Text rendering for the LLM and the SearchResults artifact
+    """
+    if not isinstance(result, dict) or "error" in result:
+        return str(result), None
+
+    search_results = SearchResults.from_tavily(result)
+    return search_results.render(), search_results
+
+def dedupe_search_messages(messages: list[BaseMessage]) -> list[BaseMessage]:
+    """
+    Drop the results of search ToolMessages already found by an earlier search of the same batch
+
+    Args:
+        messages (list[BaseMessage]): Tool messages of one batch of tool calls
+
+    Returns:
+        list[BaseMessage]: Same messages, with search results and content updated where needed
+    """
+    seen = set()
+    deduped = []
+
+    for message in messages:
+        search_results = SearchResults.coerce(message.artifact) if isinstance(message, ToolMessage) else None
+        if search_results is None:
+            deduped.append(message)
+            continue
+
+        unique = tuple(result for result in search_results.results if normalize_url(result.url) not in seen)
+        seen.update(normalize_url(result.url) for result in unique)
+
+        if len(unique) != len(search_results.results):
+            search_results = replace(search_results, results=unique)
+            message = message.model_copy(update={"content": search_results.render(), "artifact": search_results})
+        deduped.append(message)
+
+    return deduped
@@ -1,9 +1,91 @@
 import os
+from typing import Any, Literal, Optional, Type
+from pydantic import BaseModel, Field
+from langchain_core.tools import ToolException
 from langchain_tavily import TavilySearch
+from langchain_tavily.tavily_search import TavilySearchInput
+from .search_cache import SearchCache
 
-tavily_search = TavilySearch(
+# Highest number of results the Tavily API returns for one search
+MAX_RESULTS_LIMIT = 20
+
+class CachedTavilySearchInput(TavilySearchInput):
+    max_results: Optional[int] = Field(default=None, description="Number of results to return")
+
+class CachedTavilySearch(TavilySearch):
+    """
+    Tavily search going through a SearchCache, which also accepts `max_results` on invocation
+    """
+    args_schema: Type[BaseModel] = CachedTavilySearchInput
+    cache: SearchCache = Field(default_factory=SearchCache, exclude=True)
+
+    async def _arun(
+        self,
+        query: str,
+        include_domains: Optional[list[str]] = None,
+        exclude_domains: Optional[list[str]] = None,
+        search_depth: Optional[Literal["basic", "advanced", "fast", "ultra-fast"]] = "basic",
+        include_images: Optional[bool] = False,
+        time_range: Optional[Literal["day", "week", "month", "year"]] = None,
+        topic: Optional[Literal["general", "news", "finance"]] = "general",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        max_results: Optional[int] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        params = {
+            "query": " ".join(query.split()),
+            "include_domains": self.include_domains or include_domains,
+            "exclude_domains": self.exclude_domains or exclude_domains,
+            "search_depth": self.search_depth or search_depth,
+            "include_images": self.include_images or include_images,
+            "time_range": self.time_range or time_range,
+            "topic": self.topic or topic,
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+        max_results = min(max_results or self.max_results or 5, MAX_RESULTS_LIMIT)
+
+        async def search() -> dict[str, Any]:
+            try:
+                return await self.api_wrapper.raw_results_async(
+                    **params,
+                    max_results=max_results,
+                    include_favicon=self.include_favicon,
+                    country=self.country,
+                    include_answer=self.include_answer,
+                    include_raw_content=self.include_raw_content,
+                    include_image_descriptions=self.include_image_descriptions,
+                    auto_parameters=self.auto_parameters,
+                    include_usage=self.include_usage,
+                    exact_match=self.exact_match,
+                )
+            except Exception as e:
+                return {"error": str(e)}
+
+        key = tuple(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in params.items() if name != "query"
+        ) + (("query", params["query"].casefold()),)
+        response = await self.cache.get_or_search(key, params["topic"] or "general", max_results, search)
+
+        if "error" not in response and not response.get("results"):
+            raise ToolException(f"No search results found for '{query}'. Try a broader query or a longer time range.")
+        return response
+
+tavily_search = CachedTavilySearch(
     max_results=15,
     search_depth="advanced",
     include_images=True,
     tavily_api_key=os.getenv("TAVILY_API_KEY", ""),
-)
\ No newline at end of file
+    cache=SearchCache(
+        ttls={
+            "general": float(os.getenv("SEARCH_CACHE_TTL_GENERAL", "3600")),
+            "news": float(os.getenv("SEARCH_CACHE_TTL_NEWS", "600")),
+            "finance": float(os.getenv("SEARCH_CACHE_TTL_FINANCE", "300")),
+        },
+        max_size=int(os.getenv("SEARCH_CACHE_SIZE", "256")),
+        path=os.getenv("SEARCH_CACHE_PATH") or None
+    ),
+)
@@ -1,8 +1,11 @@
-import requests
+import os
 from langchain_core.tools import tool
+from src.utils.http_client import get_http_client
+
+WTTR_BASE_URL = os.getenv("WTTR_BASE_URL", "http://wttr.in")
 
 @tool
-def get_weather(city: str):
+async def get_weather(city: str):
     """
     Get weather information from specific city using wttr.in
 
@@ -10,8 +13,8 @@ def get_weather(city: str):
         city (str): City to retrieve weather info
     """
     try:
-        url = f"http://wttr.in/{city}?format=j1"
-        response = requests.get(url, timeout=10)
+        url = f"{WTTR_BASE_URL}/{city}"
+        response = await get_http_client(url).get(url, params={"format": "j1"})
         response.raise_for_status()
 
         data = response.json()
@@ -0,0 +1,159 @@
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Iterable
+from src.utils.cache import TTLCache
+
+DEFAULT_TTLS = {
+    "general": float(os.getenv("ANSWER_CACHE_TTL_GENERAL", "3600")),
+    "news": float(os.getenv("ANSWER_CACHE_TTL_NEWS", "300")),
+    "finance": float(os.getenv("ANSWER_CACHE_TTL_FINANCE", "60")),
+}
+
+# Tools returning live data, an answer using them is cached at most this many seconds (0: not cached)
+DEFAULT_TOOL_TTLS = {
+    "get_time": 0.0,
+    "get_date": 0.0,
+    "get_weather": float(os.getenv("ANSWER_CACHE_TTL_WEATHER", "0")),
+    "get_crypto_price": float(os.getenv("ANSWER_CACHE_TTL_CRYPTO", "0")),
+    "get_crypto_details": float(os.getenv("ANSWER_CACHE_TTL_CRYPTO", "0")),
+    "get_trending_cryptos": float(os.getenv("ANSWER_CACHE_TTL_CRYPTO", "0")),
+    "get_crypto_market_overview": float(os.getenv("ANSWER_CACHE_TTL_CRYPTO", "0")),
+    "get_top_cryptos": float(os.getenv("ANSWER_CACHE_TTL_CRYPTO", "0")),
+}
+
+def normalize_query(message: str) -> str:
+    """
+    Normalize a user message so trivially different spellings share a cache entry
+
+    Args:
+        message (str): User message
+
+    Returns:
+        str: Lowercased message without punctuation and repeated whitespace
+    """
+    text = unicodedata.normalize("NFKC", message).casefold()
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+@dataclass(slots=True, frozen=True)
+class CachedAnswer:
+    # SSE frames of the answer (the checkpoint frame excluded)
+    frames: tuple[bytes, ...]
+    # Conversation state left by the run, used to seed the conversation of a cache hit
+    values: dict[str, Any]
+
+class AnswerCache:
+    """
+    Cache of complete answers (the SSE frames sent to the client) of new conversations
+    """
+    def __init__(self, ttls: dict[str, float] | None = None, max_size: int = 256, similarity: float | None = None,
+                 tool_ttls: dict[str, float] | None = None):
+        """
+        Initializes a new instance of AnswerCache class
+
+        Args:
+            ttls (dict[str, float] | None): Seconds an answer is kept for each topic (0 disables the topic)
+            max_size (int): Max number of answers kept
+            similarity (float | None): Min token-set similarity (0-1] for a near-duplicate message to reuse
+                an answer. Only exact normalized matches are used when None.
+            tool_ttls (dict[str, float] | None): Max seconds an answer using each tool is kept (0 prevents caching it)
+        """
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.tool_ttls = DEFAULT_TOOL_TTLS if tool_ttls is None else tool_ttls
+        self.similarity = similarity
+        self.cache = TTLCache(max_size=max_size)
+        self.hits = 0
+        self.misses = 0
+        # Token sets of cached messages, per (topic, mode), for near-duplicate lookups
+        self._tokens: dict[tuple[str, str], dict[str, frozenset[str]]] = {}
+
+    def get(self, message: str, topic: str, mode: str) -> CachedAnswer | None:
+        """
+        Find the cached answer of a message
+
+        Args:
+            message (str): User message
+            topic (str): Search topic
+            mode (str): Chat mode
+
+        Returns:
+            CachedAnswer | None: Answer of the same (or a near-duplicate) message, if any
+        """
+        if not self.ttls.get(topic):
+            return None
+
+        cached = self._find(message, topic, mode)
+        if cached is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return cached
+
+    def _find(self, message: str, topic: str, mode: str) -> CachedAnswer | None:
+        query = normalize_query(message)
+        cached = self.cache.get((query, topic, mode))
+        if cached is not None or self.similarity is None:
+            return cached
+
+        tokens = frozenset(query.split())
+        if not tokens:
+            return None
+
+        candidates = self._tokens.get((topic, mode), {})
+        best_query, best_score = None, self.similarity
+        for cached_query, cached_tokens in list(candidates.items()):
+            score = len(tokens & cached_tokens) / len(tokens | cached_tokens)
+            if score >= best_score:
+                best_query, best_score = cached_query, score
+
+        if best_query is None:
+            return None
+
+        cached = self.cache.get((best_query, topic, mode))
+        if cached is None:
+            # Expired or evicted
+            candidates.pop(best_query, None)
+        return cached
+
+    def set(self, message: str, topic: str, mode: str, answer: CachedAnswer, tools: Iterable[str] = ()):
+        """
+        Store the answer of a message
+
+        Args:
+            message (str): User message
+            topic (str): Search topic
+            mode (str): Chat mode
+            answer (CachedAnswer): Answer frames and conversation state
+            tools (Iterable[str]): Tools called to answer, live data shortens (or prevents) caching
+        """
+        ttl = min([self.ttls.get(topic) or 0.0] + [self.tool_ttls[tool] for tool in tools if tool in self.tool_ttls])
+        if not ttl:
+            return
+
+        query = normalize_query(message)
+        self.cache.set((query, topic, mode), answer, ttl=ttl)
+
+        if self.similarity is not None:
+            candidates = self._tokens.setdefault((topic, mode), {})
+            candidates[query] = frozenset(query.split())
+            if len(candidates) > 2 * self.cache.max_size:
+                self._prune()
+
+    def _prune(self):
+        """
+        Drop token sets of answers no longer cached
+        """
+        for (topic, mode), candidates in self._tokens.items():
+            for query in list(candidates):
+                if (query, topic, mode) not in self.cache:
+                    del candidates[query]
+
+    def clear(self):
+        self.cache.clear()
+        self._tokens.clear()
+
+answer_cache = AnswerCache(
+    max_size=int(os.getenv("ANSWER_CACHE_SIZE", "256")),
+    similarity=float(os.getenv("ANSWER_CACHE_SIMILARITY")) if os.getenv("ANSWER_CACHE_SIMILARITY") else None
+)
@@ -0,0 +1,106 @@
+import json
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Literal
+from langgraph.graph import StateGraph
+from src.utils.answer_cache import AnswerCache, normalize_query
+from src.utils.responses import generate_chat_responses
+from src.utils.runs import RunManager
+
+@dataclass(slots=True, frozen=True)
+class BatchQuestion:
+    message: str
+    topic: Literal["general", "news", "finance"]
+    mode: Literal["informative", "timeline"] = "informative"
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return normalize_query(self.message), self.topic, self.mode
+
+async def collect_chat_response(graph: StateGraph, question: BatchQuestion, answer_cache: AnswerCache | None = None) -> dict[str, Any]:
+    """
+    Run a question in a new conversation and gather the streamed messages into one result
+
+    Args:
+        graph (StateGraph): Orchestrator graph
+        question (BatchQuestion): Question
+        answer_cache (AnswerCache | None): Cache of answers of new conversations
+
+    Returns:
+        dict: Checkpoint id, answer, timeline events, sources and followup questions (and the errors, if any)
+    """
+    result = {"checkpoint_id": None, "answer": "", "events": [], "sources": [], "followup_questions": []}
+    answer = []
+    errors = []
+
+    async for frame in generate_chat_responses(graph, question.message, question.topic, question.mode, answer_cache=answer_cache):
+        payload = json.loads(frame.removeprefix(b"data: "))
+        message_type = payload["type"]
+
+        if message_type == "checkpoint":
+            result["checkpoint_id"] = payload["checkpoint_id"]
+        elif message_type == "content":
+            answer.append(payload["content"])
+        elif message_type == "timeline_content":
+            result["events"] = payload["events"]
+        elif message_type == "search_results":
+            result["sources"].extend(payload["sources"])
+        elif message_type == "followup_questions":
+            result["followup_questions"] = payload["questions"]
+        elif message_type == "error":
+            errors.append(payload["message"])
+
+    result["answer"] = "".join(answer)
+    if errors:
+        result["errors"] = errors
+    return result
+
+async def run_batch(graph: StateGraph, questions: list[BatchQuestion], parallelism: int = 4,
+                    answer_cache: AnswerCache | None = None, run_manager: RunManager | None = None) -> AsyncIterator[dict[str, Any]]:
+    """
+    Answer many questions concurrently, each in its own conversation
+
+    Questions that only differ in case, punctuation or spacing (same topic and mode) are answered
+    once. Overlapping searches are shared by the search cache and repeated questions by the answer cache.
+
+    Args:
+        graph (StateGraph): Orchestrator graph
+        questions (list[BatchQuestion]): Questions
+        parallelism (int): Max number of questions answered at once
+        answer_cache (AnswerCache | None): Cache of answers of new conversations
+        run_manager (RunManager | None): Run manager whose slots the questions take, shared with the chat runs
+
+    Returns:
+        AsyncIterator[dict]: Result of each question (with its `index`), in the order they finish
+    """
+    duplicates: dict[tuple[str, str, str], list[int]] = {}
+    for index, question in enumerate(questions):
+        duplicates.setdefault(question.key, []).append(index)
+
+    slots = asyncio.Semaphore(parallelism)
+    finished: asyncio.Queue[tuple[list[int], dict[str, Any]]] = asyncio.Queue()
+
+    async def answer(indexes: list[int]):
+        async with slots:
+            try:
+                if run_manager is None:
+                    result = await collect_chat_response(graph, questions[indexes[0]], answer_cache)
+                else:
+                    async with run_manager.slot():
+                        result = await collect_chat_response(graph, questions[indexes[0]], answer_cache)
+            except Exception as e:
+                logging.error(f"Error in batch question {indexes[0]}: {e}")
+                result = {"errors": [str(e)]}
+        finished.put_nowait((indexes, result))
+
+    tasks = [asyncio.ensure_future(answer(indexes)) for indexes in duplicates.values()]
+    try:
+        for _ in range(len(tasks)):
+            indexes, result = await finished.get()
+            for index in indexes:
+                yield {"index": index, "message": questions[index].message, **result}
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
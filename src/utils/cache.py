@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+@dataclass(slots=True)
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+class TTLCache:
+    """
+    Async LRU cache with per entry TTL, single-flight loading and stale-while-revalidate
+    """
+    def __init__(self, max_size: int = 512, default_ttl: float = 30.0):
+        """
+        Initializes a new instance of TTLCache class
+
+        Args:
+            max_size (int): Max number of entries kept (least recently used are evicted first)
+            default_ttl (float): Seconds an entry is fresh when no ttl is given
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.fresh_until > time.monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a fresh value without loading it
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.fresh_until <= time.monotonic():
+            return default
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None, stale_ttl: float = 0.0):
+        """
+        Store a value
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store
+            ttl (float | None): Seconds the value is fresh
+            stale_ttl (float): Extra seconds the value may be served while it is refreshed
+        """
+        now = time.monotonic()
+        fresh_until = now + (self.default_ttl if ttl is None else ttl)
+        self._entries[key] = _Entry(value=value, fresh_until=fresh_until, stale_until=fresh_until + stale_ttl)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float | None = None,
+                          stale_ttl: float = 0.0, cacheable: Callable[[Any], bool] | None = None) -> Any:
+        """
+        Get a value, loading it on a miss. Concurrent misses for the same key share one load,
+        and stale values are served immediately while they are refreshed in the background.
+
+        Args:
+            key (Hashable): Cache key
+            loader (Callable): Coroutine function producing the value
+            ttl (float | None): Seconds the value is fresh
+            stale_ttl (float): Extra seconds the value may be served while it is refreshed
+            cacheable (Callable | None): Predicate deciding if a loaded value is stored
+
+        Returns:
+            Any: Cached or freshly loaded value
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if entry.fresh_until > now:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+
+            if entry.stale_until > now:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self._start_load(key, loader, ttl, stale_ttl, cacheable)
+                return entry.value
+
+        self.misses += 1
+        load = self._inflight.get(key) or self._start_load(key, loader, ttl, stale_ttl, cacheable)
+        # Shield the shared load so a cancelled caller does not cancel it for everyone else
+        return await asyncio.shield(load)
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float | None,
+                    stale_ttl: float, cacheable: Callable[[Any], bool] | None) -> asyncio.Task:
+        """
+        Start the single shared load of a key
+        """
+        async def load() -> Any:
+            value = await loader()
+            if cacheable is None or cacheable(value):
+                self.set(key, value, ttl=ttl, stale_ttl=stale_ttl)
+            return value
+
+        task = asyncio.ensure_future(load())
+        self._inflight[key] = task
+
+        def done(task: asyncio.Task):
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+            if not task.cancelled() and task.exception() is not None:
+                logging.warning(f"Cache load failed for {key}: {task.exception()}")
+
+        task.add_done_callback(done)
+        return task
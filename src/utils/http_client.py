@@ -0,0 +1,216 @@
+import asyncio
+import contextlib
+import socket
+import time
+import weakref
+import urllib.parse
+import httpcore
+import httpx
+
+DNS_CACHE_TTL = 300
+HTTP_TIMEOUT = 10
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=60)
+
+# One pool of clients per event loop, each keyed by upstream origin
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+
+def _http2_available() -> bool:
+    """
+    HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+    """
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+class DNSCache:
+    """
+    Process wide DNS cache shared by every pooled client
+    """
+    def __init__(self, ttl: float = DNS_CACHE_TTL):
+        """
+        Initializes a new instance of DNSCache class
+
+        Args:
+            ttl (float): Seconds a resolved address is kept
+        """
+        self.ttl = ttl
+        self._entries: dict[tuple[str, int], tuple[str, float]] = {}
+
+    async def resolve(self, host: str, port: int) -> str:
+        """
+        Resolve host to an IP address, using the cached value while it is fresh
+
+        Args:
+            host (str): Host name
+            port (int): Port number
+
+        Returns:
+            str: Resolved address (or the host itself if it cannot be resolved)
+        """
+        try:
+            socket.inet_pton(socket.AF_INET6 if ":" in host else socket.AF_INET, host)
+            return host
+        except OSError:
+            pass
+
+        entry = self._entries.get((host, port))
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError:
+            # Let the connection attempt surface the real error
+            return host
+
+        address = infos[0][4][0]
+        self._entries[(host, port)] = (address, time.monotonic() + self.ttl)
+        return address
+
+    def clear(self):
+        self._entries.clear()
+
+dns_cache = DNSCache()
+
+class _CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    httpcore network backend that resolves hosts through the shared DNS cache (TLS SNI still uses the host name)
+    """
+    def __init__(self, cache: DNSCache):
+        self._cache = cache
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        address = await self._cache.resolve(host, port)
+        return await self._backend.connect_tcp(address, port, timeout=timeout, local_address=local_address, socket_options=socket_options)
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds):
+        await self._backend.sleep(seconds)
+
+# httpcore errors raised as their httpx counterparts (subclasses first), like httpx's own transport does
+_HTTPCORE_ERRORS: dict[type[Exception], type[httpx.TransportError]] = {
+    httpcore.ConnectTimeout: httpx.ConnectTimeout,
+    httpcore.ReadTimeout: httpx.ReadTimeout,
+    httpcore.WriteTimeout: httpx.WriteTimeout,
+    httpcore.PoolTimeout: httpx.PoolTimeout,
+    httpcore.TimeoutException: httpx.TimeoutException,
+    httpcore.ConnectError: httpx.ConnectError,
+    httpcore.ReadError: httpx.ReadError,
+    httpcore.WriteError: httpx.WriteError,
+    httpcore.NetworkError: httpx.NetworkError,
+    httpcore.RemoteProtocolError: httpx.RemoteProtocolError,
+    httpcore.LocalProtocolError: httpx.LocalProtocolError,
+    httpcore.ProtocolError: httpx.ProtocolError,
+    httpcore.ProxyError: httpx.ProxyError,
+    httpcore.UnsupportedProtocol: httpx.UnsupportedProtocol,
+}
+
+@contextlib.contextmanager
+def _httpx_errors():
+    try:
+        yield
+    except Exception as e:
+        for error_type in type(e).__mro__:
+            if error_type in _HTTPCORE_ERRORS:
+                raise _HTTPCORE_ERRORS[error_type](str(e)) from e
+        raise
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream):
+        self._stream = stream
+
+    async def __aiter__(self):
+        with _httpx_errors():
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self):
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+class _PooledTransport(httpx.AsyncBaseTransport):
+    """
+    Keep-alive connection pool using the shared DNS cache
+    """
+    def __init__(self, http2: bool):
+        """
+        Initializes a new instance of _PooledTransport class
+
+        Args:
+            http2 (bool): Whether HTTP/2 is negotiated with the upstreams supporting it
+        """
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=HTTP_LIMITS.max_connections,
+            max_keepalive_connections=HTTP_LIMITS.max_keepalive_connections,
+            keepalive_expiry=HTTP_LIMITS.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=_CachingNetworkBackend(dns_cache),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _httpx_errors():
+            response = await self._pool.handle_async_request(core_request)
+
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._pool.aclose()
+
+def get_http_client(url: str) -> httpx.AsyncClient:
+    """
+    Get the pooled async client for the upstream host of an URL
+
+    Args:
+        url (str): Any URL of the upstream host
+
+    Returns:
+        httpx.AsyncClient: Shared client (one per host and event loop)
+    """
+    parsed_url = urllib.parse.urlparse(url)
+    origin = f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+    loop_clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = loop_clients.get(origin)
+
+    if client is None or client.is_closed:
+        http2 = _http2_available()
+        client = httpx.AsyncClient(
+            transport=_PooledTransport(http2=http2),
+            timeout=HTTP_TIMEOUT,
+            http2=http2,
+        )
+        loop_clients[origin] = client
+
+    return client
+
+async def close_http_clients():
+    """
+    Close every pooled client that belongs to the running event loop
+    """
+    loop_clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in loop_clients.values():
+        await client.aclose()
@@ -0,0 +1,144 @@
+import time
+from typing import Any
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, CollectorRegistry
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+NODE_LATENCY = Histogram("chat_node_duration_seconds", "Duration of graph nodes", ["node", "status"], buckets=LATENCY_BUCKETS)
+TOOL_LATENCY = Histogram("chat_tool_duration_seconds", "Duration of tool calls", ["tool", "status"], buckets=LATENCY_BUCKETS)
+LLM_LATENCY = Histogram("chat_llm_duration_seconds", "Duration of LLM calls", ["node", "status"], buckets=LATENCY_BUCKETS)
+LLM_TOKENS = Counter("chat_llm_tokens", "Tokens of LLM calls", ["node", "direction"])
+STREAM_TTFB = Histogram("chat_stream_ttfb_seconds", "Time until the first message of the run is streamed", buckets=LATENCY_BUCKETS)
+STREAM_TTFT = Histogram("chat_stream_ttft_seconds", "Time until the first answer token is streamed", buckets=LATENCY_BUCKETS)
+STREAMS_IN_PROGRESS = Gauge("chat_streams_in_progress", "Graph runs being streamed")
+TIMELINE_ITERATION_LATENCY = Histogram("chat_timeline_iteration_duration_seconds", "Duration of timeline generate/evaluate iterations", ["iteration"], buckets=LATENCY_BUCKETS)
+TIMELINE_ITERATION_SCORE = Histogram("chat_timeline_iteration_score", "Evaluation score of timeline iterations", ["iteration"], buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0))
+EVENT_LOOP_LAG = Histogram("chat_event_loop_lag_seconds", "Delay of the event loop watchdog heartbeats", buckets=(0.001, 0.0025) + LATENCY_BUCKETS[:10])
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records the latency of graph nodes, tools and LLM calls, and the tokens of LLM calls
+    """
+    # Runs in the event loop instead of a thread pool (only updates in-memory metrics)
+    run_inline = True
+
+    def __init__(self):
+        """
+        Initializes a new instance of MetricsCallbackHandler class
+        """
+        self._started: dict[UUID, tuple[float, Histogram, str]] = {}
+
+    def _start(self, run_id: UUID, histogram: Histogram, label: str):
+        self._started[run_id] = (time.perf_counter(), histogram, label)
+
+    def _end(self, run_id: UUID, status: str):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            start, histogram, label = started
+            histogram.labels(label, status).observe(time.perf_counter() - start)
+
+    def on_chain_start(self, serialized: dict[str, Any] | None, inputs: Any, *, run_id: UUID,
+                       metadata: dict[str, Any] | None = None, **kwargs: Any):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node itself, not the runnables it calls
+        if node is not None and kwargs.get("name") == node:
+            self._start(run_id, NODE_LATENCY, node)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, "ok")
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, "error")
+
+    def on_tool_start(self, serialized: dict[str, Any] | None, input_str: str, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id, TOOL_LATENCY, kwargs.get("name") or (serialized or {}).get("name", "unknown"))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, "ok")
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, "error")
+
+    def on_chat_model_start(self, serialized: dict[str, Any] | None, messages: list, *, run_id: UUID,
+                            metadata: dict[str, Any] | None = None, **kwargs: Any):
+        self._start(run_id, LLM_LATENCY, (metadata or {}).get("langgraph_node", "unknown"))
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        started = self._started.get(run_id)
+        self._end(run_id, "ok")
+        if started is None:
+            return
+
+        node = started[2]
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.labels(node, "input").inc(usage.get("input_tokens", 0))
+                    LLM_TOKENS.labels(node, "output").inc(usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, "error")
+
+class StatsCollector(Collector):
+    """
+    Exposes the counters kept by the caches, the intent router, the speculative search and the run manager
+    (read when the metrics are scraped, so the hot paths only increment integers)
+    """
+    def __init__(self):
+        """
+        Initializes a new instance of StatsCollector class
+        """
+        self.caches: dict[str, Any] = {}
+        self.router = None
+        self.speculation = None
+        self.run_manager = None
+        self._registries: list[CollectorRegistry] = []
+
+    def register(self, registry: CollectorRegistry = REGISTRY):
+        """
+        Expose the stats in a Prometheus registry (only registered once per registry)
+        """
+        if not any(registered is registry for registered in self._registries):
+            registry.register(self)
+            self._registries.append(registry)
+
+    def collect(self):
+        requests = CounterMetricFamily("chat_cache_requests", "Cache lookups", labels=["cache", "result"])
+        for name, cache in self.caches.items():
+            requests.add_metric([name, "hit"], cache.hits)
+            requests.add_metric([name, "miss"], cache.misses)
+            if hasattr(cache, "stale_hits"):
+                requests.add_metric([name, "stale_hit"], cache.stale_hits)
+        yield requests
+
+        if self.router is not None:
+            decisions = CounterMetricFamily("chat_route_decisions", "Intent router decisions", labels=["intent"])
+            for intent, count in self.router.counts.items():
+                decisions.add_metric([intent], count)
+            yield decisions
+
+        if self.speculation is not None:
+            searches = CounterMetricFamily("chat_speculative_searches", "Speculative searches", labels=["result"])
+            searches.add_metric(["hit"], self.speculation.hits)
+            searches.add_metric(["miss"], self.speculation.misses)
+            yield searches
+            yield CounterMetricFamily("chat_speculative_saved_seconds", "Latency saved by speculative searches", value=self.speculation.saved_seconds)
+
+        if self.run_manager is not None:
+            yield GaugeMetricFamily("chat_runs_executing", "Runs executing", value=self.run_manager.executing)
+            yield GaugeMetricFamily("chat_runs_queued", "Runs waiting for a slot", value=self.run_manager.queued)
+            yield GaugeMetricFamily("chat_batch_questions_executing", "Batch questions holding a run slot", value=self.run_manager.batch_executing)
+            runs = CounterMetricFamily("chat_runs", "Finished runs", labels=["result"])
+            runs.add_metric(["completed"], self.run_manager.completed)
+            runs.add_metric(["cancelled"], self.run_manager.cancelled)
+            runs.add_metric(["rejected"], self.run_manager.rejected)
+            yield runs
+
+metrics_callback = MetricsCallbackHandler()
+stats_collector = StatsCollector()
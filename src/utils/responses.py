@@ -1,14 +1,191 @@
+import os
+import random
 import logging
-import json
-import ast
+import time
+from dataclasses import dataclass, field
 from typing import Literal
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 from langgraph.graph import StateGraph
 from uuid import uuid4
 from typing import Optional
 from src.utils.data_extraction import get_duckduckgo_favicon, extract_site_name
+from src.tools.search_results import SearchResults
+from src.utils.answer_cache import AnswerCache, CachedAnswer
+from src.utils.sse import encode_event
+from src.utils.metrics import metrics_callback, STREAM_TTFB, STREAM_TTFT, STREAMS_IN_PROGRESS
+from src.utils.tracing import tracer
 
-async def generate_chat_responses(graph: StateGraph, message: str, topic: Literal["general", "news", "finance"], mode: Literal["informative", "timeline"] = "informative", checkpoint_id: Optional[str] = None):
+# Nodes whose LLM output is the answer sent to the user
+ANSWER_NODES = ("initial_llm_node", "final_llm_node")
+
+# Share of graph events logged (for debugging, every event is logged at 1)
+EVENT_LOG_SAMPLE_RATE = float(os.getenv("EVENT_LOG_SAMPLE_RATE", "0"))
+
+@dataclass(slots=True)
+class StreamStats:
+    """
+    Latency and processing cost of an answer stream
+    """
+    started_at: float = field(default_factory=time.perf_counter)
+    first_message_at: float | None = None
+    first_token_at: float | None = None
+    chunks: int = 0
+    cpu_time: float = 0.0
+
+    def record_chunk(self, cpu_time: float):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.chunks += 1
+        self.cpu_time += cpu_time
+
+    def record_message(self):
+        if self.first_message_at is None:
+            self.first_message_at = time.perf_counter()
+            STREAM_TTFB.observe(self.first_message_at - self.started_at)
+
+    @property
+    def ttft(self) -> float | None:
+        return None if self.first_token_at is None else self.first_token_at - self.started_at
+
+    @property
+    def cpu_per_chunk(self) -> float:
+        return self.cpu_time / self.chunks if self.chunks else 0.0
+
+class AnswerBuffer:
+    """
+    Append-only buffer of the streamed answer, per message
+    """
+    def __init__(self):
+        self._parts: dict[str, list[str]] = {}
+        self._offsets: dict[str, int] = {}
+
+    def append(self, message_id: str, delta: str) -> int:
+        """
+        Add a delta of a message and return its offset in the message
+        """
+        offset = self._offsets.get(message_id, 0)
+        self._parts.setdefault(message_id, []).append(delta)
+        self._offsets[message_id] = offset + len(delta)
+        return offset
+
+    def remainder(self, message_id: str, text: str) -> str:
+        """
+        Part of a complete message not added yet
+        """
+        return text[self._offsets.get(message_id, 0):]
+
+    def text(self) -> str:
+        return "".join("".join(parts) for parts in self._parts.values())
+
+async def _stream_graph_events(graph: StateGraph, input_data: dict, config: dict, stats: StreamStats):
+    """
+    Run the graph and turn its events into the payloads of the SSE messages
+
+    Args:
+        graph (StateGraph): Orchestrator graph
+        input_data (dict): Graph input
+        config (dict): Graph config (thread of the conversation)
+        stats (StreamStats): Stats of the answer stream, updated as it is sent
+    """
+    answer = AnswerBuffer()
+    streamed_events = []
+
+    async for event in graph.astream_events(input_data, config=config, version="v2"):
+        try:
+            event_type = event.get("event", "")
+            event_name = event.get("name", "")
+            event_data = event.get("data", {})
+
+            if EVENT_LOG_SAMPLE_RATE and random.random() < EVENT_LOG_SAMPLE_RATE:
+                logging.info(f"Event: {event_type} | Name: {event_name}")
+
+            if event_name == "tool_node" and event_type == "on_chain_start":
+                yield {'type': 'search_start'}
+
+            elif event_name == "timeline_node" and event_type == "on_chain_start":
+                yield {'type': 'timeline_generation_start'}
+
+            elif event_type == "on_custom_event" and event_name == "route":
+                yield {'type': 'route', **event_data}
+
+            elif event_type == "on_custom_event" and event_name == "timeline_event":
+                streamed_event = event_data["event"].model_dump()
+                streamed_events.append(streamed_event)
+                yield {'type': 'timeline_event', 'index': event_data["index"], 'event': streamed_event}
+
+            elif event_type == "on_custom_event" and event_name == "timeline_draft":
+                yield {
+                    'type': 'timeline_draft',
+                    'iteration': event_data["iteration"],
+                    'score': event_data["score"],
+                    'events': [e.model_dump() for e in event_data["events"]]
+                }
+
+            elif event_name == "timeline_node" and event_type == "on_chain_end":
+                timeline_output = event_data["output"]
+                events = timeline_output["events"]
+
+                json_ready = [e.model_dump() for e in events]
+                # Final version of the timeline, `changed` tells if it differs from the streamed events
+                yield {'type': 'timeline_content', 'events': json_ready, 'changed': json_ready != streamed_events}
+
+            # Handle tool_node
+            elif event_name == "tool_node" and event_type in ["on_chain_stream", "on_chain_end"]:
+                chunk = event_data.get("chunk", {})
+                messages = chunk.get("messages", [])
+
+                for tool_message in messages:
+                    # Web search tool
+                    if getattr(tool_message, "name", None) != "tavily_search":
+                        continue
+
+                    search_results = SearchResults.coerce(getattr(tool_message, "artifact", None))
+                    if search_results is None:
+                        continue
+
+                    sources = [{
+                            "title": result.title,
+                            "url": result.url,
+                            "site": extract_site_name(url=result.url),
+                            "site_icon": get_duckduckgo_favicon(url=result.url),
+                            } for result in search_results.results]
+                    if sources:
+                        yield {'type': 'search_results', 'sources': sources, 'images': list(search_results.images)}
+
+            elif event_type == "on_chain_end" and event_name == "followup_node":
+                followup_output = event_data["output"]
+                yield {'type': 'followup_questions', 'questions': followup_output['followup_questions']}
+
+            # Answer tokens (only LLM answers are sent as content)
+            elif event_type == "on_chat_model_stream" and event.get("metadata", {}).get("langgraph_node") in ANSWER_NODES:
+                start = time.process_time()
+                chunk = event_data.get("chunk")
+                delta = chunk.text if chunk is not None else ""
+
+                if delta:
+                    message_id = chunk.id or event.get("run_id")
+                    offset = answer.append(message_id, delta)
+                    stats.record_chunk(time.process_time() - start)
+                    yield {'type': 'content', 'content': delta, 'id': message_id, 'offset': offset}
+
+            # Complete answers, only the part not streamed yet is sent (models that do not stream)
+            elif event_type == "on_chain_stream" and event_name in ANSWER_NODES:
+                chunk = event_data.get("chunk", {})
+
+                for msg in chunk.get("messages", []) if isinstance(chunk, dict) else []:
+                    if not isinstance(msg, AIMessage):
+                        continue
+                    delta = answer.remainder(msg.id, msg.text)
+                    if delta:
+                        offset = answer.append(msg.id, delta)
+                        stats.record_chunk(0.0)
+                        yield {'type': 'content', 'content': delta, 'id': msg.id, 'offset': offset}
+
+        except Exception as e:
+            logging.error(f"Error processing event {event_type}: {e}")
+            yield {'type': 'error', 'message': str(e)}
+
+async def generate_chat_responses(graph: StateGraph, message: str, topic: Literal["general", "news", "finance"], mode: Literal["informative", "timeline"] = "informative", checkpoint_id: Optional[str] = None, answer_cache: Optional[AnswerCache] = None, new_conversation: bool = False):
     """
     Generate streaming chat responses
 
@@ -16,104 +193,75 @@ async def generate_chat_responses(graph: StateGraph, message: str, topic: Litera
         graph (StateGraph): Orchestrator graph
         message (str): Message
         checkpoint_id (str | None): Checkpoint id for langgraph
+        answer_cache (AnswerCache | None): Cache of answers of new conversations
+        new_conversation (bool): The checkpoint id was just created for this message (always the case when it is None)
     """
+    stats = StreamStats()
     try:
         if checkpoint_id is None:
             # Create unique id to find memory
             checkpoint_id = str(uuid4())
-            yield f"data: {json.dumps({'type': 'checkpoint', 'checkpoint_id': checkpoint_id})}\n\n"
+            new_conversation = True
 
-        config = {"configurable": {"thread_id": checkpoint_id}}
+        # Answers depend on the previous messages, so only new conversations use the cache
+        use_cache = answer_cache is not None and new_conversation
 
-        input_data = {
-            "messages": [HumanMessage(content=message.strip())],
-            "topic": topic,
-            "mode": mode
-        }
+        if new_conversation:
+            yield encode_event({'type': 'checkpoint', 'checkpoint_id': checkpoint_id})
 
-        sent_content = set()
-        total_content = ""
+        # Root span of the request, the nodes, tools and HTTP calls of the run are its children
+        with tracer.span("chat.request", {"checkpoint_id": checkpoint_id, "topic": topic, "mode": mode}) as span:
+            config = {"configurable": {"thread_id": checkpoint_id}, "callbacks": [metrics_callback]}
 
-        async for event in graph.astream_events(input_data, config=config, version="v2"):
+            cached = answer_cache.get(message, topic, mode) if use_cache else None
+            if cached is not None:
+                logging.info("Answer cache hit")
+                span.set_attribute("answer_cache.hit", True)
+                # Same state as if the graph had run, so the conversation can continue
+                await graph.aupdate_state(config, cached.values, as_node="final_llm_node")
+                stats.record_message()
+                for frame in cached.frames:
+                    yield frame
+                return
+
+            input_data = {
+                "messages": [HumanMessage(content=message.strip())],
+                "topic": topic,
+                "mode": mode
+            }
+
+            frames = []
+            failed = False
+
+            STREAMS_IN_PROGRESS.inc()
             try:
-                event_type = event.get("event", "")
-                event_name = event.get("name", "")
-                event_data = event.get("data", {})
+                async for payload in _stream_graph_events(graph, input_data, config, stats):
+                    start = time.process_time()
+                    frame = encode_event(payload)
+                    if payload["type"] == "content":
+                        stats.cpu_time += time.process_time() - start
+                    failed = failed or payload["type"] == "error"
+                    if use_cache:
+                        frames.append(frame)
+                    stats.record_message()
+                    yield frame
+            finally:
+                STREAMS_IN_PROGRESS.dec()
 
-                logging.info(f"Event: {event_type} | Name: {event_name}")
+            end_frame = encode_event({'type': 'end'})
+            yield end_frame
+
+            if stats.ttft is not None:
+                STREAM_TTFT.observe(stats.ttft)
+            if stats.chunks:
+                logging.info(f"Answer streamed: ttft {stats.ttft:.3f}s, {stats.chunks} chunks, {stats.cpu_per_chunk * 1e6:.0f}us CPU per chunk")
 
-                if event_name == "tool_node" and event_type == "on_chain_start":
-                    yield f"data: {json.dumps({'type': 'search_start'})}\n\n"
-
-                elif event_name == "timeline_node" and event_type == "on_chain_start":
-                    yield f"data: {json.dumps({'type': 'timeline_generation_start'})}\n\n"
-
-                elif event_name == "timeline_node" and event_type == "on_chain_end":
-                    timeline_output = event_data["output"]
-                    events = timeline_output["events"]
-
-                    json_ready = [e.model_dump() for e in events]
-                    yield f"data: {json.dumps({'type': 'timeline_content', 'events': json_ready})}\n\n"
-
-                # Handle tool_node
-                elif event_name == "tool_node" and event_type in ["on_chain_stream", "on_chain_end"]:
-                    chunk = event_data.get("chunk", {})
-                    messages = chunk.get("messages", [])
-
-                    if messages:
-                        first_message = messages[0]
-
-                        # Web search tool
-                        if hasattr(first_message, 'name') and first_message.name == "tavily_search":
-                            tool_output_string = first_message.content
-                            try:
-                                # Parse the string into a dictionary.
-                                results = ast.literal_eval(tool_output_string)
-
-                                sources = [{
-                                        "title": result["title"],
-                                        "url": result["url"],
-                                        "site": extract_site_name(url=result["url"]),
-                                        "site_icon": get_duckduckgo_favicon(url=result["url"]),
-                                        } for result in results["results"] if isinstance(result, dict) and "url" in result]
-                                images = results["images"]
-                                if sources:
-                                    yield f"data: {json.dumps({'type': 'search_results', 'sources': sources, 'images': images})}\n\n"
-                            except (ValueError, SyntaxError, AttributeError) as e:
-                                logging.error(f"Error parsing tool output: {e}")
-
-                elif event_type == "on_chain_end" and event_name == "followup_node":
-                    followup_output = event_data["output"]
-                    yield f"data: {json.dumps({'type': 'followup_questions', 'questions': followup_output['followup_questions']})}\n\n"
-
-                # Handle streaming chain
-                elif event_type == "on_chain_stream":
-                    chunk = event_data.get("chunk", {})
-
-                    if isinstance(chunk, dict) and "messages" in chunk:
-                        for msg in chunk["messages"]:
-                            if hasattr(msg, "content") and msg.content:
-                                content = msg.content
-                                if content and content not in sent_content:
-                                    sent_content.add(content)
-                                    total_content += content
-
-                                    yield f"data: {json.dumps({'type': 'content', 'content': content})}\n\n"
-
-                    elif hasattr(chunk, "content") and chunk.content:
-                        content = chunk.content
-                        if content and content not in sent_content:
-                            sent_content.add(content)
-                            total_content += content
-
-                            yield f"data: {json.dumps({'type': 'content', 'content': content})}\n\n"
-
-            except Exception as e:
-                logging.error(f"Error processing event {event_type}: {e}")
-                yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-
-        yield f"data: {json.dumps({'type': 'end'})}\n\n"
+            if use_cache and not failed:
+                state = await graph.aget_state(config)
+                # New conversation, every tool message belongs to this answer
+                tools = {state_message.name for state_message in state.values.get("messages", []) if isinstance(state_message, ToolMessage)}
+                answer_cache.set(message, topic, mode, CachedAnswer(frames=tuple(frames) + (end_frame,), values=state.values), tools=tools)
 
     except Exception as e:
         logging.error(f"Error in generate_chat_responses: {e}")
-        yield f"data: {json.dumps({'type': 'error', 'message': f'Stream error: {str(e)}'})}\n\n"
\ No newline at end of file
+        yield encode_event({'type': 'error', 'message': f'Stream error: {str(e)}'})
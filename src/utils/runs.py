@@ -0,0 +1,291 @@
+import os
+import time
+import asyncio
+import logging
+from uuid import uuid4
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+from src.utils.sse import encode_event
+from src.utils.streams import StreamBuffer
+
+class RunConflictError(Exception):
+    """
+    A different message is already being answered in the conversation
+    """
+
+class QueueFullError(Exception):
+    """
+    Every run slot is taken and the queue of waiting runs is full
+    """
+    def __init__(self, retry_after: int):
+        super().__init__("Too many runs in progress")
+        self.retry_after = retry_after
+
+class RunManager:
+    """
+    Runs graph executions as background tasks, independent of the connections following them
+
+    At most `max_concurrency` runs execute at once, up to `max_queue` more wait for a slot and the
+    rest are rejected. The frames of each run go to the stream buffer of its conversation, so any
+    number of clients can follow a run and dropped clients can resume it with `Last-Event-ID`.
+
+    Batch questions take the same slots, at most `max_batches` batches run at once and their
+    questions hold at most `max_batch_concurrency` slots, so batches can not starve chat runs.
+    """
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 32, orphan_timeout: float = 120.0,
+                 max_frames: int = 2048, ttl: float = 600.0, max_streams: int = 1000,
+                 max_batches: int = 2, max_batch_concurrency: int | None = None):
+        """
+        Initializes a new instance of RunManager class
+
+        Args:
+            max_concurrency (int): Max number of runs executing at once
+            max_queue (int): Max number of runs waiting for a slot
+            orphan_timeout (float): Seconds a run without clients keeps going before being cancelled
+            max_frames (int): Max number of frames kept per conversation
+            ttl (float): Seconds the frames of a finished run are kept
+            max_streams (int): Max number of conversations with stored frames (finished runs are dropped first)
+            max_batches (int): Max number of batch requests running at once
+            max_batch_concurrency (int | None): Max number of slots taken by batch questions (half the slots when None)
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.orphan_timeout = orphan_timeout
+        self.max_frames = max_frames
+        self.ttl = ttl
+        self.max_streams = max_streams
+        self.max_batches = max_batches
+        self.max_batch_concurrency = max_batch_concurrency or max(1, max_concurrency // 2)
+        self.buffers: OrderedDict[str, StreamBuffer] = OrderedDict()
+        self.runs: dict[str, StreamBuffer] = {}
+        self.executing = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.average_duration = 0.0
+        self.batches = 0
+        self.batch_executing = 0
+        self._slots: asyncio.Semaphore | None = None
+        self._batch_slots: asyncio.Semaphore | None = None
+        self._reaper: asyncio.Task | None = None
+
+    @property
+    def queued(self) -> int:
+        return len(self.runs) - self.executing
+
+    def start(self, checkpoint_id: str, message: str, frames_factory: Callable[[], AsyncIterator[bytes]]) -> StreamBuffer:
+        """
+        Start the run answering a message, or return the running one if it answers the same message
+
+        Args:
+            checkpoint_id (str): Conversation id
+            message (str): User message
+            frames_factory (Callable): Function creating the frames source of the run
+
+        Returns:
+            StreamBuffer: Buffer fed by the run
+
+        Raises:
+            RunConflictError: Another message is being answered in the conversation
+            QueueFullError: No slot nor queue place left for the run
+        """
+        self._evict()
+        buffer = self.buffers.get(checkpoint_id)
+
+        if buffer is not None and buffer.running:
+            if buffer.message != message:
+                raise RunConflictError(f"A message is already being answered in conversation {checkpoint_id}")
+            # Same request sent again (client retry), attach instead of running it twice
+            return buffer
+
+        if len(self.runs) >= self.max_concurrency + self.max_queue:
+            self._reject()
+
+        if buffer is None:
+            buffer = StreamBuffer(checkpoint_id, max_frames=self.max_frames)
+            self.buffers[checkpoint_id] = buffer
+        self.buffers.move_to_end(checkpoint_id)
+
+        run_id = uuid4().hex
+        task = buffer.start(run_id, message, self._admit(frames_factory))
+        self.runs[run_id] = buffer
+        started_at = time.monotonic()
+        task.add_done_callback(lambda task: self._finish(run_id, task, started_at))
+
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.ensure_future(self._reap_orphans())
+        return buffer
+
+    def reserve_batch(self) -> Callable[[], None]:
+        """
+        Admit a batch request
+
+        Returns:
+            Callable: Function releasing the reservation once the batch is over (may be called more than once)
+
+        Raises:
+            QueueFullError: Too many batches are running, or the run queue is full
+        """
+        if self.batches >= self.max_batches or len(self.runs) >= self.max_concurrency + self.max_queue:
+            self._reject()
+
+        self.batches += 1
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.batches -= 1
+        return release
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold a run slot while answering a batch question
+        """
+        if self._batch_slots is None:
+            self._batch_slots = asyncio.Semaphore(self.max_batch_concurrency)
+
+        async with self._batch_slots, self._run_slots():
+            self.batch_executing += 1
+            try:
+                yield
+            finally:
+                self.batch_executing -= 1
+
+    def _run_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    def _reject(self):
+        self.rejected += 1
+        retry_after = self.average_duration * (self.queued + 1) / self.max_concurrency
+        raise QueueFullError(retry_after=max(1, round(retry_after)))
+
+    def get(self, run_id: str) -> StreamBuffer | None:
+        return self.runs.get(run_id)
+
+    def resume(self, last_event_id: str) -> tuple[StreamBuffer, int] | None:
+        """
+        Find the stream of a `Last-Event-ID`
+
+        Args:
+            last_event_id (str): Id of the last event received by the client
+
+        Returns:
+            tuple | None: Stream buffer and sequence number of the event, None if the stream is unknown
+        """
+        checkpoint_id, _, seq = last_event_id.rpartition(":")
+        buffer = self.buffers.get(checkpoint_id)
+        if buffer is None or not seq.isdigit():
+            return None
+        return buffer, int(seq)
+
+    def cancel(self, run_id: str) -> bool:
+        """
+        Cancel a run
+
+        Args:
+            run_id (str): Run id
+
+        Returns:
+            bool: Whether the run was in progress
+        """
+        buffer = self.runs.get(run_id)
+        if buffer is None or not buffer.running:
+            return False
+        buffer.task.cancel()
+        return True
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "executing": self.executing,
+            "queued": self.queued,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "batch_executing": self.batch_executing,
+            "average_duration": round(self.average_duration, 3),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue
+        }
+
+    async def close(self):
+        """
+        Cancel the runs in progress and wait for them to stop
+        """
+        tasks = [buffer.task for buffer in self.runs.values()]
+        if self._reaper is not None:
+            tasks.append(self._reaper)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _admit(self, frames_factory: Callable[[], AsyncIterator[bytes]]) -> AsyncIterator[bytes]:
+        """
+        Wait for a run slot, then stream the frames of the run
+        """
+        slots = self._run_slots()
+        if slots.locked():
+            yield encode_event({'type': 'queued', 'position': self.queued})
+
+        async with slots:
+            self.executing += 1
+            try:
+                async for frame in frames_factory():
+                    yield frame
+            finally:
+                self.executing -= 1
+
+    def _finish(self, run_id: str, task: asyncio.Task, started_at: float):
+        self.runs.pop(run_id, None)
+        if task.cancelled():
+            self.cancelled += 1
+            logging.info(f"Run {run_id} cancelled")
+            return
+
+        self.completed += 1
+        duration = time.monotonic() - started_at
+        self.average_duration = duration if self.completed == 1 else 0.9 * self.average_duration + 0.1 * duration
+
+    async def _reap_orphans(self):
+        """
+        Cancel the runs nobody followed for `orphan_timeout` seconds, until no run is left
+        """
+        while self.runs:
+            await asyncio.sleep(min(self.orphan_timeout / 4, 5.0))
+            now = time.monotonic()
+            for run_id, buffer in list(self.runs.items()):
+                if buffer.subscribers == 0 and now - buffer.last_access > self.orphan_timeout:
+                    logging.info(f"Cancelling orphaned run {run_id}")
+                    buffer.task.cancel()
+
+    def _evict(self):
+        """
+        Drop the buffers of runs finished more than `ttl` seconds ago, and the oldest finished ones above `max_streams`
+        """
+        now = time.monotonic()
+        finished = [checkpoint_id for checkpoint_id, buffer in self.buffers.items() if not buffer.running]
+
+        for checkpoint_id in finished:
+            if now - self.buffers[checkpoint_id].last_access > self.ttl:
+                del self.buffers[checkpoint_id]
+
+        for checkpoint_id in finished:
+            if len(self.buffers) <= self.max_streams:
+                break
+            self.buffers.pop(checkpoint_id, None)
+
+run_manager = RunManager(
+    max_concurrency=int(os.getenv("RUN_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.getenv("RUN_MAX_QUEUE", "32")),
+    orphan_timeout=float(os.getenv("RUN_ORPHAN_TIMEOUT", "120")),
+    max_frames=int(os.getenv("STREAM_BUFFER_SIZE", "2048")),
+    ttl=float(os.getenv("STREAM_BUFFER_TTL", "600")),
+    max_batches=int(os.getenv("RUN_MAX_BATCHES", "2")),
+    max_batch_concurrency=int(os.getenv("RUN_MAX_BATCH_CONCURRENCY", "0")) or None
+)
@@ -0,0 +1,117 @@
+import json
+import asyncio
+import contextlib
+from typing import Any, AsyncIterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_json_encoder = json.JSONEncoder(separators=(",", ":"))
+
+def dumps(payload: Any) -> bytes:
+    """
+    Serialize a payload to JSON bytes (orjson when installed)
+    """
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return _json_encoder.encode(payload).encode()
+
+_DATA_PREFIX = b"data: "
+_FRAME_END = b"\n\n"
+
+# Frames of messages without data, only encoded once
+_STATIC_FRAMES = {
+    message_type: _DATA_PREFIX + dumps({"type": message_type}) + _FRAME_END
+    for message_type in ("end", "search_start", "timeline_generation_start")
+}
+
+def encode_event(payload: dict[str, Any]) -> bytes:
+    """
+    Encode a payload as an SSE message frame
+
+    Args:
+        payload (dict): Message payload (with its `type`)
+
+    Returns:
+        bytes: `data: {...}` frame
+    """
+    if len(payload) == 1 and payload.get("type") in _STATIC_FRAMES:
+        return _STATIC_FRAMES[payload["type"]]
+    return _DATA_PREFIX + dumps(payload) + _FRAME_END
+
+def with_event_id(frame: bytes, event_id: int | str) -> bytes:
+    """
+    Add the SSE `id:` field to a frame
+    """
+    return f"id: {event_id}\n".encode() + frame
+
+HEARTBEAT_FRAME = b": heartbeat\n\n"
+
+async def coalesce_frames(frames: AsyncIterator[bytes], max_latency: float = 0.01, max_bytes: int = 64 * 1024,
+                          heartbeat_interval: float | None = 15.0) -> AsyncIterator[bytes]:
+    """
+    Group the frames produced within `max_latency` of each other into one write
+
+    Args:
+        frames (AsyncIterator[bytes]): SSE frames
+        max_latency (float): Max seconds the first frame of a write waits for others
+        max_bytes (int): Size above which a write is sent without waiting for more frames
+        heartbeat_interval (float | None): Seconds without frames after which a heartbeat comment is sent
+
+    Returns:
+        AsyncIterator[bytes]: Chunks to write to the response
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+
+    async def produce():
+        try:
+            async for frame in frames:
+                queue.put_nowait(frame)
+        finally:
+            queue.put_nowait(None)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        finished = False
+        while not finished:
+            try:
+                frame = await asyncio.wait_for(queue.get(), timeout=heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT_FRAME
+                continue
+            if frame is None:
+                break
+
+            batch = [frame]
+            size = len(frame)
+            deadline = loop.time() + max_latency
+            while size < max_bytes:
+                if not queue.empty():
+                    frame = queue.get_nowait()
+                else:
+                    # Wait for more frames until the first one of the write waited `max_latency`
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        frame = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if frame is None:
+                    finished = True
+                    break
+                batch.append(frame)
+                size += len(frame)
+
+            yield b"".join(batch)
+
+        # Surface errors of the frames source
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await producer
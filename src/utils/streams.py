@@ -0,0 +1,118 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import AsyncIterator
+from src.utils.sse import encode_event, with_event_id
+
+class StreamBuffer:
+    """
+    Ring buffer of the SSE frames sent in a conversation, fed by the run answering the latest message
+    """
+    def __init__(self, checkpoint_id: str, max_frames: int = 2048):
+        """
+        Initializes a new instance of StreamBuffer class
+
+        Args:
+            checkpoint_id (str): Conversation (thread) id
+            max_frames (int): Max number of frames kept for replays
+        """
+        self.checkpoint_id = checkpoint_id
+        self.frames: deque[tuple[int, bytes]] = deque(maxlen=max_frames)
+        self.next_seq = 1
+        self.run_start_seq = 1
+        self.run_id: str | None = None
+        self.message: str | None = None
+        self.task: asyncio.Task | None = None
+        self.subscribers = 0
+        self.last_access = time.monotonic()
+        self._new_frame = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.checkpoint_id}:{seq}"
+
+    def append(self, frame: bytes):
+        """
+        Store a frame, numbering it with the next event id
+        """
+        seq = self.next_seq
+        self.next_seq += 1
+        self.frames.append((seq, with_event_id(frame, self.event_id(seq))))
+        self._notify()
+
+    def _notify(self):
+        """
+        Wake up the subscribers waiting for a new frame or the end of the run
+        """
+        self._new_frame.set()
+        self._new_frame = asyncio.Event()
+
+    def start(self, run_id: str, message: str, frames: AsyncIterator[bytes]) -> asyncio.Task:
+        """
+        Run a frames source in the background, storing every frame
+
+        Args:
+            run_id (str): Run id
+            message (str): Message answered by the run
+            frames (AsyncIterator[bytes]): Frames source
+
+        Returns:
+            asyncio.Task: Run task
+        """
+        self.run_id = run_id
+        self.message = message
+        self.run_start_seq = self.next_seq
+        self.last_access = time.monotonic()
+
+        async def run():
+            try:
+                async for frame in frames:
+                    self.append(frame)
+            except asyncio.CancelledError:
+                self.append(encode_event({'type': 'error', 'message': 'Run cancelled'}))
+                raise
+            except Exception as e:
+                logging.error(f"Error in stream {self.checkpoint_id}: {e}")
+                self.append(encode_event({'type': 'error', 'message': f'Stream error: {str(e)}'}))
+            finally:
+                self._notify()
+
+        self.task = asyncio.ensure_future(run())
+        return self.task
+
+    async def subscribe(self, after_seq: int) -> AsyncIterator[bytes]:
+        """
+        Frames after an event, then the live frames until the run ends
+
+        Args:
+            after_seq (int): Sequence number of the last frame received by the client
+
+        Returns:
+            AsyncIterator[bytes]: Frames with their SSE ids
+        """
+        cursor = after_seq
+        self.subscribers += 1
+        try:
+            while True:
+                self.last_access = time.monotonic()
+                new_frame = self._new_frame
+
+                if self.frames and self.frames[0][0] > cursor + 1:
+                    yield encode_event({'type': 'error', 'message': 'Stream history is no longer available'})
+                    return
+
+                for seq, frame in list(self.frames):
+                    if seq > cursor:
+                        cursor = seq
+                        yield frame
+
+                if not self.running and cursor >= self.next_seq - 1:
+                    return
+                await new_frame.wait()
+        finally:
+            self.subscribers -= 1
+            self.last_access = time.monotonic()
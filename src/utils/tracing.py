@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import functools
+import contextvars
+from dataclasses import dataclass, field
+from typing import Any, Callable
+from src.utils.http_client import get_http_client
+
+@dataclass(slots=True)
+class Span:
+    """
+    Timed operation of a trace (OpenTelemetry span model)
+    """
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+class _NoopSpan:
+    """
+    Span returned while tracing is disabled
+    """
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+class _SpanContext:
+    """
+    Makes a span the parent of the spans started in the same task (and in the tasks it creates)
+    """
+    __slots__ = ("tracer", "span", "_token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+        self._token = None
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Closed from another context (e.g. a garbage collected generator)
+            pass
+        self.tracer.end(self.span)
+        return False
+
+class JSONFileExporter:
+    """
+    Appends spans to a file, one JSON object per line
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    async def export(self, spans: list[Span]):
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        await asyncio.to_thread(self._write, lines)
+
+    def _write(self, lines: str):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+class OTLPHTTPExporter:
+    """
+    Sends spans to an OpenTelemetry collector (OTLP/HTTP with JSON encoding)
+    """
+    def __init__(self, endpoint: str, service_name: str):
+        self.endpoint = endpoint
+        self.service_name = service_name
+
+    @staticmethod
+    def _value(value: Any) -> dict[str, Any]:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def _span(self, span: Span) -> dict[str, Any]:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": self._value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return otlp_span
+
+    async def export(self, spans: list[Span]):
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "src.utils.tracing"}, "spans": [self._span(span) for span in spans]}]
+        }]}
+        response = await get_http_client(self.endpoint).post(self.endpoint, json=payload)
+        response.raise_for_status()
+
+class Tracer:
+    """
+    Minimal tracer: spans are nested through a context variable and exported in batches
+    """
+    def __init__(self, exporter: JSONFileExporter | OTLPHTTPExporter | None = None, flush_interval: float = 2.0, max_batch: int = 512):
+        """
+        Initializes a new instance of Tracer class
+
+        Args:
+            exporter (JSONFileExporter | OTLPHTTPExporter | None): Destination of the spans (tracing is disabled when None)
+            flush_interval (float): Max seconds an ended span waits to be exported
+            max_batch (int): Number of ended spans exported without waiting
+        """
+        self.exporter = exporter
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: list[Span] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._exports: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(self, name: str, attributes: dict[str, Any] | None = None) -> _SpanContext | _NoopSpan:
+        """
+        Start a span, child of the current one (or the root of a new trace)
+
+        Args:
+            name (str): Operation name
+            attributes (dict | None): Span attributes
+
+        Returns:
+            Context manager ending the span on exit
+        """
+        if self.exporter is None:
+            return NOOP_SPAN
+
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_id=parent.span_id if parent else None,
+            attributes=dict(attributes or {})
+        )
+        return _SpanContext(self, span)
+
+    def record(self, name: str, duration: float, attributes: dict[str, Any] | None = None):
+        """
+        Add a span that just ended, for operations made of several steps (e.g. graph nodes).
+        It is a sibling of the current span, the current step being its last part.
+
+        Args:
+            name (str): Operation name
+            duration (float): Seconds the operation took
+            attributes (dict | None): Span attributes
+        """
+        if self.exporter is None:
+            return
+
+        current = _current_span.get()
+        self.end(Span(
+            name=name,
+            trace_id=current.trace_id if current else f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_id=current.parent_id if current else None,
+            start_ns=time.time_ns() - int(duration * 1e9),
+            attributes=dict(attributes or {})
+        ))
+
+    def end(self, span: Span):
+        span.end_ns = time.time_ns()
+        self._pending.append(span)
+
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._flush_handle is None:
+            try:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+            except RuntimeError:
+                # No event loop, exported with the next batch
+                pass
+
+    def flush(self):
+        """
+        Export the ended spans in the background
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        spans, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._export(spans))
+        self._exports.add(task)
+        task.add_done_callback(self._exports.discard)
+
+    async def _export(self, spans: list[Span]):
+        try:
+            await self.exporter.export(spans)
+        except Exception as e:
+            logging.warning(f"Could not export {len(spans)} spans: {e}")
+
+    async def close(self):
+        """
+        Export the remaining spans
+        """
+        if self.exporter is not None:
+            self.flush()
+        await asyncio.gather(*self._exports, return_exceptions=True)
+
+def traced(name: str, attributes: Callable[..., dict[str, Any]] | None = None):
+    """
+    Decorator running a coroutine function inside a span
+
+    Args:
+        name (str): Span name
+        attributes (Callable | None): Function of the call arguments returning the span attributes
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return await function(*args, **kwargs)
+            with tracer.span(name, attributes(*args, **kwargs) if attributes else None):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _exporter_from_env() -> JSONFileExporter | OTLPHTTPExporter | None:
+    exporter = os.getenv("TRACE_EXPORTER", "").lower()
+    if exporter == "file":
+        return JSONFileExporter(os.getenv("TRACE_FILE", "traces.jsonl"))
+    if exporter == "otlp":
+        return OTLPHTTPExporter(
+            os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"),
+            service_name=os.getenv("TRACE_SERVICE_NAME", "chat-api")
+        )
+    return None
+
+tracer = Tracer(exporter=_exporter_from_env())
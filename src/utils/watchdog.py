@@ -0,0 +1,167 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from src.utils.metrics import EVENT_LOOP_LAG
+
+# Frames under this directory are the application code, the innermost of them is reported as the blocking location
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@dataclass(slots=True)
+class Offender:
+    stack: list[str]
+    location: str
+    samples: int = 0
+    last_seen: float = 0.0
+
+class LoopWatchdog:
+    """
+    Measures the event loop lag and samples the stack of the code blocking the loop
+
+    A heartbeat task sleeps `interval` seconds in a loop and records how late it wakes up. A thread checks the
+    heartbeat and, while it is overdue by more than `threshold`, samples the stack of the event loop thread
+    every `interval` seconds. The most sampled stacks are the code holding the loop the longest.
+    """
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, stack_depth: int = 30,
+                 max_offenders: int = 100, history: int | None = 1200):
+        """
+        Initializes a new instance of LoopWatchdog class
+
+        Args:
+            interval (float): Seconds between heartbeats (and between stack samples of a blocked loop)
+            threshold (float): Seconds the loop has to be blocked for its stack to be sampled
+            stack_depth (int): Innermost frames kept per sample
+            max_offenders (int): Max number of distinct stacks kept (the least sampled are dropped)
+            history (int | None): Number of recent lag measurements kept for the percentiles (all when None)
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        self.max_offenders = max_offenders
+        self.lags: deque[float] = deque(maxlen=history)
+        self.stalls = 0
+        self.blocked_seconds = 0.0
+        self.offenders: dict[tuple, Offender] = {}
+        self._expected_beat = 0.0
+        self._loop_thread_id: int | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._sampler: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None and not self._heartbeat.done()
+
+    def start(self):
+        """
+        Start watching the running event loop
+        """
+        if self.running:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._expected_beat = time.monotonic() + self.interval
+        self._stop.clear()
+        self._heartbeat = asyncio.ensure_future(self._beat())
+        self._sampler = threading.Thread(target=self._sample, name="loop-watchdog", daemon=True)
+        self._sampler.start()
+        logging.info(f"Event loop watchdog started (threshold {self.threshold * 1000:.0f}ms)")
+
+    async def stop(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        if self._sampler is not None:
+            self._stop.set()
+            await asyncio.to_thread(self._sampler.join)
+            self._sampler = None
+
+    async def _beat(self):
+        while True:
+            start = time.monotonic()
+            self._expected_beat = start + self.interval
+            await asyncio.sleep(self.interval)
+
+            lag = max(0.0, time.monotonic() - start - self.interval)
+            self.lags.append(lag)
+            EVENT_LOOP_LAG.observe(lag)
+            if lag > self.threshold:
+                self.stalls += 1
+                self.blocked_seconds += lag
+                logging.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            if time.monotonic() - self._expected_beat <= self.threshold:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._record(traceback.extract_stack(frame, limit=self.stack_depth))
+            del frame
+
+    def _record(self, stack: traceback.StackSummary):
+        key = tuple((entry.filename, entry.lineno, entry.name) for entry in stack)
+        with self._lock:
+            offender = self.offenders.get(key)
+            if offender is None:
+                if len(self.offenders) >= self.max_offenders:
+                    del self.offenders[min(self.offenders, key=lambda k: self.offenders[k].samples)]
+
+                lines = [self._format(entry) for entry in stack]
+                app_entries = [entry for entry in stack if entry.filename.startswith(APP_ROOT) and entry.filename != __file__]
+                location = self._format(app_entries[-1]) if app_entries else lines[-1]
+                offender = self.offenders[key] = Offender(stack=lines, location=location)
+
+            offender.samples += 1
+            offender.last_seen = time.time()
+
+    @staticmethod
+    def _format(entry: traceback.FrameSummary) -> str:
+        filename = os.path.relpath(entry.filename, APP_ROOT) if entry.filename.startswith(APP_ROOT) else entry.filename
+        return f"{filename}:{entry.lineno} in {entry.name}"
+
+    def stats(self, top: int = 10) -> dict:
+        """
+        Lag percentiles, stalls and the stacks that blocked the loop the longest
+
+        Args:
+            top (int): Number of offenders returned
+        """
+        lags = sorted(self.lags)
+        percentile = lambda quantile: round(lags[min(len(lags) - 1, int(len(lags) * quantile))] * 1000, 2) if lags else 0.0
+
+        with self._lock:
+            offenders = sorted(self.offenders.values(), key=lambda offender: offender.samples, reverse=True)[:top]
+            return {
+                "running": self.running,
+                "threshold_ms": self.threshold * 1000,
+                "lag_ms": {
+                    "current": round(self.lags[-1] * 1000, 2) if self.lags else 0.0,
+                    "p50": percentile(0.5),
+                    "p99": percentile(0.99),
+                    "max": round(lags[-1] * 1000, 2) if lags else 0.0
+                },
+                "stalls": self.stalls,
+                "blocked_seconds": round(self.blocked_seconds, 3),
+                "offenders": [{
+                    "location": offender.location,
+                    "samples": offender.samples,
+                    # Each sample stands for `interval` seconds of blocked loop
+                    "blocked_seconds": round(offender.samples * self.interval, 3),
+                    "last_seen": offender.last_seen,
+                    "stack": offender.stack
+                } for offender in offenders]
+            }
+
+loop_watchdog = LoopWatchdog(
+    interval=float(os.getenv("LOOP_WATCHDOG_INTERVAL", "0.05")),
+    threshold=float(os.getenv("LOOP_WATCHDOG_THRESHOLD", "0.1"))
+)
@@ -0,0 +1,124 @@
+"""
+Deterministic stand-in for the Gemini chat model, with configurable latency and token rate, used by tests and offline benchmarks
+"""
+import re
+import ast
+import json
+import asyncio
+from typing import Any, AsyncIterator, Iterator
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.chat_models import agenerate_from_stream, generate_from_stream
+from langchain_core.messages import AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+WEATHER_PATTERN = re.compile(r"weather\s+(?:in|at|for)\s+(?P<city>[A-Za-z .'-]+?)\s*[?.!]*$", re.IGNORECASE)
+PRICE_PATTERN = re.compile(r"price\s+of\s+(?P<coin>[A-Za-z-]+)", re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+# The chat prompts render the conversation as the repr of the message list
+RENDERED_MESSAGE_PATTERN = re.compile(r"(?P<type>HumanMessage|AIMessage|ToolMessage)\(content=(?P<content>'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")")
+USER_QUERY_PATTERN = re.compile(r"User query:\s*(?P<query>.+)")
+
+class FakeGeminiModel(BaseChatModel):
+    """
+    Chat model answering like Gemini does for the chat graph: tool calls for new questions, an answer once
+    the tools ran, and JSON for structured outputs (streamed as text, like Gemini's json_schema method)
+    """
+    latency: float = 0.0
+    token_rate: float = 0.0
+    answer_tokens: int = 60
+    timeline_events: int = 8
+    evaluation_score: float = 0.95
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gemini"
+
+    def bind_tools(self, tools: list, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool)["function"]["name"] for tool in tools], **kwargs)
+
+    def with_structured_output(self, schema, **kwargs: Any):
+        return self.bind(response_schema=schema.__name__) | PydanticOutputParser(pydantic_object=schema)
+
+    @staticmethod
+    def _question(messages: list[BaseMessage]) -> tuple[str, bool]:
+        """
+        Latest user question, and whether nothing answered it yet (no tool ran since)
+        """
+        text = messages[-1].text if messages else ""
+        rendered = RENDERED_MESSAGE_PATTERN.findall(text)
+        if rendered:
+            questions = [content for message_type, content in rendered if message_type == "HumanMessage"]
+            return (ast.literal_eval(questions[-1]) if questions else ""), rendered[-1][0] == "HumanMessage"
+
+        match = USER_QUERY_PATTERN.search(text)
+        if match:
+            return match.group("query").strip(), True
+        question = next((message.text for message in reversed(messages) if isinstance(message, HumanMessage)), "")
+        return question, isinstance(messages[-1], HumanMessage) if messages else False
+
+    def _respond(self, messages: list[BaseMessage], tools: list[str] | None, response_schema: str | None) -> tuple[str, list[dict]]:
+        """
+        Text and tool calls of the response
+        """
+        question, new_question = self._question(messages)
+
+        if response_schema == "TimelineOutput":
+            events = [{
+                "start_date": f"{2015 + index}-0{index % 9 + 1}-1{index % 10}",
+                "title": f"Milestone {index + 1}",
+                "content": f"Milestone {index + 1} of {question[:40]} happened."
+            } for index in range(self.timeline_events)]
+            return json.dumps({"events": events}), []
+        if response_schema == "EvaluateTimelineOutput":
+            return json.dumps({"score": self.evaluation_score, "improvements": "None"}), []
+        if response_schema == "FollowupOutput":
+            return json.dumps({"questions": [f"Follow up question {index + 1} about {question[:40]}?" for index in range(5)]}), []
+
+        # New question: pick the tools, like the initial LLM call does
+        if tools and new_question:
+            weather, price = WEATHER_PATTERN.search(question), PRICE_PATTERN.search(question)
+            if weather and "get_weather" in tools:
+                return "", [{"name": "get_weather", "args": {"city": weather.group("city")}, "id": "call_0"}]
+            if price and "get_crypto_price" in tools:
+                return "", [{"name": "get_crypto_price", "args": {"coin_id": price.group("coin").lower()}, "id": "call_0"}]
+            if "tavily_search" in tools:
+                return "", [{"name": "tavily_search", "args": {"query": question}, "id": "call_0"}]
+
+        words = (f"Answer about {question[:60]}.".split() + ["Lorem", "ipsum", "dolor", "sit", "amet."] * self.answer_tokens)[:self.answer_tokens]
+        return " ".join(words), []
+
+    def _chunks(self, messages: list[BaseMessage], **kwargs: Any) -> list[AIMessageChunk]:
+        text, tool_calls = self._respond(messages, kwargs.get("tools"), kwargs.get("response_schema"))
+        chunks = [AIMessageChunk(content=token) for token in TOKEN_PATTERN.findall(text)] or [AIMessageChunk(content="")]
+        chunks[-1] = AIMessageChunk(
+            content=chunks[-1].content,
+            tool_call_chunks=[
+                {"name": tool_call["name"], "args": json.dumps(tool_call["args"]), "id": tool_call["id"], "index": index}
+                for index, tool_call in enumerate(tool_calls)
+            ],
+            usage_metadata={
+                "input_tokens": sum(len(message.text) for message in messages) // 4,
+                "output_tokens": len(chunks),
+                "total_tokens": sum(len(message.text) for message in messages) // 4 + len(chunks)
+            }
+        )
+        return chunks
+
+    def _stream(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for chunk in self._chunks(messages, **kwargs):
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(messages, **kwargs):
+            if self.token_rate:
+                await asyncio.sleep(1 / self.token_rate)
+            yield ChatGenerationChunk(message=chunk)
+
+    def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return generate_from_stream(self._stream(messages, stop, **kwargs))
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return await agenerate_from_stream(self._astream(messages, stop, **kwargs))
@@ -0,0 +1,104 @@
+"""
+In-process stand-in for the subset of the async Redis client used by RedisSaver
+"""
+import time
+
+class FakePipeline:
+    """
+    Queues commands and runs them in order on `execute` (no other command can interleave in this fake)
+    """
+    def __init__(self, client: "FakeRedis"):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.client, name), args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        results = [await command(*args, **kwargs) for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands = []
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes: dict[str, dict[str, bytes]] = {}
+        self.sorted_sets: dict[str, dict[str, float]] = {}
+        self.expires: dict[str, float] = {}
+
+    def _expire_keys(self):
+        now = time.time()
+        for key in [key for key, deadline in self.expires.items() if deadline <= now]:
+            self.hashes.pop(key, None)
+            self.sorted_sets.pop(key, None)
+            del self.expires[key]
+
+    async def hset(self, key, mapping):
+        self._expire_keys()
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    async def hmget(self, key, fields):
+        self._expire_keys()
+        values = self.hashes.get(key, {})
+        return [values.get(field) for field in fields]
+
+    async def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+            self.sorted_sets.pop(key, None)
+
+    async def expire(self, key, seconds):
+        self.expires[key] = time.time() + seconds
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def zadd(self, key, mapping):
+        self._expire_keys()
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, *members):
+        for member in members:
+            self.sorted_sets.get(key, {}).pop(member.decode() if isinstance(member, bytes) else member, None)
+
+    async def zcard(self, key):
+        return len(self.sorted_sets.get(key, {}))
+
+    def _sorted(self, key):
+        return sorted(self.sorted_sets.get(key, {}).items(), key=lambda item: item[1])
+
+    async def zrange(self, key, start, end, desc=False):
+        members = [member.encode() for member, _ in self._sorted(key)]
+        if desc:
+            members.reverse()
+        return members[start:None if end == -1 else end + 1]
+
+    async def zrangebyscore(self, key, minimum, maximum):
+        minimum = float("-inf") if minimum == "-inf" else minimum
+        return [member.encode() for member, score in self._sorted(key) if minimum <= score <= maximum]
+
+    async def zrangebylex(self, key, minimum, maximum):
+        self._expire_keys()
+
+        def inside(member: bytes, bound: bytes, lower: bool) -> bool:
+            if bound in (b"-", b"+"):
+                return bound == (b"-" if lower else b"+")
+            inclusive, value = bound[:1] == b"[", bound[1:]
+            if lower:
+                return member > value or (inclusive and member == value)
+            return member < value or (inclusive and member == value)
+
+        members = sorted(member.encode() for member in self.sorted_sets.get(key, {}))
+        return [member for member in members if inside(member, minimum, True) and inside(member, maximum, False)]
@@ -0,0 +1,32 @@
+"""
+Frame sources and collectors shared by the stream buffer, run manager and SSE tests
+"""
+import asyncio
+from src.utils.sse import encode_event
+
+def make_frames(count: int = 1, delay: float = 0.0, runs: list | None = None, events: list | None = None):
+    """
+    Factory of frame sources streaming `count` content frames `delay` seconds apart, then the end frame
+
+    Args:
+        count (int): Number of content frames
+        delay (float): Seconds before each content frame
+        runs (list | None): Gets an item each time a source starts
+        events (list | None): Gets "cancelled" when a source is cancelled
+    """
+    async def frames():
+        if runs is not None:
+            runs.append(1)
+        try:
+            for index in range(count):
+                await asyncio.sleep(delay)
+                yield encode_event({"type": "content", "content": str(index)})
+            yield encode_event({"type": "end"})
+        except asyncio.CancelledError:
+            if events is not None:
+                events.append("cancelled")
+            raise
+    return frames
+
+async def collect(frames):
+    return [frame async for frame in frames]
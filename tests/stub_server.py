@@ -0,0 +1,202 @@
+"""
+Local stand-in for the CoinGecko, wttr.in and Tavily APIs, used by tests and offline benchmarks
+"""
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COINS = {
+    "bitcoin": {"symbol": "btc", "name": "Bitcoin", "price": 65000.0},
+    "ethereum": {"symbol": "eth", "name": "Ethereum", "price": 3200.0},
+    "solana": {"symbol": "sol", "name": "Solana", "price": 150.0},
+    "cardano": {"symbol": "ada", "name": "Cardano", "price": 0.45},
+}
+
+def _simple_price(query: dict) -> dict:
+    ids = query.get("ids", [""])[0].split(",")
+    currency = query.get("vs_currencies", ["usd"])[0]
+    return {
+        coin_id: {
+            currency: COINS[coin_id]["price"],
+            f"{currency}_market_cap": COINS[coin_id]["price"] * 1_000_000,
+            f"{currency}_24h_vol": COINS[coin_id]["price"] * 10_000,
+            f"{currency}_24h_change": 1.5,
+            "last_updated_at": 1700000000
+        } for coin_id in ids if coin_id in COINS
+    }
+
+def _coin_details(coin_id: str) -> dict | None:
+    if coin_id not in COINS:
+        return None
+    coin = COINS[coin_id]
+    return {
+        "id": coin_id,
+        "name": coin["name"],
+        "symbol": coin["symbol"],
+        "market_data": {"current_price": {"usd": coin["price"]}, "market_cap_rank": 1},
+        "description": {"en": f"{coin['name']} is a cryptocurrency."},
+        "links": {"homepage": [f"https://{coin_id}.org"], "blockchain_site": [None]}
+    }
+
+def _coin_markets(query: dict) -> list:
+    per_page = int(query.get("per_page", ["10"])[0])
+    return [{
+        "id": coin_id,
+        "symbol": coin["symbol"],
+        "name": coin["name"],
+        "current_price": coin["price"],
+        "market_cap_rank": rank
+    } for rank, (coin_id, coin) in enumerate(COINS.items(), start=1)][:per_page]
+
+def _search(query: dict) -> dict:
+    term = query.get("query", [""])[0].lower()
+    return {"coins": [{
+        "id": coin_id,
+        "name": coin["name"],
+        "symbol": coin["symbol"].upper(),
+        "market_cap_rank": rank
+    } for rank, (coin_id, coin) in enumerate(COINS.items(), start=1) if term in coin_id or term == coin["symbol"]]}
+
+def _weather(city: str) -> dict:
+    return {"current_condition": [{
+        "temp_C": "21",
+        "temp_F": "70",
+        "weatherDesc": [{"value": f"Sunny in {city}"}],
+        "humidity": "40",
+        "windspeedKmph": "10",
+        "FeelsLikeC": "21",
+        "visibility": "10"
+    }]}
+
+def _tavily_search(params: dict) -> dict:
+    query = params.get("query", "")
+    results = [{
+        "title": f"{query} - report {index + 1}",
+        "url": f"https://news{index % 7}.example.com/{index}/{urllib.parse.quote(query[:40])}",
+        "content": f"On {2020 + index % 5}-{index % 12 + 1:02d}-{index % 27 + 1:02d} a development about {query} was reported by source {index + 1}. "
+                   f"Analysts described update number {index + 1} in detail.",
+        "score": round(1 - index / 100, 2)
+    } for index in range(int(params.get("max_results") or 5))]
+    return {"query": query, "results": results, "images": [], "response_time": 0.1}
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        parsed_url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(parsed_url.query)
+        path = parsed_url.path
+
+        with self.server.lock:
+            self.server.requests.append(self.path)
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        body = None
+        if path == "/api/v3/simple/price":
+            body = _simple_price(query)
+        elif path == "/api/v3/coins/list":
+            body = [{"id": coin_id, "symbol": coin["symbol"], "name": coin["name"]} for coin_id, coin in COINS.items()]
+        elif path == "/api/v3/coins/markets":
+            body = _coin_markets(query)
+        elif path.startswith("/api/v3/coins/"):
+            body = _coin_details(path.rsplit("/", 1)[-1])
+        elif path == "/api/v3/search/trending":
+            body = {"coins": [{"item": {"id": coin_id, "name": coin["name"], "symbol": coin["symbol"], "market_cap_rank": 1, "price_btc": 1}} for coin_id, coin in COINS.items()]}
+        elif path == "/api/v3/search":
+            body = _search(query)
+        elif path == "/api/v3/global":
+            body = {"data": {"total_market_cap": {"usd": 2.4e12}, "market_cap_percentage": {"btc": 52.1, "eth": 17.3}, "active_cryptocurrencies": len(COINS), "updated_at": 1700000000}}
+        elif path.startswith("/weather/"):
+            body = _weather(urllib.parse.unquote(path.rsplit("/", 1)[-1]))
+
+        self._send_json(200 if body is not None else 404, body if body is not None else {"error": "not found"})
+
+    def do_POST(self):
+        params = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+
+        with self.server.lock:
+            self.server.requests.append(self.path)
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if self.path == "/search":
+            self._send_json(200, _tavily_search(params))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _send_json(self, status: int, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer:
+    """
+    Threaded HTTP server that answers like CoinGecko (`/api/v3/...`), wttr.in (`/weather/<city>`) and Tavily (`POST /search`)
+    """
+    def __init__(self, latency: float = 0.0):
+        """
+        Args:
+            latency (float): Seconds each response is delayed
+        """
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.lock = threading.Lock()
+        self._server.latency = latency
+        self._server.connections = 0
+        self._server.requests = []
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def coingecko_url(self) -> str:
+        return f"{self.url}/api/v3"
+
+    @property
+    def weather_url(self) -> str:
+        return f"{self.url}/weather"
+
+    @property
+    def connections(self) -> int:
+        return self._server.connections
+
+    @property
+    def requests(self) -> list[str]:
+        return self._server.requests
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+if __name__ == "__main__":
+    with StubServer() as server:
+        print(f"CoinGecko stub: {server.coingecko_url}")
+        print(f"wttr.in stub:   {server.weather_url}")
+        print(f"Tavily stub:    {server.url}")
+        try:
+            server._thread.join()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,93 @@
+import time
+import asyncio
+import json
+from typing import Annotated, TypedDict
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph, START, END, add_messages
+from src.utils.answer_cache import AnswerCache, normalize_query
+from src.utils.responses import generate_chat_responses
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+    topic: str
+    mode: str
+
+def build_graph(runs: list, tool: str | None = None):
+    async def final_llm_node(state: State):
+        runs.append(state["messages"][-1].content)
+        messages = [AIMessage(content=f"answer to {state['messages'][-1].content}")]
+        if tool is not None:
+            messages.insert(0, ToolMessage(content="live data", name=tool, tool_call_id="call"))
+        return {"messages": messages}
+
+    graph = StateGraph(State)
+    graph.add_node("final_llm_node", final_llm_node)
+    graph.add_edge(START, "final_llm_node")
+    graph.add_edge("final_llm_node", END)
+    return graph.compile(checkpointer=InMemorySaver())
+
+async def collect(graph, message, answer_cache, topic="general", checkpoint_id=None):
+    frames = [frame async for frame in generate_chat_responses(graph, message, topic, checkpoint_id=checkpoint_id, answer_cache=answer_cache)]
+    return [json.loads(frame[len("data: "):]) for frame in frames]
+
+def test_normalize_query():
+    assert normalize_query("  Bitcoin   PRICE today?! ") == "bitcoin price today"
+
+def test_answers_of_new_conversations_are_replayed():
+    runs = []
+    graph = build_graph(runs)
+    answer_cache = AnswerCache(ttls={"general": 60, "news": 0})
+
+    async def main():
+        first = await collect(graph, "Bitcoin price today?", answer_cache)
+        second = await collect(graph, "bitcoin price today", answer_cache)
+
+        assert len(runs) == 1
+        assert first[0]["type"] == second[0]["type"] == "checkpoint"
+        assert first[0]["checkpoint_id"] != second[0]["checkpoint_id"]
+        assert first[1:] == second[1:]
+        assert [payload["type"] for payload in second[1:]] == ["content", "end"]
+
+        # The replayed conversation can be continued (without the cache)
+        config = {"configurable": {"thread_id": second[0]["checkpoint_id"]}}
+        assert len((await graph.aget_state(config)).values["messages"]) == 2
+        await collect(graph, "bitcoin price today", answer_cache, checkpoint_id=second[0]["checkpoint_id"])
+        assert len(runs) == 2
+        assert len((await graph.aget_state(config)).values["messages"]) == 4
+
+        # Disabled topic
+        await collect(graph, "latest news", answer_cache, topic="news")
+        await collect(graph, "latest news", answer_cache, topic="news")
+        assert len(runs) == 4
+
+    asyncio.run(main())
+
+def test_near_duplicate_matching_is_optional():
+    runs = []
+    graph = build_graph(runs)
+    exact_cache = AnswerCache(ttls={"general": 60})
+    similar_cache = AnswerCache(ttls={"general": 60}, similarity=0.7)
+
+    async def main():
+        for answer_cache in (exact_cache, similar_cache):
+            await collect(graph, "what is the latest news on the bitcoin etf", answer_cache)
+            await collect(graph, "what is the latest news on bitcoin etf", answer_cache)
+            await collect(graph, "what is the price of ethereum", answer_cache)
+
+    asyncio.run(main())
+    assert len(runs) == 3 + 2
+
+def test_answers_using_live_data_are_not_cached():
+    runs = []
+    answer_cache = AnswerCache(ttls={"general": 3600}, tool_ttls={"get_time": 0, "get_weather": 30})
+
+    async def main():
+        for tool in ("get_time", "get_time", "get_weather", "get_weather"):
+            await collect(build_graph(runs, tool=tool), f"question using {tool}", answer_cache)
+
+    asyncio.run(main())
+    # The time is never cached, the weather is (for at most 30 seconds)
+    assert len(runs) == 3
+    entry = answer_cache.cache._entries[("question using get_weather", "general", "informative")]
+    assert entry.fresh_until - time.monotonic() <= 30
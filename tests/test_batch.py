@@ -0,0 +1,97 @@
+import asyncio
+from typing import Annotated, TypedDict
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph, START, END, add_messages
+from src.utils.batch import BatchQuestion, run_batch
+from src.utils.runs import RunManager
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+def build_graph(calls: list[str], delay: float = 0.01):
+    async def final_llm_node(state: State):
+        question = state["messages"][-1].content
+        calls.append(question)
+        await asyncio.sleep(delay)
+        if question == "fail":
+            raise RuntimeError("boom")
+        return {"messages": [AIMessage(content=f"Answer to {question}")]}
+
+    graph = StateGraph(State)
+    graph.add_node("final_llm_node", final_llm_node)
+    graph.add_edge(START, "final_llm_node")
+    graph.add_edge("final_llm_node", END)
+    return graph.compile(checkpointer=InMemorySaver())
+
+def test_batch_answers_every_question_once():
+    calls = []
+    graph = build_graph(calls)
+    questions = [
+        BatchQuestion("What is BTC?", "finance"),
+        BatchQuestion("what is btc", "finance"),
+        BatchQuestion("What is ETH?", "finance"),
+        BatchQuestion("What is BTC?", "news"),
+    ]
+
+    async def main():
+        return [result async for result in run_batch(graph, questions, parallelism=2)]
+
+    results = sorted(asyncio.run(main()), key=lambda result: result["index"])
+
+    assert sorted(calls) == ["What is BTC?", "What is BTC?", "What is ETH?"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert results[0]["answer"] == results[1]["answer"] == "Answer to What is BTC?"
+    assert results[1]["message"] == "what is btc"
+    assert results[2]["answer"] == "Answer to What is ETH?"
+    assert all(result["checkpoint_id"] and "errors" not in result for result in results)
+
+def test_batch_respects_parallelism_and_reports_errors():
+    calls = []
+    graph = build_graph(calls, delay=0.05)
+    running = []
+    peak = []
+
+    async def main():
+        original = graph.astream_events
+
+        async def tracked(*args, **kwargs):
+            running.append(1)
+            peak.append(len(running))
+            try:
+                async for event in original(*args, **kwargs):
+                    yield event
+            finally:
+                running.pop()
+
+        object.__setattr__(graph, "astream_events", tracked)
+        questions = [BatchQuestion(f"q{index}", "general") for index in range(5)] + [BatchQuestion("fail", "general")]
+        return [result async for result in run_batch(graph, questions, parallelism=2)]
+
+    results = asyncio.run(main())
+
+    assert max(peak) == 2
+    assert len(results) == 6
+    assert [result for result in results if result.get("errors")][0]["message"] == "fail"
+
+def test_batch_questions_take_run_manager_slots():
+    graph = build_graph([], delay=0.02)
+    manager = RunManager(max_concurrency=4)
+    peak = []
+
+    async def main():
+        original = graph.astream_events
+
+        async def tracked(*args, **kwargs):
+            peak.append(manager.batch_executing)
+            async for event in original(*args, **kwargs):
+                yield event
+
+        object.__setattr__(graph, "astream_events", tracked)
+        questions = [BatchQuestion(f"q{index}", "general") for index in range(6)]
+        return [result async for result in run_batch(graph, questions, parallelism=4, run_manager=manager)]
+
+    results = asyncio.run(main())
+    # Half of the run slots at most, whatever the batch parallelism
+    assert len(results) == 6 and max(peak) == 2
+    assert manager.stats()["batch_executing"] == 0
@@ -0,0 +1,46 @@
+import asyncio
+from src.utils.cache import TTLCache
+
+def test_lru_eviction():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+def test_stale_value_is_served_while_refreshing():
+    cache = TTLCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        first = await cache.get_or_load("key", loader, ttl=0, stale_ttl=60)
+        stale = await cache.get_or_load("key", loader, ttl=0, stale_ttl=60)
+        await asyncio.sleep(0.05)
+        refreshed = await cache.get_or_load("key", loader, ttl=0, stale_ttl=60)
+        return first, stale, refreshed
+
+    assert asyncio.run(run()) == (1, 1, 2)
+    assert cache.stale_hits == 2
+    assert cache.misses == 1
+
+def test_failed_loads_are_not_cached():
+    cache = TTLCache()
+
+    async def loader():
+        raise RuntimeError("upstream down")
+
+    async def run():
+        results = await asyncio.gather(*[cache.get_or_load("key", loader) for _ in range(3)], return_exceptions=True)
+        return results
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+    assert len(cache) == 0
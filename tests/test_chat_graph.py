@@ -0,0 +1,50 @@
+import asyncio
+import json
+from src.agent.chat import chat as chat_module
+from src.tools import weather, crypto_markets
+from src.tools.crypto_markets import CryptoDataTool
+from src.tools.search_tools import tavily_search
+from src.utils.responses import generate_chat_responses
+from benchmarks.bench_chat import checkpoint_memory, compare, percentiles
+from tests.fake_gemini import FakeGeminiModel
+from tests.stub_server import StubServer
+
+def run_chat(monkeypatch, tmp_path, questions: list[tuple[str, str, str]]) -> tuple[list[list[dict]], list[str], dict]:
+    monkeypatch.setattr(chat_module, "get_gemini_model", lambda **kwargs: FakeGeminiModel(answer_tokens=20))
+    monkeypatch.setattr(crypto_markets.coin_index, "path", str(tmp_path / "coins.json"))
+
+    with StubServer() as server:
+        monkeypatch.setattr(CryptoDataTool, "BASE_URL", server.coingecko_url)
+        monkeypatch.setattr(weather, "WTTR_BASE_URL", server.weather_url)
+        monkeypatch.setattr(tavily_search.api_wrapper, "api_base_url", server.url)
+        graph = chat_module.Chat.from_env(model_name="fake").graph
+
+        async def main():
+            return [
+                [json.loads(frame[len("data: "):]) async for frame in generate_chat_responses(graph, message, topic, mode=mode)]
+                for message, topic, mode in questions
+            ]
+
+        return asyncio.run(main()), list(server.requests), checkpoint_memory(graph.checkpointer)
+
+def test_chat_graph_runs_offline(monkeypatch, tmp_path):
+    runs, requests, memory = run_chat(monkeypatch, tmp_path, [
+        ("What happened with the offline test launch?", "news", "informative"),
+        ("What's the weather in Lyon?", "general", "informative"),
+        ("Timeline of the offline test launch", "general", "timeline"),
+    ])
+    search, forecast, timeline = ([payload["type"] for payload in frames] for frames in runs)
+
+    assert "search_results" in search and search.count("content") == 20 and search[-1] == "end"
+    assert "content" in forecast and "search_results" not in forecast
+    assert timeline.count("timeline_event") == 8 and "timeline_content" in timeline
+    assert "error" not in search + forecast + timeline
+    assert requests.count("/search") == 2 and any(request.startswith("/weather/Lyon") for request in requests)
+    assert memory["threads"] >= 3 and memory["bytes"] > 0
+
+def test_benchmark_comparison():
+    assert percentiles([0.001 * value for value in range(1, 101)]) == {"p50": 51.0, "p95": 96.0, "p99": 100.0, "max": 100.0}
+
+    baseline = {"rejected": 0, "rps": 10.0, "ttlb_ms": {"p50": 100.0, "p99": 200.0}}
+    current = {"rejected": 1, "rps": 8.0, "ttlb_ms": {"p50": 105.0, "p99": 260.0}}
+    assert compare(baseline, current, tolerance=0.1) == ["rejected", "rps", "ttlb_ms.p99"]
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from typing import Annotated, TypedDict
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, START, END, add_messages
+from src.checkpoint.base import SEP, CompactCheckpointSaver
+from src.checkpoint.memory_saver import BoundedMemorySaver
+from src.checkpoint.redis_saver import RedisSaver
+from src.checkpoint.sqlite_saver import SQLiteSaver
+from tests.fake_redis import FakeRedis
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+async def reply(state: State):
+    return {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")]}
+
+def build_graph(checkpointer):
+    graph = StateGraph(State)
+    graph.add_node("reply", reply)
+    graph.add_edge(START, "reply")
+    graph.add_edge("reply", END)
+    return graph.compile(checkpointer=checkpointer)
+
+async def chat(graph, thread_id: str, turns: int):
+    config = {"configurable": {"thread_id": thread_id}}
+    for turn in range(turns):
+        await graph.ainvoke({"messages": [HumanMessage(content=f"message {turn}")]}, config=config)
+    return (await graph.aget_state(config)).values["messages"]
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def saver(request, tmp_path):
+    if request.param == "memory":
+        yield BoundedMemorySaver(max_checkpoints=2)
+    elif request.param == "sqlite":
+        saver = SQLiteSaver(str(tmp_path / "checkpoints.sqlite"), max_checkpoints=2, evict_interval=0)
+        yield saver
+        saver.close()
+    else:
+        yield RedisSaver(FakeRedis(), max_checkpoints=2, evict_interval=0)
+
+def test_history_survives_a_new_saver_instance(saver):
+    messages = asyncio.run(chat(build_graph(saver), "thread", turns=6))
+    assert [m.content for m in messages][-2:] == ["message 5", "echo: message 5"]
+
+    # A fresh process only sees what was persisted
+    saver._message_refs.clear()
+    messages = asyncio.run(chat(build_graph(saver), "thread", turns=1))
+    assert len(messages) == 14
+
+def test_messages_are_stored_once_and_history_is_pruned(saver):
+    asyncio.run(chat(build_graph(saver), "thread", turns=6))
+    keys = asyncio.run(saver._scan_keys("thread", ""))
+
+    assert len([key for key in keys if key.startswith(f"m{SEP}")]) == 12
+    assert len([key for key in keys if key.startswith(f"c{SEP}")]) <= 2 * saver.max_checkpoints
+
+def test_least_recently_used_threads_are_evicted(saver):
+    saver.max_threads = 2
+    graph = build_graph(saver)
+    for thread_id in ["a", "b", "c"]:
+        asyncio.run(chat(graph, thread_id, turns=1))
+
+    assert asyncio.run(saver._scan_keys("a", "")) == []
+    assert sorted(asyncio.run(saver._list_threads())) == ["b", "c"]
+
+def test_lookups_of_unknown_threads_are_not_tracked(saver):
+    assert asyncio.run(saver.aget_tuple({"configurable": {"thread_id": "unknown"}})) is None
+    assert asyncio.run(saver._list_threads()) == []
+
+def test_bounded_memory_saver_evicts_threads():
+    saver = BoundedMemorySaver(max_threads=1)
+    graph = build_graph(saver)
+    asyncio.run(chat(graph, "a", turns=1))
+    asyncio.run(chat(graph, "b", turns=1))
+
+    assert "a" not in saver.storage
+    assert "b" in saver.storage
+
+def test_record_store_hooks_are_abstract():
+    with pytest.raises(TypeError, match="_scan_keys"):
+        CompactCheckpointSaver()
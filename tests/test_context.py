@@ -0,0 +1,38 @@
+import asyncio
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, RemoveMessage
+from src.agent.chat.utils.context import ContextManager
+
+def conversation(turns: int) -> list:
+    messages = []
+    for turn in range(turns):
+        messages += [
+            HumanMessage(id=f"h{turn}", content=f"question {turn}"),
+            AIMessage(id=f"a{turn}", content="", tool_calls=[{"name": "tavily_search", "args": {}, "id": f"call{turn}"}]),
+            ToolMessage(id=f"t{turn}", name="tavily_search", tool_call_id=f"call{turn}", content="result " * 1000, artifact={"turn": turn}),
+            AIMessage(id=f"f{turn}", content=f"answer {turn}"),
+        ]
+    return messages
+
+def test_tool_outputs_older_than_the_kept_turns_are_digested():
+    manager = ContextManager(llm=FakeListChatModel(responses=["summary"]), keep_turns=2, token_budget=100000)
+    updates = asyncio.run(manager.compact(conversation(3), summary=""))
+
+    assert [message.id for message in updates["messages"]] == ["t0"]
+    assert len(updates["messages"][0].content) <= manager.digest_chars + 3
+    assert updates["messages"][0].artifact == {"turn": 0}
+    assert "summary" not in updates
+
+def test_kept_turns_are_not_digested():
+    manager = ContextManager(llm=FakeListChatModel(responses=["summary"]), keep_turns=3, token_budget=100000)
+    assert asyncio.run(manager.compact(conversation(3), summary="")) == {}
+
+def test_old_turns_are_summarized_when_over_budget():
+    manager = ContextManager(llm=FakeListChatModel(responses=["user asked questions 0 and 1"]), keep_turns=2, token_budget=500)
+    updates = asyncio.run(manager.compact(conversation(4), summary="earlier summary"))
+
+    removed = {message.id for message in updates["messages"] if isinstance(message, RemoveMessage)}
+    assert removed == {"h0", "a0", "t0", "f0", "h1", "a1", "t1", "f1"}
+    # t2 belongs to a kept turn, so it stays verbatim
+    assert [message.id for message in updates["messages"] if not isinstance(message, RemoveMessage)] == []
+    assert updates["summary"] == "user asked questions 0 and 1"
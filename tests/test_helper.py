@@ -1,9 +1,10 @@
 from fastapi.testclient import TestClient
-from src.routes.helper import helper_router
+from src.routes.helper import helper_router, register_stats_collector
 from fastapi import FastAPI
 
 app = FastAPI()
 app.include_router(helper_router)
+register_stats_collector()
 
 def test_health_endpoint():
     client = TestClient(app)
@@ -13,4 +14,17 @@ def test_health_endpoint():
 def test_tools_endpoint():
     client = TestClient(app)
     response = client.get("/debug/tools")
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+def test_metrics_endpoint():
+    client = TestClient(app)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "chat_cache_requests_total" in response.text
+    assert "chat_runs_executing" in response.text
+
+def test_loop_endpoint():
+    client = TestClient(app)
+    response = client.get("/debug/loop")
+    assert response.status_code == 200
+    assert {"lag_ms", "stalls", "offenders"} <= response.json().keys()
@@ -0,0 +1,144 @@
+import json
+import time
+import asyncio
+import httpx
+import pytest
+from src.tools import weather, crypto_markets
+from src.tools.coin_index import CoinIndex
+from src.tools.crypto_markets import CryptoDataTool, get_crypto_price, get_crypto_details, get_top_cryptos, search_crypto_coins
+from src.utils.http_client import close_http_clients, get_http_client
+from tests.stub_server import StubServer, COINS
+
+@pytest.fixture
+def stub_server(monkeypatch, tmp_path):
+    snapshot = tmp_path / "coins.json"
+    snapshot.write_text(json.dumps({
+        "updated_at": time.time(),
+        "coins": [[coin_id, coin["symbol"], coin["name"], rank] for rank, (coin_id, coin) in enumerate(COINS.items(), start=1)]
+    }))
+
+    with StubServer() as server:
+        monkeypatch.setattr(CryptoDataTool, "BASE_URL", server.coingecko_url)
+        monkeypatch.setattr(weather, "WTTR_BASE_URL", server.weather_url)
+        monkeypatch.setattr(crypto_markets, "coin_index", CoinIndex(path=str(snapshot), loader=crypto_markets._load_coin_list))
+        CryptoDataTool.cache.clear()
+        yield server
+
+def test_tools_share_pooled_connection(stub_server):
+    async def run():
+        price = await get_crypto_price.ainvoke({"coin_id": "bitcoin"})
+        top = await get_top_cryptos.ainvoke({"limit": 2})
+        forecast = await weather.get_weather.ainvoke({"city": "Paris"})
+        await close_http_clients()
+        return price, top, forecast
+
+    price, top, forecast = asyncio.run(run())
+
+    assert price["price"] == 65000.0
+    assert len(top["top_cryptocurrencies"]) == 2
+    assert forecast["condition"] == "Sunny in Paris"
+    # Both upstreams live on the stub host, so the keep-alive connection is reused
+    assert stub_server.connections == 1
+
+def test_connection_errors_are_httpx_errors():
+    async def run():
+        try:
+            with pytest.raises(httpx.ConnectError):
+                await get_http_client("http://127.0.0.1:9").get("http://127.0.0.1:9/")
+        finally:
+            await close_http_clients()
+
+    asyncio.run(run())
+
+def test_upstream_errors_are_reported(stub_server):
+    async def run():
+        result = await get_crypto_price.ainvoke({"coin_id": "unknown-coin"})
+        await close_http_clients()
+        return result
+
+    assert "error" in asyncio.run(run())
+
+def test_concurrent_requests_share_one_upstream_call(stub_server):
+    async def run():
+        results = await asyncio.gather(*[get_top_cryptos.ainvoke({"limit": 3}) for _ in range(10)])
+        cached = await get_top_cryptos.ainvoke({"limit": 3})
+        await close_http_clients()
+        return results + [cached]
+
+    results = asyncio.run(run())
+
+    assert all(result == results[0] for result in results[1:])
+    assert stub_server.requests.count("/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc&per_page=3&page=1&sparkline=false&price_change_percentage=24h%2C7d") == 1
+
+def test_price_lookups_are_batched(stub_server):
+    async def run():
+        coins = ["bitcoin", "ethereum", "solana", "cardano"]
+        results = await asyncio.gather(*[get_crypto_price.ainvoke({"coin_id": coin}) for coin in coins])
+        await close_http_clients()
+        return results
+
+    results = asyncio.run(run())
+
+    assert [result["coin"] for result in results] == ["bitcoin", "ethereum", "solana", "cardano"]
+    assert len([request for request in stub_server.requests if request.startswith("/api/v3/simple/price")]) == 1
+
+def test_coin_names_are_resolved_locally(stub_server):
+    async def run():
+        price = await get_crypto_price.ainvoke({"coin_id": "SOL"})
+        details = await get_crypto_details.ainvoke({"coin_id": "Ethereum"})
+        search = await search_crypto_coins.ainvoke({"query": "car"})
+        await close_http_clients()
+        return price, details, search
+
+    price, details, search = asyncio.run(run())
+
+    assert price["coin"] == "solana"
+    assert details["id"] == "ethereum"
+    assert [coin["id"] for coin in search["results"]] == ["cardano"]
+    assert not [request for request in stub_server.requests if request.startswith("/api/v3/search")]
+
+def test_misspelled_coins_are_suggested_not_substituted(stub_server):
+    async def run():
+        price = await get_crypto_price.ainvoke({"coin_id": "etherium"})
+        details = await get_crypto_details.ainvoke({"coin_id": "solanna"})
+        await close_http_clients()
+        return price, details
+
+    price, details = asyncio.run(run())
+
+    assert price["error"].startswith("Coin 'etherium' not found") and price["suggestions"] == ["ethereum"]
+    assert details["error"].startswith("Coin 'solanna' not found") and details["suggestions"] == ["solana"]
+
+def test_coin_index_refreshes_snapshot(stub_server, tmp_path):
+    index = CoinIndex(path=str(tmp_path / "refreshed" / "coins.json"), loader=crypto_markets._load_coin_list)
+
+    async def run():
+        await index.ensure_ready()
+        # A cold start does not wait for the download, the refresh lands in the background
+        cold = len(index)
+        await index.refresh()
+        await close_http_clients()
+        return cold
+
+    assert asyncio.run(run()) == 0
+    assert index.resolve("btc") == "bitcoin"
+    assert index.resolve("etherium") is None
+    assert index.suggest("etherium") == ["ethereum"]
+    assert index.search("so")[0]["id"] == "solana"
+    assert (tmp_path / "refreshed" / "coins.json").exists()
+
+def test_search_falls_back_to_coingecko_on_cold_start(stub_server, monkeypatch, tmp_path):
+    index = CoinIndex(path=str(tmp_path / "missing" / "coins.json"), loader=crypto_markets._load_coin_list)
+    monkeypatch.setattr(crypto_markets, "coin_index", index)
+
+    async def run():
+        search = await search_crypto_coins.ainvoke({"query": "car"})
+        await index.refresh()
+        await close_http_clients()
+        return search
+
+    search = asyncio.run(run())
+
+    assert [coin["id"] for coin in search["results"]] == ["cardano"]
+    assert [request for request in stub_server.requests if request.startswith("/api/v3/search")]
+    assert index.resolve("cardano") == "cardano"
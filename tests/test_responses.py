@@ -0,0 +1,82 @@
+import asyncio
+import json
+from typing import Annotated, TypedDict
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph, START, END, add_messages
+from prometheus_client import REGISTRY
+from src.utils.responses import generate_chat_responses, AnswerBuffer
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+def build_graph(answer: str, followup: str):
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content=answer)]))
+    followup_llm = GenericFakeChatModel(messages=iter([AIMessage(content=followup)]))
+
+    async def final_llm_node(state: State):
+        return {"messages": [await llm.ainvoke(state["messages"])]}
+
+    async def followup_node(state: State):
+        # Other LLM calls are not part of the answer
+        await followup_llm.ainvoke(state["messages"])
+        return {}
+
+    graph = StateGraph(State)
+    graph.add_node("final_llm_node", final_llm_node)
+    graph.add_node("followup_node", followup_node)
+    graph.add_edge(START, "final_llm_node")
+    graph.add_edge(START, "followup_node")
+    graph.add_edge("final_llm_node", END)
+    graph.add_edge("followup_node", END)
+    return graph.compile(checkpointer=InMemorySaver())
+
+def test_answer_is_streamed_as_token_deltas():
+    answer = "Bitcoin\n\nis  up\n\ntoday"
+    graph = build_graph(answer, followup="Why is it up?")
+
+    async def main():
+        return [json.loads(frame[len("data: "):]) async for frame in generate_chat_responses(graph, "btc?", "general")]
+
+    content = [payload for payload in asyncio.run(main()) if payload["type"] == "content"]
+
+    assert len(content) > 3
+    assert "".join(payload["content"] for payload in content) == answer
+    assert [payload["content"] for payload in content].count("\n") == 4
+    assert [payload["offset"] for payload in content] == [sum(len(p["content"]) for p in content[:index]) for index in range(len(content))]
+    assert len({payload["id"] for payload in content}) == 1
+
+def test_answer_buffer_tracks_offsets_per_message():
+    buffer = AnswerBuffer()
+    assert buffer.append("a", "Hello") == 0
+    assert buffer.append("a", " world") == 5
+    assert buffer.append("b", "Bye") == 0
+    assert buffer.remainder("a", "Hello world!") == "!"
+    assert buffer.remainder("c", "New") == "New"
+    assert buffer.text() == "Hello worldBye"
+
+def test_nodes_and_llm_calls_are_measured():
+    graph = build_graph("Bitcoin is up", followup="Why?")
+
+    def sample(name: str, **labels) -> float:
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    before = (
+        sample("chat_node_duration_seconds_count", node="final_llm_node", status="ok"),
+        sample("chat_llm_duration_seconds_count", node="followup_node", status="ok"),
+        sample("chat_stream_ttft_seconds_count"),
+    )
+
+    async def main():
+        return [frame async for frame in generate_chat_responses(graph, "btc?", "general")]
+
+    asyncio.run(main())
+
+    after = (
+        sample("chat_node_duration_seconds_count", node="final_llm_node", status="ok"),
+        sample("chat_llm_duration_seconds_count", node="followup_node", status="ok"),
+        sample("chat_stream_ttft_seconds_count"),
+    )
+    assert [count - previous for count, previous in zip(after, before)] == [1, 1, 1]
+    assert sample("chat_streams_in_progress") == 0
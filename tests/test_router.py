@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from src.tools.coin_index import CoinIndex
+from src.agent.chat.utils.router import IntentRouter
+
+COINS = [
+    ["bitcoin", "btc", "Bitcoin", 1],
+    ["ethereum", "eth", "Ethereum", 2],
+    ["solana", "sol", "Solana", 5],
+    ["gold-token", "gold", "Gold", None],
+]
+
+@pytest.fixture
+def router(tmp_path):
+    async def loader():
+        return COINS
+    coins = CoinIndex(path=str(tmp_path / "coins.json"), loader=loader)
+    asyncio.run(coins.refresh())
+    return IntentRouter(coins)
+
+def route(router: IntentRouter, message: str, mode: str = "informative"):
+    return asyncio.run(router.route(message, mode))
+
+@pytest.mark.parametrize("message, tool, args", [
+    ("What time is it?", "get_time", {}),
+    ("whats the time now", "get_time", {}),
+    ("What's the date today?", "get_date", {}),
+    ("what day is it", "get_date", {}),
+    ("Weather in Paris", "get_weather", {"city": "Paris"}),
+    ("how's the weather in New York today?", "get_weather", {"city": "New York"}),
+    ("price of ETH", "get_crypto_price", {"coin_id": "ethereum", "vs_currency": "usd"}),
+    ("What is the current Bitcoin price in EUR?", "get_crypto_price", {"coin_id": "bitcoin", "vs_currency": "eur"}),
+    ("how much is 1 sol worth", "get_crypto_price", {"coin_id": "solana", "vs_currency": "usd"}),
+])
+def test_obvious_requests_are_routed(router, message, tool, args):
+    decision = route(router, message)
+    assert decision.routed
+    assert [(call["name"], call["args"]) for call in decision.tool_calls] == [(tool, args)]
+    assert decision.tool_calls[0]["id"]
+
+@pytest.mark.parametrize("message, reason", [
+    ("What is the price of gold?", "unknown coin"),
+    ("price of dogecoin", "unknown coin"),
+    ("Weather in Paris tomorrow", "not about current data"),
+    ("Why did the bitcoin price drop last week?", "not about current data"),
+    ("price of btc in xyz", "unknown currency"),
+    ("Tell me about Ethereum", "no rule"),
+    ("What time is it " + "x" * 80, "long message"),
+])
+def test_unclear_requests_go_to_the_llm(router, message, reason):
+    decision = route(router, message)
+    assert not decision.routed
+    assert decision.to_dict() == {"intent": "llm", "routed": False, "tools": [], "reason": reason}
+
+def test_timeline_mode_is_not_routed(router):
+    assert not route(router, "price of btc", mode="timeline").routed
+
+def test_router_counts_decisions(router):
+    for message in ("What time is it?", "price of btc", "Tell me a story"):
+        route(router, message)
+    assert router.stats() == {"routed": 2, "llm": 1, "intents": {"get_time": 1, "get_crypto_price": 1, "llm": 1}}
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import pytest
+from src.utils.runs import RunManager, QueueFullError
+from tests.frames import make_frames, collect
+
+def payloads(frames: list[bytes]) -> list[dict]:
+    return [json.loads(frame.split(b"data: ", 1)[1]) for frame in frames]
+
+def test_runs_beyond_the_limit_wait_in_the_queue():
+    async def scenario():
+        manager = RunManager(max_concurrency=1, max_queue=1)
+        first = manager.start("first", "hi", make_frames(3, delay=0.02))
+        second = manager.start("second", "hi", make_frames(1))
+        await asyncio.sleep(0)
+        stats = manager.stats()
+
+        with pytest.raises(QueueFullError) as error:
+            manager.start("third", "hi", make_frames(1))
+        assert error.value.retry_after >= 1
+
+        first_frames, second_frames = await asyncio.gather(collect(first.subscribe(0)), collect(second.subscribe(0)))
+        return stats, manager.stats(), first_frames, second_frames
+
+    stats, final_stats, first_frames, second_frames = asyncio.run(scenario())
+    assert (stats["executing"], stats["queued"]) == (1, 1)
+    assert payloads(second_frames)[0] == {"type": "queued", "position": 1}
+    assert payloads(first_frames)[-1] == payloads(second_frames)[-1] == {"type": "end"}
+    assert final_stats["completed"] == 2 and final_stats["rejected"] == 1 and final_stats["executing"] == 0
+
+def test_runs_fan_out_to_every_subscriber():
+    async def scenario():
+        manager = RunManager()
+        buffer = manager.start("thread", "hi", make_frames(3, delay=0.01))
+        return await asyncio.gather(*(collect(buffer.subscribe(0)) for _ in range(3)))
+
+    first, second, third = asyncio.run(scenario())
+    assert first == second == third and len(first) == 4
+
+def test_cancelled_runs_are_cleaned_up():
+    async def scenario():
+        events = []
+        manager = RunManager()
+        buffer = manager.start("thread", "hi", make_frames(10, delay=0.05, events=events))
+        frames = asyncio.ensure_future(collect(buffer.subscribe(0)))
+        await asyncio.sleep(0.01)
+
+        assert manager.cancel(buffer.run_id)
+        frames = await frames
+        assert not manager.cancel(buffer.run_id)
+        return events, manager, frames
+
+    events, manager, frames = asyncio.run(scenario())
+    assert events == ["cancelled"]
+    assert payloads(frames)[-1] == {"type": "error", "message": "Run cancelled"}
+    assert manager.runs == {} and manager.stats()["cancelled"] == 1
+
+def test_orphaned_runs_are_cancelled():
+    async def scenario():
+        events = []
+        manager = RunManager(orphan_timeout=0.05)
+        manager.start("orphan", "hi", make_frames(100, delay=0.01, events=events))
+        followed = manager.start("followed", "hi", make_frames(12, delay=0.01))
+        frames = await collect(followed.subscribe(0))
+        await asyncio.sleep(0.1)
+        return events, manager, frames
+
+    events, manager, frames = asyncio.run(scenario())
+    assert events == ["cancelled"]
+    assert payloads(frames)[-1] == {"type": "end"}
+    assert manager.stats()["cancelled"] == 1 and manager.stats()["completed"] == 1
+
+def test_close_cancels_runs_in_progress():
+    async def scenario():
+        events = []
+        manager = RunManager()
+        manager.start("thread", "hi", make_frames(10, delay=0.05, events=events))
+        await asyncio.sleep(0.01)
+        await manager.close()
+        return events, manager
+
+    events, manager = asyncio.run(scenario())
+    assert events == ["cancelled"] and manager.runs == {}
+
+def test_batches_share_the_run_slots():
+    async def scenario():
+        manager = RunManager(max_concurrency=2, max_queue=0, max_batches=1)
+        release = manager.reserve_batch()
+        with pytest.raises(QueueFullError):
+            manager.reserve_batch()
+
+        peak = 0
+        async def question():
+            nonlocal peak
+            async with manager.slot():
+                peak = max(peak, manager.batch_executing)
+                await asyncio.sleep(0.02)
+
+        # Batch questions take at most half the slots, a chat run still starts right away
+        questions = asyncio.gather(*[question() for _ in range(4)])
+        await asyncio.sleep(0)
+        run = manager.start("chat", "hi", make_frames(1))
+        frames = await collect(run.subscribe(0))
+        await questions
+
+        release()
+        release()
+        manager.reserve_batch()
+        return peak, payloads(frames), manager.stats()
+
+    peak, frames, stats = asyncio.run(scenario())
+    assert peak == 1
+    assert [frame["type"] for frame in frames] == ["content", "end"]
+    assert stats["batches"] == 1 and stats["batch_executing"] == 0 and stats["rejected"] == 1
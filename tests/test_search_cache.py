@@ -0,0 +1,112 @@
+import asyncio
+from langchain_core.messages import ToolMessage
+from src.tools.search_cache import SearchCache
+from src.tools.search_results import format_search_results, dedupe_search_messages
+from src.tools.search_tools import CachedTavilySearch
+
+def make_tool(cache: SearchCache, calls: list, found: int = 100, duplicates: int = 0) -> CachedTavilySearch:
+    tool = CachedTavilySearch(max_results=15, include_images=True, tavily_api_key="x", cache=cache)
+
+    async def raw_results_async(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.05)
+        if kwargs["query"] == "fail":
+            raise RuntimeError("quota exceeded")
+        results = [{"title": f"r{i}", "url": f"https://site.com/{i}", "content": f"c{i}"} for i in range(min(kwargs["max_results"], found))]
+        # Last results listing pages already found under another URL
+        for index in range(duplicates):
+            results[-1 - index] = {"title": "dup", "url": f"https://site.com/{index}?", "content": "dup"}
+        # Same page as the first result
+        results.append({"title": "dup", "url": "https://www.site.com/0/", "content": "dup"})
+        return {"query": kwargs["query"], "results": results, "images": []}
+
+    object.__setattr__(tool.api_wrapper, "raw_results_async", raw_results_async)
+    return tool
+
+def test_bigger_response_serves_smaller_requests():
+    calls = []
+    tool = make_tool(SearchCache(), calls)
+
+    async def main():
+        big = await tool.ainvoke({"query": "bitcoin etf", "topic": "news", "max_results": 25})
+        small = await tool.ainvoke({"query": "Bitcoin  ETF", "topic": "news", "max_results": 5})
+        other_topic = await tool.ainvoke({"query": "bitcoin etf", "topic": "general", "max_results": 5})
+        return big, small, other_topic
+
+    big, small, other_topic = asyncio.run(main())
+    assert [call["max_results"] for call in calls] == [20, 5]
+    assert len(big["results"]) == 20
+    assert [result["url"] for result in small["results"]] == [result["url"] for result in big["results"][:5]]
+    assert len(other_topic["results"]) == 5
+
+def test_complete_responses_serve_bigger_requests_and_concurrent_searches_share_a_request():
+    calls = []
+    tool = make_tool(SearchCache(), calls, found=3)
+
+    async def main():
+        first = await asyncio.gather(*[tool.ainvoke({"query": "rare", "max_results": 10}) for _ in range(5)])
+        second = await tool.ainvoke({"query": "rare", "max_results": 20})
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(len(response["results"]) == 3 for response in first + [second])
+
+def test_responses_shrunk_by_duplicates_do_not_serve_bigger_requests():
+    calls = []
+    tool = make_tool(SearchCache(), calls, duplicates=4)
+
+    async def main():
+        first = await tool.ainvoke({"query": "bitcoin etf", "max_results": 10})
+        second = await tool.ainvoke({"query": "bitcoin etf", "max_results": 15})
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert [call["max_results"] for call in calls] == [10, 15]
+    assert len(first["results"]) == 6 and len(second["results"]) == 11
+
+def test_errors_are_not_cached():
+    calls = []
+    tool = make_tool(SearchCache(), calls)
+
+    async def main():
+        for _ in range(2):
+            assert "error" in await tool.ainvoke({"query": "fail"})
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+def test_disk_store_survives_restarts(tmp_path):
+    path = str(tmp_path / "search.sqlite")
+    calls = []
+
+    async def main():
+        await make_tool(SearchCache(path=path), calls).ainvoke({"query": "eth merge", "max_results": 10})
+        return await make_tool(SearchCache(path=path), calls).ainvoke({"query": "eth merge", "max_results": 10})
+
+    response = asyncio.run(main())
+    assert len(calls) == 1
+    assert len(response["results"]) == 10
+
+def test_pages_found_by_several_searches_are_kept_once():
+    def search_message(tool_call_id, urls):
+        content, artifact = format_search_results({
+            "query": tool_call_id,
+            "results": [{"title": url, "url": url, "content": url} for url in urls]
+        })
+        return ToolMessage(name="tavily_search", content=content, artifact=artifact, tool_call_id=tool_call_id)
+
+    messages = dedupe_search_messages([
+        search_message("1", ["https://a.com/x", "https://b.com/y"]),
+        ToolMessage(name="get_weather", content="sunny", tool_call_id="2"),
+        search_message("3", ["http://www.a.com/x/", "https://c.com/z"]),
+    ])
+
+    assert [result.url for result in messages[2].artifact.results] == ["https://c.com/z"]
+    assert "a.com" not in messages[2].content
+    assert messages[1].content == "sunny"
+
+def test_empty_results_are_reported():
+    tool = make_tool(SearchCache(), [])
+    object.__setattr__(tool.api_wrapper, "raw_results_async", lambda **kwargs: asyncio.sleep(0, {"query": "nothing", "results": []}))
+    assert "No search results" in asyncio.run(tool.ainvoke({"query": "nothing"}))
@@ -0,0 +1,48 @@
+import asyncio
+from langchain_core.tools import tool
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from src.agent.chat.utils.tool_executor import ToolExecutor
+from src.tools.search_results import SearchResults, format_search_results, normalize_url
+
+RESPONSE = {
+    "query": "bitcoin etf",
+    "results": [
+        {"title": "ETF approved", "url": "https://www.example.com/etf/?utm_source=x", "content": "The SEC approved the ETF " * 100, "score": 0.9},
+        {"title": "ETF approved (mirror)", "url": "http://example.com/etf", "content": "Same page", "score": 0.8},
+        {"title": "Other", "url": "https://news.site/b", "content": "Another story", "score": 0.5},
+        {"title": "Broken"},
+    ],
+    "images": ["https://img.site/1.png", {"url": "https://img.site/2.png"}]
+}
+
+@tool
+async def fake_search(query: str) -> dict:
+    """Return a canned search response"""
+    return RESPONSE
+
+def test_normalize_url_ignores_scheme_www_and_tracking():
+    assert normalize_url("https://www.Example.com/a/?utm_medium=y&id=1#top") == normalize_url("http://example.com/a?id=1")
+
+def test_results_are_deduplicated_and_rendered_trimmed():
+    search_results = SearchResults.from_tavily(RESPONSE)
+
+    assert [result.title for result in search_results.results] == ["ETF approved", "Other"]
+    assert search_results.images == ("https://img.site/1.png", "https://img.site/2.png")
+
+    rendered = search_results.render(max_chars=100)
+    assert rendered.startswith("[1] ETF approved (https://www.example.com/etf/?utm_source=x)")
+    assert "[2] Other" in rendered
+    assert len(rendered) < 300
+
+def test_artifact_survives_checkpoint_serialization():
+    executor = ToolExecutor(tools={"fake_search": fake_search}, formatters={"fake_search": format_search_results})
+    message = asyncio.run(executor.run([{"name": "fake_search", "id": "1", "args": {"query": "q"}}]))[0]
+
+    assert message.content == message.artifact.render()
+
+    serializer = JsonPlusSerializer()
+    restored = serializer.loads_typed(serializer.dumps_typed(message))
+    assert SearchResults.coerce(restored.artifact) == message.artifact
+
+def test_non_dict_results_are_kept_as_text():
+    assert format_search_results("No results") == ("No results", None)
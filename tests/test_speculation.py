@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from langchain_core.messages import HumanMessage
+from src.agent.chat import chat as chat_module
+from src.tools.search_cache import SearchCache
+from src.agent.chat.utils.speculation import SpeculativeSearch, query_similarity
+from tests.fake_gemini import FakeGeminiModel
+from tests.test_search_cache import make_tool
+
+class FailingModel(FakeGeminiModel):
+    async def _astream(self, *args, **kwargs):
+        raise RuntimeError("LLM unavailable")
+        yield
+
+    async def _agenerate(self, *args, **kwargs):
+        raise RuntimeError("LLM unavailable")
+
+def search_call(query: str, **args) -> dict:
+    return {"name": "tavily_search", "id": "call", "args": {"query": query, "topic": "news", "max_results": 20, **args}}
+
+def test_query_similarity_ignores_stopwords_and_plurals():
+    assert query_similarity("What's the latest on bitcoin ETFs?", "bitcoin ETF news") == 1.0
+    assert query_similarity("bitcoin ETF", "ethereum staking") == 0.0
+
+def test_matching_search_uses_the_speculative_request():
+    calls = []
+    speculation = SpeculativeSearch(make_tool(SearchCache(), calls))
+
+    async def main():
+        speculation.start("thread", "What's the latest on bitcoin ETFs?", "news", 20)
+        await asyncio.sleep(0.01)
+        # The LLM is still deciding when the tool calls arrive, both share one request
+        tool_calls = speculation.claim("thread", [search_call("bitcoin ETF news"), {"name": "get_date", "id": "date", "args": {}}])
+        response = await speculation.search.ainvoke(tool_calls[0]["args"])
+        return tool_calls, response
+
+    tool_calls, response = asyncio.run(main())
+    assert len(calls) == 1
+    assert tool_calls[0]["args"]["query"] == "What's the latest on bitcoin ETFs?"
+    assert tool_calls[1] == {"name": "get_date", "id": "date", "args": {}}
+    assert len(response["results"]) == 20
+    stats = speculation.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 0 and stats["hit_rate"] == 1.0
+    assert 0 < stats["saved_seconds"] < 0.05
+
+def test_different_searches_discard_the_speculative_result():
+    speculation = SpeculativeSearch(make_tool(SearchCache(), []))
+
+    async def main():
+        speculation.start("thread", "bitcoin ETF", "news", 20)
+        unrelated = speculation.claim("thread", [search_call("ethereum staking")])
+
+        speculation.start("thread", "bitcoin ETF", "news", 20)
+        narrowed = speculation.claim("thread", [search_call("bitcoin ETF", time_range="day")])
+
+        speculation.start("thread", "bitcoin ETF", "news", 20)
+        speculation.discard("thread")
+        await asyncio.sleep(0.1)
+        return unrelated, narrowed
+
+    unrelated, narrowed = asyncio.run(main())
+    assert unrelated[0]["args"]["query"] == "ethereum staking"
+    assert narrowed[0]["args"]["query"] == "bitcoin ETF" and narrowed[0]["args"]["time_range"] == "day"
+    assert speculation.stats() == {
+        "started": 3, "hits": 0, "misses": 3, "hit_rate": 0.0,
+        "saved_seconds": 0.0, "average_saved_seconds": 0.0, "wasted_searches": 3
+    }
+
+def test_claim_without_speculation_keeps_the_calls():
+    speculation = SpeculativeSearch(make_tool(SearchCache(), []))
+    tool_calls = [search_call("bitcoin")]
+    assert speculation.claim("thread", tool_calls) is tool_calls
+
+def test_failed_llm_call_discards_the_speculative_search(monkeypatch):
+    monkeypatch.setattr(chat_module, "get_gemini_model", lambda **kwargs: FailingModel())
+    speculation = SpeculativeSearch(make_tool(SearchCache(), []))
+    chat = chat_module.Chat(model_name="fake", router=None, speculation=speculation)
+    state = {"messages": [HumanMessage(content="bitcoin ETF news")], "topic": "news", "mode": "informative"}
+
+    async def main():
+        with pytest.raises(RuntimeError, match="LLM unavailable"):
+            await chat._initial_llm_node(state, {"configurable": {"thread_id": "thread"}})
+
+    asyncio.run(main())
+    assert speculation._pending == {}
+    assert speculation.stats()["started"] == 1 and speculation.stats()["misses"] == 1
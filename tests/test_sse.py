@@ -0,0 +1,86 @@
+import asyncio
+import json
+import pytest
+from src.utils import sse
+from src.utils.sse import encode_event, coalesce_frames, HEARTBEAT_FRAME
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+def test_encode_event_matches_json():
+    payload = {"type": "content", "content": "héllo \"world\"\n"}
+    frame = encode_event(payload)
+    assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+    assert json.loads(frame[len(b"data: "):]) == payload
+    assert encode_event({"type": "end"}) is encode_event({"type": "end"})
+
+def test_encode_event_without_orjson(monkeypatch):
+    monkeypatch.setattr(sse, "orjson", None)
+    assert json.loads(encode_event({"type": "content", "content": "é"})[len(b"data: "):]) == {"type": "content", "content": "é"}
+
+def test_frames_of_the_same_tick_are_written_together():
+    async def frames():
+        for index in range(5):
+            yield encode_event({"type": "content", "content": str(index)})
+        await asyncio.sleep(0.05)
+        yield encode_event({"type": "end"})
+
+    chunks = asyncio.run(collect(coalesce_frames(frames(), max_latency=0.01)))
+
+    assert len(chunks) == 2
+    assert chunks[0].count(b"data: ") == 5
+
+def test_frames_wait_up_to_max_latency_for_others():
+    async def frames():
+        for index in range(3):
+            yield encode_event({"type": "content", "content": str(index)})
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        yield encode_event({"type": "end"})
+
+    chunks = asyncio.run(collect(coalesce_frames(frames(), max_latency=0.1)))
+
+    assert [chunk.count(b"data: ") for chunk in chunks] == [3, 1]
+
+def test_big_writes_are_not_delayed():
+    async def frames():
+        for _ in range(4):
+            yield encode_event({"type": "content", "content": "x" * 1000})
+
+    chunks = asyncio.run(collect(coalesce_frames(frames(), max_bytes=2000)))
+    assert len(chunks) == 2
+
+def test_heartbeats_are_sent_while_idle():
+    async def frames():
+        await asyncio.sleep(0.25)
+        yield encode_event({"type": "end"})
+
+    chunks = asyncio.run(collect(coalesce_frames(frames(), heartbeat_interval=0.1)))
+    assert chunks[:2] == [HEARTBEAT_FRAME, HEARTBEAT_FRAME]
+    assert chunks[-1] == encode_event({"type": "end"})
+
+def test_source_errors_are_raised_and_closing_stops_the_source():
+    async def failing():
+        yield encode_event({"type": "content", "content": "a"})
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(collect(coalesce_frames(failing())))
+
+    closed = []
+
+    async def endless():
+        try:
+            while True:
+                await asyncio.sleep(0.01)
+                yield encode_event({"type": "content", "content": "a"})
+        finally:
+            closed.append(True)
+
+    async def main():
+        chunks = coalesce_frames(endless())
+        await chunks.__anext__()
+        await chunks.aclose()
+
+    asyncio.run(main())
+    assert closed == [True]
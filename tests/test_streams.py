@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from src.utils.sse import encode_event
+from src.utils.runs import RunManager, RunConflictError
+from tests.frames import make_frames, collect
+
+def event_ids(frames: list[bytes]) -> list[str]:
+    return [frame.split(b"\n", 1)[0].removeprefix(b"id: ").decode() for frame in frames]
+
+def test_frames_are_numbered_and_replayed_after_the_last_event():
+    async def scenario():
+        manager = RunManager()
+        buffer = manager.start("thread", "hi", make_frames(3))
+        first = await collect(buffer.subscribe(after_seq=0))
+
+        resumed, seq = manager.resume("thread:2")
+        replayed = await collect(resumed.subscribe(after_seq=seq))
+        return first, replayed
+
+    first, replayed = asyncio.run(scenario())
+    assert event_ids(first) == ["thread:1", "thread:2", "thread:3", "thread:4"]
+    assert replayed == first[2:]
+
+def test_reconnect_attaches_to_the_live_run():
+    async def scenario():
+        runs = []
+        manager = RunManager()
+        buffer = manager.start("thread", "hi", make_frames(5, delay=0.02, runs=runs))
+
+        # Client drops after the first frames
+        dropped = []
+        async for frame in buffer.subscribe(after_seq=0):
+            dropped.append(frame)
+            if len(dropped) == 2:
+                break
+
+        # Same request sent again while running, attaches instead of running twice
+        assert manager.start("thread", "hi", make_frames(5, runs=runs)) is buffer
+
+        resumed, seq = manager.resume(event_ids(dropped)[-1])
+        rest = await collect(resumed.subscribe(after_seq=seq))
+        return dropped, rest, runs
+
+    dropped, rest, runs = asyncio.run(scenario())
+    assert len(runs) == 1
+    assert event_ids(dropped + rest) == [f"thread:{seq}" for seq in range(1, 7)]
+    assert rest[-1].endswith(encode_event({"type": "end"}))
+
+def test_other_message_while_running_is_rejected():
+    async def scenario():
+        manager = RunManager()
+        manager.start("thread", "hi", make_frames(3, delay=0.05))
+        with pytest.raises(RunConflictError):
+            manager.start("thread", "other", make_frames(1))
+
+        # Next turn of the conversation continues the numbering
+        buffer = manager.buffers["thread"]
+        await buffer.task
+        buffer = manager.start("thread", "other", make_frames(1))
+        return await collect(buffer.subscribe(after_seq=buffer.run_start_seq - 1))
+
+    assert event_ids(asyncio.run(scenario())) == ["thread:5", "thread:6"]
+
+def test_evicted_history_is_reported():
+    async def scenario():
+        manager = RunManager(max_frames=3)
+        buffer = manager.start("thread", "hi", make_frames(5))
+        await buffer.task
+        return await collect(buffer.subscribe(after_seq=1))
+
+    frames = asyncio.run(scenario())
+    assert frames == [encode_event({"type": "error", "message": "Stream history is no longer available"})]
+
+def test_unknown_streams_and_finished_buffers_expire():
+    async def scenario():
+        manager = RunManager(ttl=0.0)
+        assert manager.resume("missing:1") is None
+        assert manager.resume("thread:abc") is None
+
+        buffer = manager.start("thread", "hi", make_frames(1))
+        await buffer.task
+        manager.start("other", "hi", make_frames(1))
+        return manager
+
+    manager = asyncio.run(scenario())
+    assert list(manager.buffers) == ["other"]
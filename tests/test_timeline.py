@@ -0,0 +1,202 @@
+import asyncio
+from langchain_core.messages import AIMessageChunk
+from langchain_core.runnables import RunnableLambda, RunnableGenerator
+from src.agent.timeline.timeline import Timeline
+from src.agent.timeline.models.output import TimelineEvent, TimelineOutput, EvaluateTimelineOutput
+from src.agent.timeline.utils.refinement import RefinementController
+from src.agent.timeline.utils.streaming import JSONArrayStreamParser
+from src.agent.timeline.utils.evidence import extract_evidence, format_evidence, find_date
+from src.tools.search_results import SearchResults
+from src.utils.metrics import TIMELINE_ITERATION_LATENCY, TIMELINE_ITERATION_SCORE
+from src.agent.timeline.utils.validation import autofix_events, validate_events, normalize_date, count_sentences
+
+def make_events(label: str) -> list[TimelineEvent]:
+    return [TimelineEvent(start_date=f"2024-01-{day:02d}", title=f"{label} {day}", content="Something happened.") for day in range(1, 7)]
+
+class FakeStructuredLLM:
+    """
+    Returns queued outputs for each structured output schema
+    """
+    def __init__(self, scores: list[float], generation_delays: list[float] | None = None):
+        self.scores = list(scores)
+        self.generation_delays = list(generation_delays or [])
+        self.calls = {"generate": 0, "evaluate": 0}
+
+    def with_structured_output(self, schema):
+        async def respond(_):
+            if schema is TimelineOutput:
+                self.calls["generate"] += 1
+                await asyncio.sleep(self.generation_delays.pop(0) if self.generation_delays else 0)
+                return TimelineOutput(events=make_events(f"draft{self.calls['generate']}"))
+            self.calls["evaluate"] += 1
+            return EvaluateTimelineOutput(score=self.scores.pop(0), improvements="more detail")
+        return RunnableLambda(respond)
+
+class FakeStreamingLLM(FakeStructuredLLM):
+    """
+    Streams the generated timeline as JSON text, like the Gemini structured output does
+    """
+    def with_structured_output(self, schema):
+        if schema is not TimelineOutput:
+            return super().with_structured_output(schema)
+
+        async def stream(_):
+            self.calls["generate"] += 1
+            text = TimelineOutput(events=make_events(f"draft{self.calls['generate']}")).model_dump_json()
+            for start in range(0, len(text), 7):
+                await asyncio.sleep(0)
+                yield AIMessageChunk(content=text[start:start + 7])
+
+        return RunnableGenerator(stream) | RunnableLambda(lambda message: TimelineOutput.model_validate_json(message.text))
+
+def run(timeline: Timeline, custom_events: list | None = None):
+    async def main():
+        drafts = []
+
+        async def timeline_node(_):
+            return await timeline.run(user_query="bitcoin history", search_info="...")
+
+        runner = RunnableLambda(timeline_node)
+        async for event in runner.astream_events({}, version="v2"):
+            if event["event"] == "on_custom_event" and event["name"] == "timeline_draft":
+                drafts.append(event["data"])
+            if event["event"] == "on_custom_event" and custom_events is not None:
+                custom_events.append((event["name"], event["data"]))
+            if event["event"] == "on_chain_end" and event["name"] == "timeline_node" and not event["parent_ids"]:
+                result = event["data"]["output"]
+        return result, drafts
+    return asyncio.run(main())
+
+def test_stops_at_target_score():
+    llm = FakeStructuredLLM(scores=[0.5, 0.9])
+    events, drafts = run(Timeline(llm=llm, controller=RefinementController(max_iterations=5)))
+
+    assert llm.calls == {"generate": 2, "evaluate": 2}
+    assert events[0].title == "draft2 1"
+    assert [round(draft["score"], 3) for draft in drafts] == [0.775, 0.955]
+
+def test_iteration_latency_and_score_are_exposed_as_metrics():
+    def observed(histogram, iteration: int) -> tuple[float, float]:
+        samples = {sample.name: sample.value for sample in histogram.labels(str(iteration)).collect()[0].samples}
+        return next(value for name, value in samples.items() if name.endswith("_count")), next(value for name, value in samples.items() if name.endswith("_sum"))
+
+    before = [observed(TIMELINE_ITERATION_SCORE, iteration) for iteration in (1, 2)]
+    latency_before = observed(TIMELINE_ITERATION_LATENCY, 2)[0]
+    run(Timeline(llm=FakeStructuredLLM(scores=[0.5, 0.9]), controller=RefinementController(max_iterations=5)))
+    after = [observed(TIMELINE_ITERATION_SCORE, iteration) for iteration in (1, 2)]
+
+    assert [count - previous[0] for (count, _), previous in zip(after, before)] == [1, 1]
+    assert [round(total - previous[1], 3) for (_, total), previous in zip(after, before)] == [0.775, 0.955]
+    assert observed(TIMELINE_ITERATION_LATENCY, 2)[0] == latency_before + 1
+
+def test_keeps_best_draft_and_stops_when_not_improving():
+    llm = FakeStructuredLLM(scores=[0.3, 0.2, 0.7])
+    events, drafts = run(Timeline(llm=llm, controller=RefinementController(max_iterations=5, patience=1)))
+
+    assert llm.calls["generate"] == 2
+    assert events[0].title == "draft1 1"
+    assert len(drafts) == 1
+
+def test_iterations_are_capped():
+    llm = FakeStructuredLLM(scores=[0.1, 0.2, 0.3, 0.4])
+    events, _ = run(Timeline(llm=llm, controller=RefinementController(max_iterations=3, patience=3)))
+
+    assert llm.calls["generate"] == 3
+    assert events[0].title == "draft3 1"
+
+def test_no_iteration_starts_past_the_deadline():
+    llm = FakeStructuredLLM(scores=[0.3, 0.4], generation_delays=[0.2, 0.2])
+    events, _ = run(Timeline(llm=llm, controller=RefinementController(max_iterations=10, patience=10, deadline=0.3)))
+
+    assert llm.calls["generate"] == 1
+    assert events[0].title == "draft1 1"
+
+def test_deadline_interrupts_slow_iteration_and_returns_best_draft():
+    llm = FakeStructuredLLM(scores=[0.3, 0.4], generation_delays=[0.05, 2.0])
+    events, _ = run(Timeline(llm=llm, controller=RefinementController(max_iterations=10, patience=10, deadline=0.3)))
+
+    assert llm.calls == {"generate": 2, "evaluate": 1}
+    assert events[0].title == "draft1 1"
+
+def test_dates_are_normalized_and_events_sorted():
+    events = autofix_events([
+        TimelineEvent(start_date="Date unknown", title="unknown", content="?"),
+        TimelineEvent(start_date="March 3rd, 2024", end_date="2024/03/01", title="reversed", content="."),
+        TimelineEvent(start_date="2023-12-31", end_date="Dec 31, 2023", title="single day", content="."),
+    ])
+
+    assert [(event.title, event.start_date, event.end_date) for event in events] == [
+        ("single day", "2023-12-31", None),
+        ("reversed", "2024-03-01", "2024-03-03"),
+        ("unknown", "Date unknown", None),
+    ]
+    assert normalize_date("2024-13-01") is None
+
+def test_structural_checks():
+    assert count_sentences("It rose (approx.) on Jan. 5 to $69k. Then it fell.") == 2
+
+    report = validate_events(make_events("event"))
+    assert report.passed and report.score == 1.0
+
+    verbose = make_events("event")
+    verbose[0] = verbose[0].model_copy(update={"content": "One. Two. Three."})
+    report = validate_events(verbose[:5] + [verbose[0]])
+    assert not report.passed
+    assert len(report.issues) == 3
+
+def test_structural_failures_skip_the_llm_evaluator():
+    llm = FakeStructuredLLM(scores=[])
+    original = llm.with_structured_output
+
+    def short_timeline(schema):
+        if schema is TimelineOutput:
+            return RunnableLambda(lambda _: TimelineOutput.model_construct(events=make_events("short")[:3]))
+        return original(schema)
+
+    llm.with_structured_output = short_timeline
+    events, _ = run(Timeline(llm=llm, controller=RefinementController(max_iterations=2)))
+
+    assert llm.calls["evaluate"] == 0
+    assert len(events) == 3
+
+def test_evidence_keeps_relevant_unique_dated_sentences():
+    search_results = [
+        SearchResults.from_tavily({"query": "q", "results": [
+            {"title": "SEC approves spot bitcoin ETFs", "url": "https://www.news.com/etf", "score": 0.9,
+             "content": "The SEC approved eleven spot bitcoin ETFs on January 10, 2024. Trading began the next day. Analysts were surprised."},
+            {"title": "Bitcoin ETF recap", "url": "https://blog.io/recap", "score": 0.5,
+             "content": "On January 10, 2024 the SEC approved eleven spot bitcoin ETFs. Grayscale won its lawsuit in Aug 2023. The weather was nice in 2019."},
+        ]}),
+    ]
+
+    evidence = extract_evidence("bitcoin ETF approval timeline", search_results)
+    assert [(item.date, item.source) for item in evidence] == [("2019", "blog.io"), ("2023-08", "blog.io"), ("2024-01-10", "news.com")]
+    assert all("Trading began" not in item.text for item in evidence)
+
+    # The least relevant sentence does not fit a small budget
+    small = extract_evidence("bitcoin ETF approval timeline", search_results, token_budget=40)
+    assert [item.date for item in small] == ["2023-08", "2024-01-10"]
+    assert format_evidence(small).startswith("- 2023-08: Grayscale won its lawsuit in Aug 2023. (blog.io)")
+
+def test_find_date():
+    assert find_date("It launched on 3rd March 2009 and peaked in 2021.") == "2009-03-03"
+    assert find_date("Released 2015-07-30.") == "2015-07-30"
+    assert find_date("Around Sept. 2022") == "2022-09"
+    assert find_date("It may rise 20%") is None
+
+def test_stream_parser_returns_complete_array_items():
+    parser = JSONArrayStreamParser("events")
+    text = '{"events": [{"title": "a } \\" [", "tags": [1, 2]}, {"title": "b"}], "other": [{"c": 1}]}'
+    items = [item for start in range(0, len(text), 3) for item in parser.feed(text[start:start + 3])]
+    assert items == [{"title": 'a } " [', "tags": [1, 2]}, {"title": "b"}]
+
+def test_first_draft_events_are_streamed_before_evaluation():
+    llm = FakeStreamingLLM(scores=[0.5, 0.9])
+    custom_events = []
+    events, _ = run(Timeline(llm=llm, controller=RefinementController(max_iterations=3)), custom_events)
+
+    names = [name for name, _ in custom_events]
+    assert names[:7] == ["timeline_event"] * 6 + ["timeline_draft"]
+    assert names.count("timeline_event") == 6
+    assert [data["event"].title for name, data in custom_events if name == "timeline_event"] == [event.title for event in make_events("draft1")]
+    assert events[0].title == "draft2 1"
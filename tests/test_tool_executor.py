@@ -0,0 +1,47 @@
+import asyncio
+import time
+from langchain_core.tools import tool
+from src.agent.chat.utils.tool_executor import ToolExecutor
+
+@tool
+async def slow_tool(delay: float) -> str:
+    """Sleep and echo the delay"""
+    await asyncio.sleep(delay)
+    return f"slept {delay}"
+
+@tool
+async def failing_tool() -> str:
+    """Always fails"""
+    raise RuntimeError("boom")
+
+executor = ToolExecutor(
+    tools={"slow_tool": slow_tool, "failing_tool": failing_tool},
+    max_concurrency=4,
+    tool_timeout=0.5,
+    batch_timeout=1.0
+)
+
+def test_tool_calls_run_concurrently_and_keep_order():
+    calls = [
+        {"name": "slow_tool", "id": "1", "args": {"delay": 0.2}},
+        {"name": "slow_tool", "id": "2", "args": {"delay": 0.1}},
+        {"name": "slow_tool", "id": "3", "args": {"delay": 0.2}},
+    ]
+    start = time.perf_counter()
+    messages = asyncio.run(executor.run(calls))
+    elapsed = time.perf_counter() - start
+
+    assert [m.tool_call_id for m in messages] == ["1", "2", "3"]
+    assert elapsed < 0.4
+
+def test_failures_become_error_messages():
+    calls = [
+        {"name": "failing_tool", "id": "1", "args": {}},
+        {"name": "slow_tool", "id": "2", "args": {"delay": 2}},
+        {"name": "missing_tool", "id": "3", "args": {}},
+        {"name": "slow_tool", "id": "4", "args": {"delay": 0}},
+    ]
+    messages = asyncio.run(executor.run(calls))
+
+    assert [m.status for m in messages] == ["error", "error", "error", "success"]
+    assert "timed out" in messages[1].content
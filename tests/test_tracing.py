@@ -0,0 +1,98 @@
+import asyncio
+import json
+from src.utils import tracing
+from src.utils.tracing import Tracer, JSONFileExporter, OTLPHTTPExporter, traced
+from src.utils.responses import generate_chat_responses
+from tests.test_responses import build_graph
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    async def export(self, spans):
+        self.spans.extend(spans)
+
+def test_spans_nest_across_tasks_and_are_written_to_file(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer = Tracer(JSONFileExporter(str(path)), flush_interval=10)
+
+    async def child(name: str):
+        with tracer.span(name):
+            await asyncio.sleep(0.01)
+
+    async def main():
+        with tracer.span("request", {"checkpoint_id": "thread"}):
+            await asyncio.gather(child("first"), child("second"))
+            try:
+                with tracer.span("failing"):
+                    raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+        with tracer.span("other request"):
+            pass
+        await tracer.close()
+
+    asyncio.run(main())
+    spans = {span["name"]: span for span in map(json.loads, path.read_text().splitlines())}
+
+    root = spans["request"]
+    assert root["parent_id"] is None and root["attributes"] == {"checkpoint_id": "thread"}
+    assert spans["first"]["parent_id"] == spans["second"]["parent_id"] == root["span_id"]
+    assert {spans[name]["trace_id"] for name in ("first", "second", "failing")} == {root["trace_id"]}
+    assert spans["failing"]["error"] == "RuntimeError: boom"
+    assert spans["other request"]["trace_id"] != root["trace_id"]
+    assert spans["first"]["duration_ms"] >= 10
+
+def test_graph_runs_are_traced(monkeypatch):
+    exporter = ListExporter()
+    tracer = Tracer(exporter)
+    monkeypatch.setattr(tracing, "tracer", tracer)
+    monkeypatch.setattr("src.utils.responses.tracer", tracer)
+
+    @traced("step", lambda value: {"value": value})
+    async def step(value: int):
+        tracing.tracer.record("steps", 0.5)
+        return value
+
+    async def main():
+        frames = [frame async for frame in generate_chat_responses(build_graph("Hi", followup="?"), "hi", "general")]
+        with tracer.span("batch"):
+            assert await step(3) == 3
+        await tracer.close()
+        return frames
+
+    asyncio.run(main())
+    spans = {span.name: span for span in exporter.spans}
+
+    assert spans["chat.request"].attributes["topic"] == "general"
+    assert spans["step"].attributes == {"value": 3} and spans["step"].parent_id == spans["batch"].span_id
+    # Recorded spans are siblings of the current one
+    assert spans["steps"].parent_id == spans["batch"].span_id
+    assert spans["steps"].end_ns - spans["steps"].start_ns >= 0.5e9
+
+def test_otlp_payload():
+    exporter = OTLPHTTPExporter("http://collector/v1/traces", service_name="chat")
+    span = tracing.Span(name="tool.get_weather", trace_id="a" * 32, span_id="b" * 16, parent_id="c" * 16,
+                        start_ns=1, end_ns=2, attributes={"retries": 2, "cached": True, "city": "Paris"}, error="Timeout")
+    assert exporter._span(span) == {
+        "traceId": "a" * 32,
+        "spanId": "b" * 16,
+        "parentSpanId": "c" * 16,
+        "name": "tool.get_weather",
+        "kind": 1,
+        "startTimeUnixNano": "1",
+        "endTimeUnixNano": "2",
+        "attributes": [
+            {"key": "retries", "value": {"intValue": "2"}},
+            {"key": "cached", "value": {"boolValue": True}},
+            {"key": "city", "value": {"stringValue": "Paris"}},
+        ],
+        "status": {"code": 2, "message": "Timeout"}
+    }
+
+def test_disabled_tracer_is_a_noop():
+    tracer = Tracer()
+    with tracer.span("anything") as span:
+        span.set_attribute("key", "value")
+    tracer.record("other", 1.0)
+    assert tracer._pending == []
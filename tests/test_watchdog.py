@@ -0,0 +1,37 @@
+import time
+import asyncio
+from src.utils.watchdog import LoopWatchdog
+
+def block_the_loop(seconds: float):
+    time.sleep(seconds)
+
+def test_blocking_calls_are_sampled():
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.05)
+
+    async def main():
+        watchdog.start()
+        await asyncio.sleep(0.05)
+        block_the_loop(0.3)
+        await asyncio.sleep(0.05)
+        await watchdog.stop()
+
+    asyncio.run(main())
+    stats = watchdog.stats()
+
+    assert not stats["running"]
+    assert stats["stalls"] == 1 and 0.25 < stats["blocked_seconds"] < 0.6
+    assert stats["lag_ms"]["max"] >= 250 and stats["lag_ms"]["p50"] < 50
+    top = stats["offenders"][0]
+    assert top["location"] == f"tests/test_watchdog.py:{block_the_loop.__code__.co_firstlineno + 1} in block_the_loop"
+    assert top["samples"] >= 10 and top["stack"][-1] == top["location"]
+
+def test_idle_loop_has_no_offenders():
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.05)
+
+    async def main():
+        watchdog.start()
+        await asyncio.sleep(0.2)
+        await watchdog.stop()
+
+    asyncio.run(main())
+    assert watchdog.stats()["offenders"] == [] and len(watchdog.lags) > 5